@@ -1,28 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
 import os
-import re
-from datetime import datetime
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-import math
-import time
 import streamlit as st
-import tempfile
-import urllib.robotparser
-import pandas as pd
-import io
-
-# Download NLTK resources
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('punkt_tab', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    nltk.download('wordnet', quiet=True)
-except Exception as e:
-    st.error(f"Failed to download NLTK resources: {str(e)}")
+import news_topics
+from news_topics import (
+    Reporter, ROBOTS_URL, ARTICLE_STORE_DIR, TOKENIZER_MODE, PARALLEL_WORKERS, OUT_OF_CORE_MEMORY_LIMIT_MB, OUT_OF_CORE_CSV_PATH,
+    RELATED_ARTICLES, RENDER_FALLBACK, TREND_WINDOW_DAYS, TREND_CHART_DAYS, RESULT_COLUMNS, EXPORT_FORMATS,
+    EXPORT_TEXT_CHARS, EXPORT_DIR, get_article_store, get_robots_policy, get_http_cache, get_crawl_frontier,
+    get_fetcher, get_similarity_index, get_term_trends, scrape_nyt, stream_scrape_nyt, fetch_articles_from_api,
+    prepare_corpus, score_corpus, analyze_tf_idf_out_of_core, related_articles, search_articles, trending_terms,
+    term_trend_series, corpus_topics, csv_columns, result_value, export_results, reset_run_metrics,
+    save_run_metrics,
+)
+from text_preprocessing import ensure_nltk_resources, get_pipeline
+from crawl_frontier import SECTION, ARTICLE, PENDING, FETCHED, FAILED
 
 # Streamlit app configuration
 st.set_page_config(page_title="New York Times Scraper", page_icon="📰", layout="wide")
@@ -124,405 +113,266 @@ with st.expander("📜 Crawlability Rules", expanded=True):
         """)
         st.info("These rules are enforced automatically to ensure responsible scraping.")
 
-# Define constants for web scraping and API
-NYT_URL = "https://www.nytimes.com/"
-ROBOTS_URL = "https://www.nytimes.com/robots.txt"
-NYT_API_KEY = 'tTO8EfnrGsUovwLNDCUY0rQyNuDoNFnA'  # Replace with your actual NYT API key
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.9',
-    'Accept-Encoding': 'gzip, deflate, br',
-    'Connection': 'keep-alive'
-}
-TARGET_ARTICLES_TO_SAVE = 100
-URL_COLLECTION_TARGET = TARGET_ARTICLES_TO_SAVE + 100
-MAX_SECTIONS_TO_PROCESS = 25
-
-# Create temporary directory for output
-output_dir = tempfile.mkdtemp()
-st.write(f"Articles will be saved temporarily in: {output_dir}")
-
-# Initialize robots.txt parser
-rp = urllib.robotparser.RobotFileParser()
-rp.set_url(ROBOTS_URL)
-try:
-    rp.read()
-except Exception as e:
-    st.warning(f"Failed to read robots.txt from {ROBOTS_URL}: {str(e)}. Assuming restrictive crawling policy.")
-
-# Function to check if URL is crawlable
-def is_crawl_allowed(url, user_agent=HEADERS['User-Agent']):
+# Reporter that renders progress, status and messages with Streamlit widgets.
+# Only used from the script thread; pipeline stages never report directly.
+class StreamlitReporter(Reporter):
+    def __init__(self):
+        self._progress_bar = st.progress(0)
+        self._status_text = st.empty()
+        self._metric = None
+        self._results_area = None
+
+    def status(self, text):
+        self._status_text.text(text)
+
+    def progress(self, fraction):
+        self._progress_bar.progress(fraction)
+
+    def info(self, message):
+        st.info(message)
+
+    def success(self, message):
+        st.success(message)
+
+    def caption(self, message):
+        st.caption(message)
+
+    def warning(self, message):
+        st.warning(message)
+
+    def error(self, message):
+        st.error(message)
+
+    def metric(self, label, value):
+        if self._metric is None:
+            self._metric = st.empty()
+        self._metric.metric(label, value)
+
+    def article(self, index, topic, url):
+        if self._results_area is None:
+            self._results_area = st.container()
+        self._results_area.write(f"**{index}.** {topic} — {url}")
+
+# Shared resources, created once per server process instead of on every rerun.
+# Failures raise, so they are not cached and the next rerun tries again.
+@st.cache_resource(show_spinner="Loading language models...")
+def load_nltk_models():
+    missing = ensure_nltk_resources(TOKENIZER_MODE)
+    if missing:
+        raise RuntimeError(f"Failed to download NLTK resources: {', '.join(missing)}")
+    return get_pipeline(TOKENIZER_MODE)
+
+@st.cache_resource(show_spinner=False)
+def load_robots_policy():
+    robots_policy = get_robots_policy()
+    robots_policy.refresh()
+    return robots_policy
+
+@st.cache_resource(show_spinner=False)
+def load_fetcher():
+    return get_fetcher()
+
+# TF-IDF results keyed by the content hash of the corpus and the size of the accumulated
+# statistics (document frequencies only change when documents are added)
+@st.cache_data(show_spinner=False, max_entries=32)
+def score_corpus_cached(corpus_digest, total_documents, _corpus):
+    return score_corpus(_corpus)
+
+# Function to run the TF-IDF analysis for a run, reusing cached results for an unchanged corpus
+def analyze_tf_idf_cached(article_urls):
     try:
-        allowed = rp.can_fetch(user_agent, url)
-        if not allowed:
-            st.warning(f"Crawling not permitted for {url} by robots.txt.")
-        return allowed
-    except Exception as e:
-        st.error(f"Error checking robots.txt for {url}: {str(e)}. Assuming not allowed.")
-        return False
-
-# Function to fetch a page with retries and exponential backoff
-def fetch_page(url, max_retries=3, delay_base=2):
-    if not is_crawl_allowed(url):
-        st.error(f"Skipping {url}: Crawling not permitted by robots.txt.")
-        raise ValueError("Crawling not permitted by robots.txt")
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            response.raise_for_status()
-            return response.text
-        except requests.exceptions.RequestException as e:
-            st.warning(f"Attempt {attempt+1}/{max_retries} failed for {url}: {str(e)}")
-            if attempt < max_retries - 1:
-                delay = delay_base * (2 ** attempt)
-                st.write(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
-            else:
-                st.error(f"Failed to fetch {url} after {max_retries} attempts.")
-                raise
-        except Exception as e:
-            st.error(f"Unexpected error during fetch attempt {attempt+1} for {url}: {str(e)}")
-            if attempt < max_retries - 1:
-                delay = delay_base * (2 ** attempt)
-                st.write(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
-            else:
-                st.error(f"Failed to fetch {url} due to unexpected error after {max_retries} attempts.")
-                raise
-
-# Preprocessing and TF-IDF functions
-def preprocess_document(document):
-    stop_words_set = set(stopwords.words('english'))
-    wordnet_lemmatizer = WordNetLemmatizer()
-    words = word_tokenize(document)
-    words = [word.lower() for word in words if word.isalpha()]
-    words = [word for word in words if word not in stop_words_set]
-    words = [wordnet_lemmatizer.lemmatize(word) for word in words]
-    return words
-
-def evaluate_term_frequency(document):
-    term_frequency = {}
-    processed_document = preprocess_document(document)
-    for word in processed_document:
-        term_frequency[word] = term_frequency.get(word, 0) + 1
-    doc_length = len(processed_document)
-    if doc_length == 0:
-        return {}
-    for word in term_frequency:
-        term_frequency[word] /= doc_length
-    return term_frequency
-
-def evaluate_inverse_document_frequency(documents_list):
-    inverse_document_frequency = {}
-    total_documents = len(documents_list)
-    if total_documents == 0:
-        return {}
-    all_words_in_docs = {}
-    for document_content in documents_list:
-        processed_doc = preprocess_document(document_content)
-        unique_words_in_doc = set(processed_doc)
-        for word in unique_words_in_doc:
-            all_words_in_docs[word] = all_words_in_docs.get(word, 0) + 1
-    for word, count in all_words_in_docs.items():
-        inverse_document_frequency[word] = math.log(total_documents / (1 + count))
-    return inverse_document_frequency
-
-def evaluate_tf_idf(documents_list):
-    tf_idf_scores_list = []
-    if not documents_list:
-        return tf_idf_scores_list
-    idf_scores = evaluate_inverse_document_frequency(documents_list)
-    for document_content in documents_list:
-        tf_scores = evaluate_term_frequency(document_content)
-        current_tf_idf = {word: tf_scores.get(word, 0) * idf_scores.get(word, 0) for word in tf_scores}
-        tf_idf_scores_list.append(current_tf_idf)
-    return tf_idf_scores_list
-
-# Main web scraping function
-def scrape_nyt():
-    article_links_set = set()
-    section_links_to_visit = []
-    processed_section_links = set()
-    successfully_saved_files = []
-    saved_articles_count = 0
-
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    status_text.text("Starting article link collection...")
-
-    try:
-        status_text.text(f"Fetching homepage: {NYT_URL}")
-        home_page_text = fetch_page(NYT_URL)
-        soup = BeautifulSoup(home_page_text, 'html.parser')
-
-        for a in soup.find_all('a', href=True):
-            if len(article_links_set) >= URL_COLLECTION_TARGET:
-                break
-            href = a['href']
-            if href.startswith(('https://www.nytimes.com/20', '/20')) and \
-               not href.endswith(('.jpg', '.png', '/interactive/', '/video/', '.json', '.xml', '.rss')):
-                if href.startswith('/'):
-                    href = 'https://www.nytimes.com' + href
-                if is_crawl_allowed(href):
-                    article_links_set.add(href)
-
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if href.startswith(('/section/', 'https://www.nytimes.com/section/')):
-                if href.startswith('/'):
-                    href = 'https://www.nytimes.com' + href
-                if href not in processed_section_links and href not in section_links_to_visit and is_crawl_allowed(href):
-                    section_links_to_visit.append(href)
-        status_text.text(f"Found {len(section_links_to_visit)} sections to explore.")
-    except Exception as e:
-        st.error(f"Failed to scrape homepage: {str(e)}")
-        return [], []
-
-    sections_processed_count = 0
-    while len(article_links_set) < URL_COLLECTION_TARGET and section_links_to_visit and sections_processed_count < MAX_SECTIONS_TO_PROCESS:
-        section_link = section_links_to_visit.pop(0)
-        if section_link in processed_section_links:
-            continue
-        processed_section_links.add(section_link)
-        sections_processed_count += 1
-        status_text.text(f"Processing section {sections_processed_count}/{MAX_SECTIONS_TO_PROCESS}: {section_link}")
-        progress = min(len(article_links_set) / URL_COLLECTION_TARGET, 1.0)
-        progress_bar.progress(progress)
+        load_nltk_models()
+    except RuntimeError:
+        pass  # Reported by prepare_corpus if any article still needs preprocessing
+    corpus = prepare_corpus(article_urls, StreamlitReporter())
+    if corpus is None:
+        return []
+    return score_corpus_cached(corpus['digest'], corpus['total_documents'], corpus)
+
+RESULTS_PAGE_SIZES = (25, 50, 100, 250)  # Articles per page of the results table
+PREVIEW_CHARS = 200  # Characters of article text shown per row
+
+# Function to check whether a result matches a lowercase search string (URL, topics or top terms)
+def result_matches(result, query):
+    return (query in result['url'].lower() or query in result['topic'].lower()
+            or query in result.get('corpus_topic_label', '').lower()
+            or any(query in word for word, score in result['top_terms']))
+
+# TF-IDF results as one paginated, searchable table; only the rows of the current page are built
+def display_tf_idf_results(results):
+    topics = corpus_topics()
+    if topics:
+        st.subheader("Corpus Topics")
+        st.table({label: ", ".join(term for term, weight in terms) for label, terms in topics})
 
+    st.subheader("TF-IDF Analysis Results")
+    columns = st.columns([3, 1, 1])
+    query = columns[0].text_input("Search by URL, topic or term", key='results_search').strip().lower()
+    page_size = columns[1].selectbox("Articles per page", RESULTS_PAGE_SIZES, key='results_page_size')
+    matching = [i for i, result in enumerate(results) if result_matches(result, query)] if query else range(len(results))
+    pages = max(1, -(-len(matching) // page_size))
+    # The label changes with the page count, which resets the page when the search changes
+    page = columns[2].number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+    shown = matching[(page - 1) * page_size:page * page_size]
+    table = {
+        '#': [i + 1 for i in shown],
+        'Article URL': [results[i]['url'] for i in shown],
+        'Most Probable Topic': [results[i]['topic'] for i in shown],
+    }
+    if 'corpus_topic_label' in results[0]:
+        table['Corpus Topic'] = [f"{results[i]['corpus_topic_label']} ({max(results[i]['topic_distribution']):.0%})"
+                                 for i in shown]
+    table['Top Terms'] = [result_value(results[i], 'Top Terms') for i in shown]
+    table['Article Data'] = [result_value(results[i], 'Article Data', PREVIEW_CHARS) for i in shown]
+    st.dataframe(table, hide_index=True, column_config={'Article URL': st.column_config.LinkColumn()})
+    if shown:
+        st.caption(f"Showing articles {(page - 1) * page_size + 1}-{(page - 1) * page_size + len(shown)} "
+                   f"of {len(matching)}" + (f" matching '{query}'" if query else "") + ".")
+    else:
+        st.caption(f"No articles match '{query}'.")
+    display_results_export(results)
+
+# Export options and download; the file is written to disk in chunks only when asked for
+def display_results_export(results):
+    st.subheader("Export Results")
+    available = [column for column in RESULT_COLUMNS if column != 'Corpus Topic' or 'corpus_topic_label' in results[0]]
+    columns = st.columns([3, 1, 1])
+    export_columns = columns[0].multiselect("Columns", available, default=list(csv_columns(results)), key='export_columns')
+    max_text_chars = columns[1].number_input("Article text characters (0 = full text)", min_value=0,
+                                             value=EXPORT_TEXT_CHARS or 0, step=100, key='export_text_chars')
+    export_format = columns[2].radio("Format", EXPORT_FORMATS, format_func=str.upper, horizontal=True, key='export_format')
+    if st.button("Prepare Download", disabled=not export_columns):
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        path = os.path.join(EXPORT_DIR, f"nyt_articles_with_topics.{export_format}")
         try:
-            section_page_text = fetch_page(section_link)
-            section_soup = BeautifulSoup(section_page_text, 'html.parser')
-            for a in section_soup.find_all('a', href=True):
-                if len(article_links_set) >= URL_COLLECTION_TARGET:
-                    break
-                href = a['href']
-                if href.startswith(('https://www.nytimes.com/20', '/20')) and \
-                   not href.endswith(('.jpg', '.png', '/interactive/', '/video/', '.json', '.xml', '.rss')):
-                    if href.startswith('/'):
-                        href = 'https://www.nytimes.com' + href
-                    if is_crawl_allowed(href):
-                        article_links_set.add(href)
-        except Exception as e:
-            st.warning(f"Failed to scrape section {section_link}: {str(e)}")
-
-    status_text.text(f"Collected {len(article_links_set)} article links.")
-
-    candidate_article_links = list(article_links_set)
-    for link_idx, link in enumerate(candidate_article_links):
-        if saved_articles_count >= TARGET_ARTICLES_TO_SAVE:
-            break
-        status_text.text(f"Scraping article {link_idx + 1}/{len(candidate_article_links)}: {link}")
-        progress = min((link_idx + 1) / len(candidate_article_links), 1.0)
-        progress_bar.progress(progress)
-
-        try:
-            article_page_text = fetch_page(link)
-            article_soup = BeautifulSoup(article_page_text, 'html.parser')
-            paragraphs = article_soup.find_all('p', class_=re.compile('css-.*'))
-            content = '\n'.join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
-            if not content:
-                story_body = article_soup.find('section', attrs={'name': 'articleBody'})
-                if story_body:
-                    paragraphs = story_body.find_all('p')
-                else:
-                    paragraphs = article_soup.find_all('p')
-                content = '\n'.join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
-            if not content:
-                st.warning(f"No content extracted from {link}. Skipping.")
-                continue
-
-            file_content = f"URL: {link}\nDate: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n{content}"
-            filename = f"article_{saved_articles_count + 1}.txt"
-            filepath = os.path.join(output_dir, filename)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(file_content)
-            successfully_saved_files.append(filepath)
-            saved_articles_count += 1
-            st.success(f"Saved: {filename}")
-        except Exception as e:
-            st.warning(f"Failed to scrape {link}: {str(e)}")
-
-    status_text.text(f"Saved {saved_articles_count} articles.")
-    progress_bar.progress(1.0)
-    return successfully_saved_files, candidate_article_links
-
-# Updated API-based article fetching function
-def fetch_articles_from_api(num_articles):
-    API_ENDPOINT = "https://api.nytimes.com/svc/search/v2/articlesearch.json"
-    successfully_saved_files = []
-    saved_articles_count = 0
-    page = 0
-    articles = []
-    MIN_CONTENT_WORDS = 20  # Minimum number of words to consider content valid
-
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    status_text.text("Starting API article fetching...")
-
-    while len(articles) < num_articles:
-        status_text.text(f"Fetching page {page + 1} from NYT API...")
-        try:
-            response = requests.get(
-                API_ENDPOINT,
-                params={'q': 'news', 'page': page, 'api-key': NYT_API_KEY}
+            with st.spinner("Writing export..."):
+                export_results(results, path, export_format, export_columns, max_text_chars)
+            st.session_state['export'] = path
+        except ImportError as e:
+            st.error(str(e))
+    path = st.session_state.get('export')
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            st.download_button(
+                label=f"Download {os.path.basename(path)} ({os.path.getsize(path) / 2 ** 20:.1f} MB)",
+                data=f,
+                file_name=os.path.basename(path),
+                mime="text/csv" if path.endswith('.csv') else "application/octet-stream",
             )
-            response.raise_for_status()
-            data = response.json()
-            docs = data.get('response', {}).get('docs', [])
-            if not docs:
-                status_text.text("No more articles available from API.")
-                break
-            for doc in docs:
-                if len(articles) >= num_articles:
-                    break
-                # Combine multiple fields for richer content
-                headline = doc.get('headline', {}).get('main', '')
-                snippet = doc.get('snippet', '')
-                abstract = doc.get('abstract', '')
-                lead_paragraph = doc.get('lead_paragraph', '')
-                byline = doc.get('byline', {}).get('original', '')
-                # Combine fields, avoiding duplicates
-                content_parts = set()
-                for part in [headline, snippet, abstract, lead_paragraph, byline]:
-                    if part and part not in content_parts:
-                        content_parts.add(part)
-                content = ' '.join(content_parts).strip()
-                # Validate content length
-                word_count = len(word_tokenize(content))
-                if not content or word_count < MIN_CONTENT_WORDS:
-                    st.warning(f"Skipping article with insufficient content ({word_count} words): {doc.get('web_url', 'Unknown URL')}")
-                    continue
-                articles.append({
-                    'url': doc.get('web_url', ''),
-                    'content': content
-                })
-            page += 1
-            progress = min(len(articles) / num_articles, 1.0)
-            progress_bar.progress(progress)
-            time.sleep(1)  # Respect API rate limits
-        except requests.exceptions.HTTPError as e:
-            st.error(f"API request failed: {str(e)}")
-            if e.response.status_code == 401:
-                st.error("Invalid API key. Please check the NYT_API_KEY constant in the code.")
-            elif e.response.status_code == 429:
-                st.error("API rate limit exceeded. Please wait and try again.")
-            break
-        except Exception as e:
-            st.error(f"Unexpected error during API fetch: {str(e)}")
-            break
-
-    # Save articles to files
-    for i, article in enumerate(articles):
-        if saved_articles_count >= num_articles:
-            break
-        file_content = f"URL: {article['url']}\nDate: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n{article['content']}"
-        filename = f"api_article_{saved_articles_count + 1}.txt"
-        filepath = os.path.join(output_dir, filename)
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(file_content)
-            successfully_saved_files.append(filepath)
-            saved_articles_count += 1
-            st.success(f"Saved: {filename}")
-        except Exception as e:
-            st.warning(f"Failed to save article {filename}: {str(e)}")
-
-    status_text.text(f"Saved {saved_articles_count} articles via API.")
-    progress_bar.progress(1.0)
-    return successfully_saved_files
-
-# Modified TF-IDF analysis and display with CSV generation
-def analyze_and_display_tf_idf(successfully_saved_files):
-    if not successfully_saved_files:
-        st.error("No articles saved for TF-IDF analysis.")
+        st.caption(f"Also saved to {path}")
+
+# Function to analyze a finished run and save its metrics, keeping both in session state so later
+# reruns (any widget interaction) show them again without recomputing
+def finish_run(source, saved_urls):
+    results = analyze_tf_idf_cached(saved_urls) if saved_urls else []
+    st.session_state.pop('export', None)
+    st.session_state['last_run'] = {'source': source, 'urls': saved_urls, 'results': results,
+                                    'metrics': save_run_metrics(source)}
+
+# Function to show the results and metrics of the last run if it came from the given source
+def display_last_run(source):
+    last_run = st.session_state.get('last_run')
+    if last_run is not None and last_run['source'] == source:
+        if last_run['results']:
+            display_tf_idf_results(last_run['results'])
+        display_run_metrics(last_run['metrics'])
+
+# Function to show a compact dashboard of a run's counters and stage timings
+def display_run_metrics(run_metrics):
+    if run_metrics is None:
         return
-
-    documents_content_list = []
-    file_urls = []
-    for filepath in successfully_saved_files:
-        try:
-            with open(filepath, "r", encoding="utf-8") as file:
-                content = file.read()
-                lines = content.splitlines()
-                try:
-                    url_line = next(line for line in lines if line.startswith('URL: '))
-                    url = url_line.replace('URL: ', '').strip()
-                    try:
-                        first_newline_idx = content.index('\n')
-                        second_newline_idx = content.index('\n', first_newline_idx + 1)
-                        content_part = content[second_newline_idx+1:].strip()
-                    except ValueError:
-                        content_part = content
-                    documents_content_list.append(content_part)
-                    file_urls.append(url)
-                except StopIteration:
-                    st.warning(f"No URL found in {filepath}. Skipping.")
-                    continue
-        except Exception as e:
-            st.warning(f"Error reading {filepath}: {str(e)}")
-            continue
-
-    if not documents_content_list:
-        st.error("No content read for TF-IDF analysis.")
-        return
-
-    tf_idf_results = evaluate_tf_idf(documents_content_list)
-    
-    # Prepare CSV data
-    csv_data = []
-    st.subheader("TF-IDF Analysis Results")
-    for i, tf_idf_score_map in enumerate(tf_idf_results):
-        sorted_terms = sorted(tf_idf_score_map.items(), key=lambda x: x[1], reverse=True)
-        top_words = [word for word, score in sorted_terms[:4]]
-        topic = " ".join(top_words).title()
-        filename = os.path.basename(successfully_saved_files[i])
-        article_content = documents_content_list[i].replace('\n', ' ')  # Replace newlines to avoid CSV formatting issues
-        csv_data.append({
-            'Article Data': article_content,
-            'Article URL': file_urls[i] if i < len(file_urls) else 'Unknown',
-            'Most Probable Topic': topic
-        })
-        
-        with st.expander(f"Article: {filename}"):
-            st.write(f"**Most Probable Topic**: {topic}")
-            st.write(f"**URL**: {file_urls[i] if i < len(file_urls) else 'Unknown'}")
-            st.write("**Top Words and Scores**:")
-            st.table({word: round(score, 4) for word, score in sorted_terms[:4]})
-
-    # Generate CSV
-    if csv_data:
-        df = pd.DataFrame(csv_data)
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False, encoding='utf-8')
-        csv_content = csv_buffer.getvalue()
-        
-        # Display CSV as a table
-        st.subheader("Generated CSV File")
-        st.write("Below is the content of the generated CSV file containing article data, URLs, and topics:")
-        st.dataframe(df)
-        
-        # Provide download button
-        st.download_button(
-            label="Download CSV",
-            data=csv_content,
-            file_name="nyt_articles_with_topics.csv",
-            mime="text/csv"
-        )
-    else:
-        st.error("No data available to generate CSV.")
+    snapshot, json_path, prometheus_path = run_metrics
+    totals = {}
+    for counter in snapshot['counters']:
+        totals[counter['name']] = totals.get(counter['name'], 0) + counter['value']
+    fetches = next((timer for timer in snapshot['timers'] if timer['name'] == 'fetch'), None)
+    with st.expander(f"📊 Run Metrics ({snapshot['elapsed_seconds']:.1f}s)"):
+        columns = st.columns(4)
+        columns[0].metric("Articles Saved", totals.get('articles_saved', 0))
+        columns[1].metric("HTTP Requests", fetches['count'] if fetches else 0)
+        columns[2].metric("Downloaded", f"{totals.get('fetch_bytes', 0) / 2 ** 20:.1f} MB")
+        columns[3].metric("Retries", totals.get('fetch_retries', 0),
+                          help=f"{totals.get('fetch_backoff_seconds', 0):.0f}s of backoff, "
+                               f"{totals.get('fetch_rate_limit_wait_seconds', 0):.1f}s waiting for the rate limit")
+        if snapshot['timers']:
+            st.table({
+                'Stage': [timer['name'] for timer in snapshot['timers']],
+                'Calls': [timer['count'] for timer in snapshot['timers']],
+                'Items': [timer['items'] for timer in snapshot['timers']],
+                'Total (s)': [round(timer['seconds'] or 0.0, 3) for timer in snapshot['timers']],
+                'p50 (ms)': [round(timer['quantiles'].get('0.5', 0.0) * 1000, 2) for timer in snapshot['timers']],
+                'p99 (ms)': [round(timer['quantiles'].get('0.99', 0.0) * 1000, 2) for timer in snapshot['timers']],
+            })
+        details = [f"{counter['name']} ({', '.join(f'{key}={value}' for key, value in counter['labels'].items())}): "
+                   f"{counter['value']:g}" for counter in snapshot['counters'] if counter['labels']]
+        if details:
+            st.caption("; ".join(details))
+        st.caption(f"Saved to {json_path} and {prometheus_path}")
+
+# Function to summarize robots.txt denials for the last run in a single widget
+def display_robots_summary():
+    robots_policy = load_robots_policy()
+    if robots_policy.load_error is not None:
+        st.warning(f"Failed to read robots.txt from {ROBOTS_URL}: {str(robots_policy.load_error)}. Assuming restrictive crawling policy.")
+    distinct_paths, total_denials, most_common = robots_policy.denial_summary()
+    if total_denials:
+        st.warning(f"robots.txt denied {total_denials} URL checks across {distinct_paths} distinct paths.")
+        with st.expander("Paths denied by robots.txt"):
+            st.table({path: count for path, count in most_common})
+
+# Function to show how much of the crawl frontier is done, pending or failed
+def display_crawl_frontier():
+    counts = get_crawl_frontier().counts()
+    st.caption(
+        f"Crawl frontier: {counts.get((SECTION, PENDING), 0)} sections and "
+        f"{counts.get((ARTICLE, PENDING), 0)} articles pending; "
+        f"{counts.get((SECTION, FETCHED), 0)} sections and {counts.get((ARTICLE, FETCHED), 0)} articles fetched; "
+        f"{counts.get((SECTION, FAILED), 0) + counts.get((ARTICLE, FAILED), 0)} URLs failed."
+    )
+
+# Function to display HTTP cache effectiveness for the last run
+def display_cache_stats():
+    stats = get_http_cache().stats()
+    st.metric("HTTP Cache Hit Rate", f"{stats['hit_rate']:.0%}")
+    st.caption(
+        f"{stats['hits']} fresh hits, {stats['revalidated']} revalidated (304), "
+        f"{stats['misses']} full downloads; {stats['bytes'] / (1024 * 1024):.1f} MB cached on disk"
+    )
+
+# Function to reset the per-run counters shown after a run
+def reset_run_stats():
+    get_http_cache().reset_stats()
+    load_robots_policy().reset_denials()
+    reset_run_metrics()
+
+st.write(f"Articles are stored in: {ARTICLE_STORE_DIR} ({len(get_article_store())} so far)")
+news_topics.PARALLEL_WORKERS = int(st.number_input(
+    "Worker processes for extraction and preprocessing", min_value=0, value=PARALLEL_WORKERS, step=1,
+    help="1 runs everything in this process; 0 starts one worker per CPU core. The pool is kept between runs.",
+))
 
 # Streamlit UI
 st.subheader("Web Scraping")
 st.write("Click the button below to start scraping articles and analyzing their topics using TF-IDF.")
+stream_results = st.checkbox("Stream results as articles arrive", value=True)
+resume_crawl = st.checkbox("Resume previous crawl", value=True, help="Continue from the saved crawl frontier instead of starting again from the homepage.")
+render_fallback = st.checkbox("Render script-only pages in a headless browser", value=RENDER_FALLBACK, disabled=stream_results,
+                              help="Pages without an article body in their HTML are rendered in headless Chromium and extracted again. Needs Playwright; not available while streaming.")
 if st.button("Start Web Scraping"):
     with st.spinner("Scraping in progress..."):
-        saved_files, article_links = scrape_nyt()
-        if saved_files:
-            analyze_and_display_tf_idf(saved_files)
+        load_fetcher()
+        reset_run_stats()
+        if stream_results:
+            saved_urls = stream_scrape_nyt(StreamlitReporter(), resume_crawl)
         else:
+            saved_urls = scrape_nyt(StreamlitReporter(), resume_crawl, render_fallback=render_fallback)
+        display_cache_stats()
+        display_crawl_frontier()
+        display_robots_summary()
+        finish_run('scrape', saved_urls)
+        if not saved_urls:
             st.error("No articles were successfully saved.")
+display_last_run('scrape')
 
 st.subheader("NYT API Fetching")
 st.warning("Note: The NYT API provides article metadata (headline, abstract, lead paragraph) rather than full article text, which may result in less accurate TF-IDF analysis compared to web scraping. For full articles, consider requesting permission from NYT.")
@@ -530,8 +380,85 @@ st.write("Enter the number of articles to fetch, then click the button below to
 api_num_articles = st.number_input("Number of articles to fetch via API", min_value=1, value=10, step=1)
 if st.button("Start API Fetching"):
     with st.spinner("Fetching articles from NYT API..."):
-        saved_files = fetch_articles_from_api(api_num_articles)
-        if saved_files:
-            analyze_and_display_tf_idf(saved_files)
-        else:
+        load_fetcher()
+        reset_run_stats()
+        saved_urls = fetch_articles_from_api(api_num_articles, StreamlitReporter())
+        display_cache_stats()
+        display_robots_summary()
+        finish_run('api', saved_urls)
+        if not saved_urls:
             st.error("No articles were successfully fetched.")
+display_last_run('api')
+
+st.subheader("Related Articles")
+st.write(f"Find articles covering the same story among the {len(get_similarity_index())} analyzed so far: "
+         "enter the URL of an analyzed article, or any text to search for.")
+related_query = st.text_input("Article URL or search text").strip()
+num_related = st.slider("Number of related articles", min_value=1, max_value=20, value=RELATED_ARTICLES)
+if related_query:
+    if related_query.startswith(('http://', 'https://')):
+        if related_query not in get_similarity_index():
+            st.info("This article has not been analyzed yet; run a scrape or API fetch that includes it first.")
+        matches = related_articles(related_query, num_related)
+    else:
+        try:
+            load_nltk_models()
+        except RuntimeError:
+            pass  # Reported by search_articles
+        matches = search_articles(related_query, num_related, StreamlitReporter())
+    if matches:
+        st.table({'Article URL': [url for url, score in matches], 'Similarity': [round(score, 3) for url, score in matches]})
+    else:
+        st.caption("No related articles found.")
+
+st.subheader("Topic Trends")
+day_range = get_term_trends().day_range()
+if day_range is None:
+    st.info("No analyzed articles with a publication date yet. Trends build up as articles are scraped or fetched "
+            "and analyzed; analyzing the whole article store below adds the articles saved before.")
+else:
+    first_day, last_day = day_range
+    columns = st.columns(3)
+    trend_end = columns[0].date_input("Window ends on", value=last_day, min_value=first_day, max_value=last_day)
+    trend_window = columns[1].slider("Window (days)", min_value=1, max_value=30, value=TREND_WINDOW_DAYS)
+    trend_days = columns[2].slider("Days charted", min_value=7, max_value=365, value=TREND_CHART_DAYS)
+    trend_end, trending = trending_terms(trend_end, trend_window)
+    if trending:
+        st.write(f"Terms rising most in the {trend_window} days up to {trend_end:%B %d, %Y}, "
+                 f"compared with the {trend_window} days before:")
+        st.dataframe({
+            'Term': [row['term'] for row in trending],
+            'Articles': [row['documents'] for row in trending],
+            'Articles Before': [row['previous_documents'] for row in trending],
+            'Share': [f"{row['share']:.1%}" for row in trending],
+            'Change': [f"{row['change']:.1f}x" if row['change'] is not None else "n/a" for row in trending],
+        }, hide_index=True)
+    else:
+        st.caption("Not enough articles in this window to find trending terms.")
+    chart_terms = st.multiselect("Terms to chart", [row['term'] for row in trending],
+                                 default=[row['term'] for row in trending[:5]])
+    other_terms = st.text_input("Other terms to chart (comma-separated)")
+    chart_terms += [term.strip().lower() for term in other_terms.split(',') if term.strip()]
+    if chart_terms:
+        import pandas as pd  # Only needed for the chart
+
+        days, window_documents, shares = term_trend_series(chart_terms, trend_end, trend_days, trend_window)
+        st.line_chart(pd.DataFrame(shares, index=pd.to_datetime(days)))
+        st.caption(f"Share of the articles published in the {trend_window} days up to each day that contain the term.")
+
+st.subheader("Analyze the Whole Article Store")
+st.write("Analyze every stored article in memory-bounded chunks. Results are written to a CSV file on disk "
+         "instead of being shown here, so stores larger than RAM can be analyzed.")
+memory_limit_mb = st.number_input("Memory limit (MB)", min_value=64, value=OUT_OF_CORE_MEMORY_LIMIT_MB, step=64)
+if st.button("Analyze Article Store"):
+    with st.spinner("Analyzing the article store..."):
+        try:
+            load_nltk_models()
+        except RuntimeError:
+            pass  # Reported by the analysis if any article still needs preprocessing
+        reset_run_metrics()
+        with open(OUT_OF_CORE_CSV_PATH, 'w', encoding='utf-8', newline='') as f:
+            summary = analyze_tf_idf_out_of_core(get_article_store().urls(), f, StreamlitReporter(), memory_limit_mb)
+        if summary:
+            st.success(f"Wrote {summary['documents']} articles to {OUT_OF_CORE_CSV_PATH}")
+        display_run_metrics(save_run_metrics('analyze'))
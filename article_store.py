@@ -0,0 +1,169 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+from datetime import datetime
+
+# Append-only article store.
+#
+# Articles live in one JSONL log (articles.jsonl) instead of one .txt file per
+# article, and each record holds the URL, fetch timestamp, source ('scrape' or
+# 'api'), publication timestamp when the source gives one, and raw text. A
+# sidecar offset index (articles.idx, one "offset<TAB>length<TAB>url" line per
+# record) lets analysis jump straight to any record; bulk reads memory-map the
+# log and decode only the requested slices. Token lists produced by
+# preprocessing are cached the same way in tokens.jsonl, keyed by URL and
+# tokenizer mode and tagged with a digest of the text, so articles that were
+# already tokenized are not tokenized again. Re-appending a URL supersedes the
+# older record (and its cached tokens).
+
+
+class _JsonlLog:
+    def __init__(self, path, key_field='url'):
+        self.path = path
+        self.key_field = key_field
+        self.index_path = os.path.splitext(path)[0] + '.idx'
+        self._offsets = {}
+        self._lock = threading.Lock()
+        open(self.path, 'ab').close()
+        self._load_index()
+
+    def _load_index(self):
+        indexed_end = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t', 2)
+                    if len(parts) != 3:
+                        continue
+                    offset, length = int(parts[0]), int(parts[1])
+                    self._offsets[parts[2]] = (offset, length)
+                    indexed_end = max(indexed_end, offset + length)
+        # Index any records written after the last index update (e.g. after a crash)
+        if os.path.getsize(self.path) > indexed_end:
+            with open(self.path, 'rb') as log, open(self.index_path, 'a', encoding='utf-8') as index:
+                log.seek(indexed_end)
+                offset = indexed_end
+                for raw in log:
+                    if raw.endswith(b'\n'):
+                        try:
+                            key = json.loads(raw)[self.key_field]
+                        except (ValueError, KeyError):
+                            key = None
+                        if key is not None:
+                            self._offsets[key] = (offset, len(raw))
+                            index.write(f"{offset}\t{len(raw)}\t{key}\n")
+                    offset += len(raw)
+
+    def __contains__(self, key):
+        return key in self._offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def keys(self):
+        return list(self._offsets)
+
+    # Function to get the stored size of a record in bytes, or None if unknown
+    def record_size(self, key):
+        entry = self._offsets.get(key)
+        return entry[1] if entry is not None else None
+
+    def append_many(self, records):
+        with self._lock, open(self.path, 'ab') as log, open(self.index_path, 'a', encoding='utf-8') as index:
+            offset = log.tell()
+            entries = []
+            for record in records:
+                raw = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+                log.write(raw)
+                entries.append((record[self.key_field], offset, len(raw)))
+                offset += len(raw)
+            log.flush()
+            for key, record_offset, length in entries:
+                index.write(f"{record_offset}\t{length}\t{key}\n")
+                self._offsets[key] = (record_offset, length)
+
+    # Function to read many records in one pass over a memory map of the log
+    def read_many(self, keys):
+        results = [None] * len(keys)
+        wanted = [(self._offsets[key], i) for i, key in enumerate(keys) if key in self._offsets]
+        if not wanted or os.path.getsize(self.path) == 0:
+            return results
+        wanted.sort()
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for (offset, length), i in wanted:
+                results[i] = json.loads(mapped[offset:offset + length])
+        return results
+
+
+class ArticleStore:
+    def __init__(self, store_dir):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self._articles = _JsonlLog(os.path.join(store_dir, 'articles.jsonl'))
+        self._tokens = _JsonlLog(os.path.join(store_dir, 'tokens.jsonl'), key_field='key')
+
+    def __contains__(self, url):
+        return url in self._articles
+
+    def __len__(self):
+        return len(self._articles)
+
+    def urls(self):
+        return self._articles.keys()
+
+    def append(self, url, text, source, fetched_at=None, published=None):
+        self.append_many([(url, text, source, fetched_at, published)])
+        return url
+
+    # Function to append (url, text, source, fetched_at, published) tuples in a single write
+    def append_many(self, articles):
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._articles.append_many(
+            {'url': url, 'fetched_at': fetched_at or now, 'source': source, 'published': published, 'text': text}
+            for url, text, source, fetched_at, published in articles
+        )
+
+    # Function to read article records (dicts, or None if unknown) for many URLs
+    def get_many(self, urls):
+        return self._articles.read_many(list(urls))
+
+    # Function to split stored URLs into consecutive chunks of at most max_bytes of records each
+    # (a record larger than max_bytes gets a chunk of its own); unknown URLs are dropped
+    def iter_chunks(self, urls, max_bytes):
+        chunk = []
+        chunk_bytes = 0
+        for url in urls:
+            size = self._articles.record_size(url)
+            if size is None:
+                continue
+            if chunk and chunk_bytes + size > max_bytes:
+                yield chunk
+                chunk = []
+                chunk_bytes = 0
+            chunk.append(url)
+            chunk_bytes += size
+        if chunk:
+            yield chunk
+
+    def _token_key(self, url, mode):
+        return f"{mode}|{url}"
+
+    @staticmethod
+    def _digest(text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    # Function to read cached token lists for many articles; missing or stale entries are None
+    def get_tokens(self, urls, texts, mode):
+        records = self._tokens.read_many([self._token_key(url, mode) for url in urls])
+        return [
+            record['tokens'] if record is not None and record.get('digest') == self._digest(text) else None
+            for record, text in zip(records, texts)
+        ]
+
+    def put_tokens(self, urls, texts, token_lists, mode):
+        self._tokens.append_many(
+            {'key': self._token_key(url, mode), 'digest': self._digest(text), 'tokens': tokens}
+            for url, text, tokens in zip(urls, texts, token_lists)
+        )
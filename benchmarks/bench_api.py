@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fetcher import Fetcher  # noqa: E402
+from nyt_api import ArticleSearchClient  # noqa: E402
+from fixture_server import API_PATH, FixtureServer  # noqa: E402
+
+# Benchmark: articles per minute from the mock Article Search API, comparing the
+# previous page-at-a-time loop (fresh request per page, fixed sleep, abort on the
+# first 429) with ArticleSearchClient (one session, token bucket, prefetch,
+# adaptive 429 backoff, cross-page de-duplication). The server enforces its own
+# per-second limit; the report shows the peak request rate it observed.
+
+
+def legacy_fetch(endpoint, num_articles, sleep_seconds):
+    articles, page = [], 0
+    while len(articles) < num_articles:
+        try:
+            response = requests.get(endpoint, params={'q': 'news', 'page': page, 'api-key': 'test'})
+            response.raise_for_status()
+            docs = response.json().get('response', {}).get('docs', [])
+            if not docs:
+                break
+            articles.extend(docs[:num_articles - len(articles)])
+            page += 1
+            time.sleep(sleep_seconds)
+        except requests.exceptions.HTTPError:
+            break
+    return articles
+
+
+def report(label, server, docs, elapsed):
+    print(f"{label:>8}: {len(docs)} articles ({len({d['web_url'] for d in docs})} unique) in {elapsed:.2f}s "
+          f"= {len(docs) / elapsed * 60:,.0f} articles/min; server saw {server.httpd.api_requests} requests, "
+          f"{server.httpd.api_throttled} throttled, peak {server.httpd.api_max_per_second}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Article Search API client against a mock server")
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--server-limit', type=int, default=5, help="Server-side limit, requests per second")
+    parser.add_argument('--rate', type=float, default=240.0, help="Client budget, requests per minute")
+    parser.add_argument('--legacy-sleep', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with FixtureServer(latency=args.latency, api_rate_limit=args.server_limit) as server:
+        start = time.perf_counter()
+        docs = legacy_fetch(server.url(API_PATH), args.articles, args.legacy_sleep)
+        report('legacy', server, docs, time.perf_counter() - start)
+
+    with FixtureServer(latency=args.latency, api_rate_limit=args.server_limit) as server:
+        fetcher = Fetcher(rate_per_host=0, max_workers=4, concurrency_per_host=4)
+        client = ArticleSearchClient(fetcher, 'test', endpoint=server.url(API_PATH), rate_per_minute=args.rate,
+                                     burst=3, prefetch=3)
+        start = time.perf_counter()
+        docs = list(client.iter_documents('news', args.articles))
+        elapsed = time.perf_counter() - start
+        fetcher.close()
+        report('client', server, docs, elapsed)
+        budget = args.rate / 60.0
+        print(f"client budget {budget:.1f}/s; {client.requests_made} requests, {client.throttled} retried after 429, "
+              f"{client.duplicates_skipped} duplicates skipped")
+
+
+if __name__ == '__main__':
+    main()
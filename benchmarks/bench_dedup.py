@@ -0,0 +1,67 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import NearDuplicateDetector  # noqa: E402
+
+# Benchmark: cost and accuracy of the MinHash/LSH near-duplicate check as the
+# index grows. Unique synthetic articles are indexed first; then planted
+# near-duplicates (an indexed article with a fraction of its words replaced)
+# and fresh articles are checked. The time per check should stay roughly flat
+# with index size, since a lookup only reads the documents sharing a band.
+
+
+def make_text(rng, vocabulary, words):
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+
+# Function to replace a fraction of the words of a text, like an edited copy
+def edit_text(rng, vocabulary, text, fraction):
+    words = text.split()
+    for position in rng.sample(range(len(words)), int(len(words) * fraction)):
+        words[position] = rng.choice(vocabulary)
+    return ' '.join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MinHash/LSH near-duplicate detection")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--words', type=int, default=600, help="Words per article")
+    parser.add_argument('--probes', type=int, default=500, help="Near-duplicates and fresh articles checked per size")
+    # With 5-word shingles, changing 1% of the words keeps a Jaccard similarity of about 0.9
+    parser.add_argument('--edit', type=float, default=0.01, help="Fraction of words changed in a near-duplicate")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(20000)]
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            detector = NearDuplicateDetector(os.path.join(data_dir, 'near_duplicates.sqlite'))
+            originals = []
+            start = time.perf_counter()
+            for i in range(size):
+                text = make_text(rng, vocabulary, args.words)
+                if i < args.probes:
+                    originals.append(text)
+                detector.check(f"doc-{i}", text)
+            detector.checkpoint()
+            index_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = sum(detector.check(f"copy-{i}", edit_text(rng, vocabulary, text, args.edit)) is not None
+                        for i, text in enumerate(originals))
+            false_positives = sum(detector.check(f"new-{i}", make_text(rng, vocabulary, args.words)) is not None
+                                  for i in range(args.probes))
+            check_time = (time.perf_counter() - start) / (len(originals) + args.probes)
+            detector.close()
+        print(f"{size:>7,} indexed: {size / index_time:7,.0f} docs/s to index, {check_time * 1000:6.2f} ms per check, "
+              f"recall {found / len(originals):.3f}, {false_positives} false positives of {args.probes}")
+
+
+if __name__ == '__main__':
+    main()
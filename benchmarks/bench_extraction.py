@@ -0,0 +1,111 @@
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from html_extraction import PARSER, extract_article_text, extract_links  # noqa: E402
+from fixture_server import SECTIONS, render_article, render_homepage, render_section  # noqa: E402
+
+# Benchmark: pages per second for link discovery and article body extraction,
+# comparing the previous full-tree html.parser implementation ("before") with
+# the strained single-pass extraction module ("after"). Fixture pages are
+# rendered to a directory once and read back from disk, or taken from --fixtures.
+
+
+def legacy_extract_links(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    article_urls, section_urls = [], []
+    for a in soup.find_all('a', href=True):
+        href = a['href']
+        if href.startswith(('https://www.nytimes.com/20', '/20')) and \
+           not href.endswith(('.jpg', '.png', '/interactive/', '/video/', '.json', '.xml', '.rss')):
+            article_urls.append('https://www.nytimes.com' + href if href.startswith('/') else href)
+    for a in soup.find_all('a', href=True):
+        href = a['href']
+        if href.startswith(('/section/', 'https://www.nytimes.com/section/')):
+            section_urls.append('https://www.nytimes.com' + href if href.startswith('/') else href)
+    return article_urls, section_urls
+
+
+def legacy_extract_article_text(html):
+    article_soup = BeautifulSoup(html, 'html.parser')
+    paragraphs = article_soup.find_all('p', class_=re.compile('css-.*'))
+    content = '\n'.join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+    if not content:
+        story_body = article_soup.find('section', attrs={'name': 'articleBody'})
+        if story_body:
+            paragraphs = story_body.find_all('p')
+        else:
+            paragraphs = article_soup.find_all('p')
+        content = '\n'.join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+    return content
+
+
+def write_fixtures(directory, articles):
+    pages = {'home.html': render_homepage()}
+    for section in SECTIONS:
+        pages[f'section-{section}.html'] = render_section(section)
+    for i in range(articles):
+        pages[f'article-{i}.html'] = render_article(SECTIONS[i % len(SECTIONS)], i)
+    for name, html in pages.items():
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(html)
+
+
+def load_fixtures(directory):
+    link_pages, article_pages = [], []
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+            (article_pages if name.startswith('article') else link_pages).append(f.read())
+    return link_pages, article_pages
+
+
+def measure(func, pages, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            func(page)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML link and body extraction")
+    parser.add_argument('--fixtures', help="Directory of saved HTML pages (home*/section*/article*.html)")
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.fixtures
+        if directory is None:
+            directory = tmp
+            write_fixtures(directory, args.articles)
+        link_pages, article_pages = load_fixtures(directory)
+
+    for before, after in zip(map(legacy_extract_links, link_pages), map(extract_links, link_pages)):
+        assert (list(dict.fromkeys(before[0])), list(dict.fromkeys(before[1]))) == after
+    for page in article_pages:
+        assert legacy_extract_article_text(page) == extract_article_text(page)
+
+    print(f"parser: {PARSER}")
+    for label, pages, before, after in (
+        ('links', link_pages, legacy_extract_links, extract_links),
+        ('article body', article_pages, legacy_extract_article_text, extract_article_text),
+    ):
+        before_rate = measure(before, pages, args.repeat)
+        after_rate = measure(after, pages, args.repeat)
+        print(f"{label:>12}: before {before_rate:,.1f} pages/s, after {after_rate:,.1f} pages/s "
+              f"({after_rate / before_rate:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
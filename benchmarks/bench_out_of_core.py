@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Benchmark: peak RSS and time of the out-of-core TF-IDF analysis against the
+# in-memory one, on a synthetic article store. Token lists are cached in the
+# store up front, so the runs measure TF-IDF and CSV export rather than NLTK.
+# Every analysis runs in a fresh interpreter that reports its own peak RSS
+# (ru_maxrss); the script exits with status 1 when an out-of-core run fails or
+# exceeds its --memory-limit. tests/test_out_of_core.py checks the bound on a
+# small store.
+
+CHILD = """
+import json, os, resource, sys, time
+import news_topics
+mode, memory_limit, output = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+news_topics.TOPIC_MODEL = None
+urls = news_topics.get_article_store().urls()
+start = time.perf_counter()
+with open(output, 'w', encoding='utf-8', newline='') as f:
+    if mode == 'out-of-core':
+        news_topics.analyze_tf_idf_out_of_core(urls, f, memory_limit_mb=memory_limit)
+    else:
+        news_topics.write_results_csv(news_topics.analyze_tf_idf(urls), f)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+print(json.dumps({'elapsed': elapsed, 'peak_rss': peak}))
+"""
+
+
+# Function to fill an article store with synthetic articles and their cached token lists
+def build_store(data_dir, num_documents, words_per_document, vocabulary_size, seed=0):
+    os.environ['NYT_TOPICS_DATA_DIR'] = data_dir
+    import news_topics
+    news_topics.ARTICLE_STORE_DIR = os.path.join(data_dir, 'articles')
+    store = news_topics.get_article_store()
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"term{i}" for i in range(vocabulary_size)], dtype=object)
+    # Zipf-like word frequencies, as in real text
+    weights = 1.0 / np.arange(1, vocabulary_size + 1)
+    weights /= weights.sum()
+    for start in range(0, num_documents, 2000):
+        stop = min(start + 2000, num_documents)
+        urls = [f"https://www.nytimes.com/2025/01/01/synthetic/story-{i}.html" for i in range(start, stop)]
+        token_lists = [vocabulary[rng.choice(vocabulary_size, size=rng.poisson(words_per_document), p=weights)].tolist()
+                       for _ in urls]
+        texts = [' '.join(tokens) for tokens in token_lists]
+        store.append_many((url, text, 'scrape', None, None) for url, text in zip(urls, texts))
+        store.put_tokens(urls, texts, token_lists, news_topics.TOKENIZER_MODE)
+    news_topics.close_resources()
+
+
+def run(data_dir, mode, memory_limit):
+    env = dict(os.environ, NYT_TOPICS_DATA_DIR=data_dir)
+    output = os.path.join(data_dir, f"{mode}.csv")
+    completed = subprocess.run([sys.executable, '-c', CHILD, mode, str(memory_limit), output],
+                               cwd=ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return None, lines[-1] if lines else f"exit status {completed.returncode}, likely killed for memory"
+    return json.loads(completed.stdout.strip().splitlines()[-1]), os.path.getsize(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark out-of-core TF-IDF against the in-memory analysis")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--words', type=int, default=500)
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    parser.add_argument('--memory-limit', type=int, default=256, help="Out-of-core peak RSS bound in MB")
+    parser.add_argument('--skip-in-memory', action='store_true', help="Only run the out-of-core analysis")
+    args = parser.parse_args()
+
+    bound_held = True
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            build_store(data_dir, size, args.words, args.vocabulary)
+            print(f"{size:,} documents ({os.path.getsize(os.path.join(data_dir, 'articles', 'articles.jsonl')) / 2**20:,.0f} MB of articles)")
+            modes = ['out-of-core'] if args.skip_in_memory else ['out-of-core', 'in-memory']
+            for mode in modes:
+                result, detail = run(data_dir, mode, args.memory_limit)
+                if result is None:
+                    print(f"  {mode:>12}: failed ({detail})")
+                    if mode == 'out-of-core':
+                        bound_held = False
+                    continue
+                peak_mb = result['peak_rss'] / 2 ** 20
+                note = ''
+                if mode == 'out-of-core':
+                    within = peak_mb <= args.memory_limit
+                    bound_held = bound_held and within
+                    note = f" (limit {args.memory_limit} MB: {'ok' if within else 'EXCEEDED'})"
+                print(f"  {mode:>12}: {result['elapsed']:7.2f}s, peak RSS {peak_mb:7.1f} MB{note}, CSV {detail / 2**20:,.0f} MB")
+    return 0 if bound_held else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_preprocessing import PreprocessingPipeline, TOKENIZER_MODES  # noqa: E402
+
+# Benchmark: tokens per second of the preprocessing pipeline in each tokenizer mode.
+# Requires the NLTK 'punkt', 'punkt_tab', 'stopwords' and 'wordnet' resources.
+
+VOCABULARY = (
+    "the president said on Tuesday that the administration would review new policies for "
+    "markets, elections, courts and schools; officials didn't confirm reports of talks with "
+    "leaders in Europe and Asia. Analysts expect prices, wages and rates to keep rising, "
+    "while voters worry about housing, climate, health care and the economy's strength."
+).split()
+
+
+def make_documents(num_documents, words_per_document, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choices(VOCABULARY, k=words_per_document)) for _ in range(num_documents)]
+
+
+def run(mode, documents, repeat):
+    pipeline = PreprocessingPipeline(mode)
+    pipeline(documents[0])  # warm up lazy NLTK loaders
+    tokens = sum(len(pipeline.tokenize(doc)) for doc in documents)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in documents:
+            pipeline(doc)
+        best = min(best, time.perf_counter() - start)
+    return tokens, best, pipeline.lemma_cache_info()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text preprocessing throughput")
+    parser.add_argument('--documents', type=int, default=500)
+    parser.add_argument('--words', type=int, default=800)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    documents = make_documents(args.documents, args.words)
+    for mode in TOKENIZER_MODES:
+        tokens, elapsed, cache_info = run(mode, documents, args.repeat)
+        print(f"{mode:>6}: {tokens / elapsed:,.0f} tokens/s "
+              f"({tokens:,} tokens in {elapsed:.3f}s, lemma cache hits={cache_info.hits:,} misses={cache_info.misses:,})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import importlib.util
+import os
+import sys
+import threading
+import time
+import urllib.robotparser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_server import FixtureServer, SECTIONS, ARTICLES_PER_SECTION, js_article_path  # noqa: E402
+from html_extraction import extract_article_text  # noqa: E402
+
+# Benchmark: pages per second and memory footprint of the headless rendering
+# fallback against the JS-rendered fixture pages, whose article body is only
+# inserted by a script. Compares RenderPool sizes, resource blocking on and
+# off, and launching a fresh browser for every page (as solution.py does).
+# Memory is the peak resident set of this process and all its descendants
+# (the Chromium processes), sampled from /proc, so it needs Linux. Server
+# requests per page show what blocking images, fonts and media saves.
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+# Function to sum the resident memory of a process and all its descendants
+def tree_rss(root_pid):
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; the parent pid is the second field after it
+        ppid = int(stat[stat.rfind(')') + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(name))
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            pass
+        stack.extend(children.get(pid, ()))
+    return total
+
+
+class TreeRssSampler:
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_rss(os.getpid()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, tree_rss(os.getpid()))
+
+
+def run_pool(server, urls, is_allowed, pool_size, blocked_resources, timeout):
+    from renderer import RenderPool
+
+    requests_before = server.request_count
+    with TreeRssSampler() as sampler:
+        start = time.perf_counter()
+        extracted = failed = 0
+        with RenderPool(pool_size=pool_size, timeout=timeout, is_allowed=is_allowed,
+                        blocked_resources=blocked_resources) as pool:
+            started = time.perf_counter() - start
+            start = time.perf_counter()
+            for url, html, error in pool.render_many(urls):
+                if error is None and extract_article_text(html):
+                    extracted += 1
+                else:
+                    failed += 1
+            elapsed = time.perf_counter() - start
+    return extracted, failed, started, elapsed, sampler.peak, server.request_count - requests_before
+
+
+# Function to render every page in a browser launched for it alone, closed afterwards
+def run_fresh_browser(server, urls, timeout):
+    from playwright.sync_api import sync_playwright
+
+    requests_before = server.request_count
+    with TreeRssSampler() as sampler, sync_playwright() as playwright:
+        start = time.perf_counter()
+        extracted = failed = 0
+        for url in urls:
+            browser = playwright.chromium.launch(headless=True)
+            try:
+                page = browser.new_page()
+                page.goto(url, wait_until='networkidle', timeout=timeout * 1000)
+                if extract_article_text(page.content()):
+                    extracted += 1
+                else:
+                    failed += 1
+            except Exception:
+                failed += 1
+            finally:
+                browser.close()
+        elapsed = time.perf_counter() - start
+    return extracted, failed, 0.0, elapsed, sampler.peak, server.request_count - requests_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the headless rendering fallback against JS-rendered fixture pages")
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--baseline-pages', type=int, default=10, help="Pages rendered with a fresh browser each; 0 to skip")
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds of server latency per response")
+    parser.add_argument('--timeout', type=float, default=20, help="Seconds per page")
+    args = parser.parse_args()
+
+    if importlib.util.find_spec('playwright') is None:
+        sys.exit("Playwright is not installed; run 'pip install playwright && playwright install chromium'")
+
+    with FixtureServer(latency=args.latency) as server:
+        robots = urllib.robotparser.RobotFileParser(server.url('/robots.txt'))
+        robots.read()
+
+        def is_allowed(url):
+            return robots.can_fetch('*', url)
+
+        urls = [server.url(js_article_path(SECTIONS[i % len(SECTIONS)], i // len(SECTIONS) % ARTICLES_PER_SECTION))
+                for i in range(args.pages)]
+        runs = [(f"pool of {size}", lambda size=size: run_pool(server, urls, is_allowed, size,
+                                                                ('image', 'font', 'media'), args.timeout))
+                for size in args.pool_sizes]
+        runs.append((f"pool of {max(args.pool_sizes)}, no blocking",
+                     lambda: run_pool(server, urls, is_allowed, max(args.pool_sizes), (), args.timeout)))
+        if args.baseline_pages:
+            runs.append(("fresh browser per page",
+                         lambda: run_fresh_browser(server, urls[:args.baseline_pages], args.timeout)))
+
+        print(f"{'':>28}  {'pages/s':>8}  {'extracted':>9}  {'startup':>8}  {'requests/page':>13}  {'peak RSS':>9}")
+        for label, run in runs:
+            extracted, failed, started, elapsed, peak, requests = run()
+            pages = extracted + failed
+            print(f"{label:>28}  {pages / elapsed:8.2f}  {extracted:>4}/{pages:<4}  {started:7.2f}s  "
+                  f"{requests / max(pages, 1):13.1f}  {peak / 2 ** 20:7.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import urllib.robotparser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from robots_policy import RobotsPolicy  # noqa: E402
+from fixture_server import FixtureServer, SECTIONS, article_path  # noqa: E402
+
+# Benchmark: decision throughput of the compiled robots.txt policy against
+# urllib.robotparser, both reading the fixture server's robots.txt. The
+# decisions themselves are checked in tests/test_robots_policy.py.
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the robots.txt policy")
+    parser.add_argument('--checks', type=int, default=50000)
+    args = parser.parse_args()
+
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        policy = RobotsPolicy(server.url('/robots.txt'), USER_AGENT, cache_path=os.path.join(tmp, 'robots.txt'))
+        policy.refresh()
+        legacy = urllib.robotparser.RobotFileParser(server.url('/robots.txt'))
+        legacy.read()
+
+    urls = [server.url(article_path(SECTIONS[i % len(SECTIONS)], i % 500)) for i in range(args.checks)]
+    urls += [server.url('/private/admin')] * (args.checks // 10)
+
+    start = time.perf_counter()
+    for url in urls:
+        legacy.can_fetch(USER_AGENT, url)
+    legacy_rate = len(urls) / (time.perf_counter() - start)
+
+    policy.reset_denials()
+    start = time.perf_counter()
+    for url in urls:
+        policy.allows(url)
+    policy_rate = len(urls) / (time.perf_counter() - start)
+
+    distinct, total, _ = policy.denial_summary()
+    print(f"urllib.robotparser: {legacy_rate:,.0f} checks/s")
+    print(f"      RobotsPolicy: {policy_rate:,.0f} checks/s ({policy.decision_cache_info().hits:,} memoized)")
+    print(f"denials collected: {total:,} across {distinct} distinct paths")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmark: cold-start time of the library, the CLI and the Streamlit script.
+# Each case runs in a fresh interpreter with an empty data directory, so the
+# numbers include module imports and everything the code does at import time.
+# `import app` executes the Streamlit script in bare mode (no server).
+
+CASES = {
+    'import news_topics': ['-c', 'import news_topics'],
+    'cli.py --help': ['cli.py', '--help'],
+    'import app (bare Streamlit)': ['-c', 'import app'],
+}
+
+
+def run_case(argv, repeat):
+    timings = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as data_dir:
+            env = dict(os.environ, NYT_TOPICS_DATA_DIR=data_dir, HOME=data_dir)
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + argv, cwd=ROOT, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start and import time")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = statistics.median(run_case(['-c', 'pass'], args.repeat))
+    print(f"{'python -c pass':>28}: {baseline * 1000:7.1f} ms (interpreter baseline)")
+    for name, argv in CASES.items():
+        timings = run_case(argv, args.repeat)
+        median = statistics.median(timings)
+        print(f"{name:>28}: {median * 1000:7.1f} ms median, {min(timings) * 1000:7.1f} ms best "
+              f"({(median - baseline) * 1000:.1f} ms over the interpreter)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tfidf_engine import DocumentTermMatrix  # noqa: E402
+from topic_models import NMF, OnlineLDA  # noqa: E402
+
+# Benchmark: fit time, peak memory and topic recovery of the NMF and online LDA
+# models on synthetic corpora drawn from planted topics. Each planted topic
+# owns a disjoint band of the vocabulary plus shared background words; recovery
+# is the mean best cosine similarity between a planted and a learned topic.
+# Peak memory is measured with tracemalloc (NumPy allocations are traced).
+
+
+# Function to draw a corpus from planted topics, built directly as a CSR matrix
+def make_corpus(num_documents, n_terms, n_topics, words_per_document, seed=0):
+    rng = np.random.default_rng(seed)
+    band = n_terms // (n_topics + 1)
+    planted = np.full((n_topics, n_terms), 0.05 / n_terms)
+    for topic in range(n_topics):
+        planted[topic, (topic + 1) * band:(topic + 2) * band] += 0.95 / band
+    planted /= planted.sum(axis=1, keepdims=True)
+
+    # Each document mixes two topics; words are sampled per document from the mixture
+    lengths = rng.poisson(words_per_document, num_documents).clip(min=1)
+    first = rng.integers(n_topics, size=num_documents)
+    second = rng.integers(n_topics, size=num_documents)
+    share = rng.uniform(0.6, 1.0, num_documents)
+    token_topics = np.where(rng.random(lengths.sum()) < np.repeat(share, lengths),
+                            np.repeat(first, lengths), np.repeat(second, lengths))
+    token_ids = np.empty(lengths.sum(), dtype=np.int64)
+    for topic in range(n_topics):
+        positions = np.flatnonzero(token_topics == topic)
+        token_ids[positions] = rng.choice(n_terms, size=len(positions), p=planted[topic])
+
+    rows = np.repeat(np.arange(num_documents, dtype=np.int64), lengths)
+    keys, counts = np.unique(rows * n_terms + token_ids, return_counts=True)
+    indptr = np.zeros(num_documents + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n_terms, minlength=num_documents), out=indptr[1:])
+    terms = np.array([f"w{i}" for i in range(n_terms)], dtype=object)
+    matrix = DocumentTermMatrix(indptr, keys % n_terms, counts, lengths.astype(np.int64), terms)
+    return matrix, planted
+
+
+def recovery(learned, planted):
+    learned = learned / np.linalg.norm(learned, axis=1, keepdims=True)
+    planted = planted / np.linalg.norm(planted, axis=1, keepdims=True)
+    return float((planted @ learned.T).max(axis=1).mean())
+
+
+def measure(fit):
+    tracemalloc.start()
+    start = time.perf_counter()
+    model = fit()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NMF and online LDA topic models")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--terms', type=int, default=5000)
+    parser.add_argument('--topics', type=int, default=10)
+    parser.add_argument('--words', type=int, default=150)
+    parser.add_argument('--batch', type=int, default=1000, help="Documents per partial_fit call")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        matrix, planted = make_corpus(size, args.terms, args.topics, args.words)
+        print(f"{size:,} documents, {args.terms:,} terms, {len(matrix.indices):,} non-zeros")
+        cases = [
+            ('NMF fit', lambda: NMF(args.topics).fit(matrix)),
+            ('LDA fit', lambda: OnlineLDA(args.topics).fit(matrix)),
+            ('LDA partial_fit', lambda: stream(OnlineLDA(args.topics), matrix, args.batch)),
+            ('NMF partial_fit', lambda: stream(NMF(args.topics), matrix, args.batch)),
+        ]
+        for name, fit in cases:
+            model, elapsed, peak = measure(fit)
+            print(f"  {name:>16}: {elapsed:7.2f}s, peak {peak / 2**20:7.1f} MB, {size / elapsed:9,.0f} docs/s, "
+                  f"iterations={model.n_iter_}, recovery={recovery(model.topic_term_weights(), planted):.3f}")
+
+
+# Function to feed the corpus to partial_fit in consecutive batches
+def stream(model, matrix, batch_size):
+    for start in range(0, matrix.n_docs, batch_size):
+        stop = min(start + batch_size, matrix.n_docs)
+        lo, hi = matrix.indptr[start], matrix.indptr[stop]
+        batch = DocumentTermMatrix(matrix.indptr[start:stop + 1] - lo, matrix.indices[lo:hi], matrix.counts[lo:hi],
+                                   matrix.doc_lengths[start:stop], matrix.terms)
+        model.partial_fit(batch)
+    return model
+
+
+if __name__ == '__main__':
+    main()
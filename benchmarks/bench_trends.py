@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_corpus import SyntheticCorpus  # noqa: E402
+from term_trends import TermTrends, publication_day  # noqa: E402
+
+# Benchmark: ingest rate of the per-day term aggregates and latency of the
+# trending-terms and rolling-share queries answered from them, on a synthetic
+# corpus whose URLs spread the articles over about a year of publication days.
+# For comparison, the trending query is also answered the way it would be
+# without aggregates: by recounting the articles of both windows.
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return result, times[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the term trend aggregates")
+    parser.add_argument('--documents', type=int, default=20000)
+    parser.add_argument('--batch', type=int, default=1000, help="Articles added per call")
+    parser.add_argument('--window', type=int, default=7, help="Days per trending window")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.documents)
+    with tempfile.TemporaryDirectory() as directory:
+        trends = TermTrends(os.path.join(directory, 'term_trends.sqlite'))
+        urls, days, token_lists = [], [], []
+        ingest_seconds = 0.0
+        for url, text, words in corpus:
+            urls.append(url)
+            days.append(publication_day(url))
+            token_lists.append(words)
+            if len(urls) == args.batch:
+                start = time.perf_counter()
+                trends.add_documents(urls, days, token_lists)
+                ingest_seconds += time.perf_counter() - start
+                urls, days, token_lists = [], [], []
+        start = time.perf_counter()
+        trends.add_documents(urls, days, token_lists)
+        ingest_seconds += time.perf_counter() - start
+        first, last = trends.day_range()
+        size = os.path.getsize(trends.path)
+        print(f"ingest: {args.documents / ingest_seconds:,.0f} articles/s, {(last - first).days + 1} days, "
+              f"{size / 2 ** 20:.1f} MB on disk")
+
+        (end, trending), seconds = timed(lambda: trends.trending(window_days=args.window), args.repeat)
+        print(f"trending over {args.window} days: {seconds * 1000:.1f} ms ({len(trending)} terms, "
+              f"top: {', '.join(row['term'] for row in trending[:5])})")
+        terms = [row['term'] for row in trending[:10]]
+        _, seconds = timed(lambda: trends.rolling_shares(terms, end, 90, args.window), args.repeat)
+        print(f"rolling shares of {len(terms)} terms over 90 days: {seconds * 1000:.1f} ms")
+
+        # Without aggregates: find the articles of both windows and count their terms again
+        first_day = end - timedelta(days=2 * args.window - 1)
+        start = time.perf_counter()
+        document_frequencies = Counter()
+        for index in range(args.documents):
+            day = publication_day(corpus.url(index))
+            if day is not None and first_day <= date.fromisoformat(day) <= end:
+                document_frequencies.update(set(corpus.words(index)))
+        print(f"recounting the articles instead: {(time.perf_counter() - start) * 1000:.0f} ms")
+        trends.close()
+
+
+if __name__ == '__main__':
+    main()
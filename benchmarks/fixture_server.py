@@ -0,0 +1,273 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Local NYT-like HTTP fixture server for offline benchmarks.
+#
+# Serves a synthetic homepage, section pages, article pages, a robots.txt and a
+# mock Article Search API, with a configurable per-response latency. Responses
+# carry an ETag and answer If-None-Match with 304 so cache revalidation can be
+# exercised. The mock API returns API_DOCS_PER_PAGE documents per page,
+# overlapping one document with the previous page (as live results shift),
+# rejects requests without an api-key with 401, and answers with 429 plus
+# Retry-After when more than api_rate_limit requests arrive within one second.
+# Under /js/ it also serves JS-rendered variants of the article pages: a shell
+# with no paragraphs in its HTML, a web font and a few large images under
+# /static/, and a script that fetches the paragraphs from /data/ and inserts
+# them, so static extraction finds nothing and only a browser sees the text.
+# For error handling, /status/<code> always answers with that status, and
+# /flaky/<n>/<name> answers 503 to its first n requests and 200 afterwards.
+# Use it as a context manager:
+#
+#     with FixtureServer(latency=0.05) as server:
+#         fetcher.fetch(server.url('/'))
+
+API_PATH = '/svc/search/v2/articlesearch.json'
+API_DOCS_PER_PAGE = 10
+API_TOTAL_PAGES = 50
+
+SECTIONS = ('world', 'us', 'politics', 'business', 'technology', 'science', 'health', 'sports', 'arts', 'climate')
+ARTICLES_PER_SECTION = 30
+
+ROBOTS_TXT = """User-agent: GPTBot
+Disallow: /
+
+User-agent: *
+Disallow: /private/
+Allow: /private/public/
+Disallow: /search
+Disallow: /*?*query=
+Disallow: /*.pdf$
+Allow: /
+"""
+
+STATIC_ASSET_BYTES = 256 * 1024  # Size of each image/font under /static/
+_STATIC_TYPES = {'.jpg': 'image/jpeg', '.woff2': 'font/woff2', '.mp4': 'video/mp4'}
+
+_WORDS = (
+    "government election market economy court climate energy health school city police "
+    "team season player film music book science research study war peace trade policy "
+    "budget tax vote senator governor company technology data privacy border storm"
+).split()
+
+
+def article_path(section, index):
+    return f"/2025/05/{(index % 28) + 1:02d}/{section}/story-{index}.html"
+
+
+def js_article_path(section, index):
+    return '/js' + article_path(section, index)
+
+
+def article_text(section, index, paragraphs=8, words_per_paragraph=60):
+    rng = random.Random(f"{section}-{index}")
+    return [' '.join(rng.choices(_WORDS, k=words_per_paragraph)).capitalize() + '.' for _ in range(paragraphs)]
+
+
+def render_homepage():
+    links = [f'<a href="/section/{section}">{section.title()}</a>' for section in SECTIONS]
+    links += [f'<a href="{article_path(section, 0)}">Top story</a>' for section in SECTIONS]
+    links.append('<a href="/private/admin">Admin</a>')
+    return f"<html><body><nav>{''.join(links)}</nav></body></html>"
+
+
+def render_section(section):
+    links = ''.join(f'<li><a href="{article_path(section, i)}">Story {i}</a></li>' for i in range(ARTICLES_PER_SECTION))
+    return f"<html><body><h1>{section.title()}</h1><ul>{links}</ul></body></html>"
+
+
+# Function to render an NYT-like article page around a list of paragraphs
+def render_article_page(title, heading, paragraphs):
+    body = ''.join(f'<p class="css-at9mc1 evys1bk0">{p}</p>' for p in paragraphs)
+    return (f"<html><head><title>{title}</title></head><body>"
+            f"<article><h1>{heading}</h1><section name=\"articleBody\">{body}</section></article>"
+            f"<footer><p>Footer</p></footer></body></html>")
+
+
+def render_article(section, index):
+    return render_article_page(f"{section} {index}", f"Story {index}", article_text(section, index))
+
+
+# Function to render the JS-rendered variant of an article: the body is filled in by a script
+def render_js_article(section, index):
+    images = ''.join(f'<img src="/static/{section}-{index}-{i}.jpg">' for i in range(3))
+    script = (f"fetch('/data/{section}/{index}.json').then(r => r.json()).then(data => {{"
+              "const body = document.getElementById('body');"
+              "for (const text of data.paragraphs) {"
+              "const p = document.createElement('p'); p.className = 'css-at9mc1 evys1bk0';"
+              "p.textContent = text; body.appendChild(p); }});")
+    return (f"<html><head><title>{section} {index}</title>"
+            f"<style>@font-face {{font-family: Cheltenham; src: url('/static/cheltenham.woff2');}}"
+            f" body {{font-family: Cheltenham;}}</style></head><body>"
+            f"<article><h1>Story {index}</h1>{images}<section name=\"articleBody\" id=\"body\"></section>"
+            f"</article><script>{script}</script></body></html>")
+
+
+def api_document(index):
+    section = SECTIONS[index % len(SECTIONS)]
+    paragraphs = article_text(section, 10_000 + index, paragraphs=3, words_per_paragraph=15)
+    return {
+        '_id': f"nyt://article/{index}",
+        'web_url': f"https://www.nytimes.com{article_path(section, 10_000 + index)}",
+        'pub_date': f"2025-05-{(index % 28) + 1:02d}T12:00:00+0000",
+        'headline': {'main': f"Story {index} in {section.title()}"},
+        'snippet': paragraphs[0],
+        'abstract': paragraphs[1],
+        'lead_paragraph': paragraphs[2],
+        'byline': {'original': 'By A Reporter'},
+    }
+
+
+def render_api_page(page):
+    if page >= API_TOTAL_PAGES:
+        docs = []
+    else:
+        # Each page repeats the last document of the previous page
+        start = page * (API_DOCS_PER_PAGE - 1)
+        docs = [api_document(start + i) for i in range(API_DOCS_PER_PAGE)]
+    return json.dumps({'status': 'OK', 'response': {'docs': docs}})
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; with Nagle's algorithm on, keep-alive
+    # responses would stall on the client's delayed ACK (about 40 ms each)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', extra_headers=None):
+        payload = body if isinstance(body, bytes) else body.encode('utf-8')
+        etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('ETag', etag)
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        with server.stats_lock:
+            server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        path, _, query = self.path.partition('?')
+        if path == API_PATH:
+            return self._handle_api(parse_qs(query))
+        if path == '/robots.txt':
+            return self._send(200, ROBOTS_TXT, 'text/plain')
+        if path == '/':
+            return self._send(200, render_homepage())
+        if path.startswith('/section/'):
+            section = path[len('/section/'):].strip('/')
+            if section in SECTIONS:
+                return self._send(200, render_section(section))
+        if path.startswith('/static/'):
+            extension = path[path.rfind('.'):]
+            if extension in _STATIC_TYPES:
+                return self._send(200, bytes(STATIC_ASSET_BYTES), _STATIC_TYPES[extension])
+        if path.startswith('/status/'):
+            status = int(path[len('/status/'):].strip('/'))
+            return self._send(status, f'<html><body>Status {status}</body></html>')
+        if path.startswith('/flaky/'):
+            with server.stats_lock:
+                server.path_requests[path] = server.path_requests.get(path, 0) + 1
+                attempt = server.path_requests[path]
+            failures = int(path.split('/')[2])
+            if attempt <= failures:
+                return self._send(503, '<html><body>Service unavailable</body></html>')
+            return self._send(200, f'<html><body><p>Attempt {attempt}</p></body></html>')
+        if path.startswith('/data/'):
+            parts = path[len('/data/'):].split('/')
+            if len(parts) == 2 and parts[0] in SECTIONS and parts[1].endswith('.json'):
+                paragraphs = article_text(parts[0], int(parts[1][:-len('.json')]))
+                return self._send(200, json.dumps({'paragraphs': paragraphs}), 'application/json')
+        rendered = path.startswith('/js/')
+        if rendered:
+            path = path[len('/js'):]
+        parts = path.strip('/').split('/')
+        if len(parts) == 5 and parts[3] in SECTIONS and parts[4].startswith('story-'):
+            index = int(parts[4][len('story-'):].split('.')[0])
+            return self._send(200, (render_js_article if rendered else render_article)(parts[3], index))
+        return self._send(404, '<html><body>Not found</body></html>')
+
+    def _handle_api(self, params):
+        server = self.server
+        if not params.get('api-key'):
+            return self._send(401, json.dumps({'fault': 'Invalid ApiKey'}), 'application/json')
+        now = time.monotonic()
+        with server.stats_lock:
+            window = server.api_request_times
+            while window and now - window[0] > 1.0:
+                window.popleft()
+            throttled = server.api_rate_limit is not None and len(window) >= server.api_rate_limit
+            if throttled:
+                server.api_throttled += 1
+            else:
+                window.append(now)
+                server.api_requests += 1
+                server.api_max_per_second = max(server.api_max_per_second, len(window))
+        if throttled:
+            return self._send(429, json.dumps({'fault': 'Rate limit quota violation'}), 'application/json',
+                              {'Retry-After': '1'})
+        page = int(params.get('page', ['0'])[0])
+        return self._send(200, render_api_page(page), 'application/json')
+
+
+class FixtureServer:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, api_rate_limit=None):
+        self.httpd = ThreadingHTTPServer((host, port), _FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.api_rate_limit = api_rate_limit  # Max API requests per second, None for unlimited
+        self.httpd.api_request_times = deque()
+        self.httpd.api_requests = 0
+        self.httpd.api_throttled = 0
+        self.httpd.api_max_per_second = 0
+        self.httpd.request_count = 0
+        self.httpd.path_requests = {}  # Requests per /flaky/ path
+        self.httpd.stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    def url(self, path='/'):
+        return self.base_url + path
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,433 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from out_of_core import current_rss  # noqa: E402
+from fixture_server import API_PATH, FixtureServer  # noqa: E402
+from synthetic_corpus import FUNCTION_WORDS, SyntheticCorpus  # noqa: E402
+
+# Benchmark suite: the whole pipeline, offline, with machine-readable results.
+#
+# The network stages run the real entry points against the local fixture
+# server, pointed at it with NYT_TOPICS_BASE_URL and NYT_TOPICS_API_ENDPOINT:
+# scrape_nyt and stream_scrape_nyt crawl its homepage, section pages, article
+# pages and robots.txt from an empty data directory each, and
+# fetch_articles_from_api pages through its mock Article Search API. A stage
+# that saves fewer articles than it asked for fails its group.
+# The corpus stages run once per --sizes entry on a synthetic corpus:
+# article-body extraction, preprocessing, writing the article store, the
+# TF-IDF engine, analyze_tf_idf (the path behind the app's results table) and
+# building and querying the related-article index. Extraction and
+# preprocessing time a --sample of the corpus, one document at a time; the
+# other stages use the whole corpus, tokenized by the generator (function
+# words dropped), so TF-IDF figures do not depend on the NLTK data installed.
+# Each group runs in a fresh interpreter, so peak RSS is per group.
+#
+# Every stage reports items per second, p50/p90/p99 latency per item where
+# items are timed individually, and the peak RSS sampled while it ran. The
+# report (--output, JSON) records the commit, time and configuration;
+# --compare prints the change against an earlier report, and with
+# --fail-on-regression the exit status is 1 when a stage got slower than
+# --tolerance allows.
+#
+#     python benchmarks/run_suite.py --sizes 100 1000 10000 --output before.json
+#     python benchmarks/run_suite.py --sizes 100 1000 10000 --output after.json --compare before.json
+
+DEFAULT_SIZES = [100, 1000, 10000]
+RSS_SAMPLE_INTERVAL = 0.005  # Seconds between peak-RSS samples
+USER_AGENT = 'Mozilla/5.0 (compatible; news-topics-benchmark)'
+
+
+class RssSampler:
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = self.overall_peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        rss = current_rss()
+        self.peak = max(self.peak, rss)
+        self.overall_peak = max(self.overall_peak, rss)
+
+    # Function to start a new measurement window at the current RSS
+    def reset(self):
+        self.peak = current_rss()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class Stage:
+    def __init__(self, name, unit, sampler):
+        self.name = name
+        self.unit = unit
+        self.sampler = sampler
+        self.items = 0
+        self.latencies = []
+        self.quantiles = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.sampler.reset()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.seconds = time.perf_counter() - self._start
+        self.sampler.sample()
+        self.peak_rss = self.sampler.peak
+
+    # Function to count processed items, with the latency of one item when it was timed alone
+    def record(self, items=1, latency=None):
+        with self._lock:
+            self.items += items
+            if latency is not None:
+                self.latencies.append(latency)
+
+    # Function to time one item
+    def timed(self, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.record(1, time.perf_counter() - start)
+        return result
+
+    # Function to take the latency percentiles from a timer in a RunMetrics snapshot instead, for
+    # items timed inside the code under test
+    def use_timer(self, snapshot, name):
+        for timer in snapshot['timers']:
+            if timer['name'] == name and not timer['labels'] and timer['quantiles']:
+                self.quantiles = [timer['quantiles'][q] * 1000 for q in ('0.5', '0.9', '0.99')]
+
+    def result(self):
+        latency = None
+        if self.latencies:
+            p50, p90, p99 = np.percentile(np.array(self.latencies) * 1000, [50, 90, 99])
+        elif self.quantiles:
+            p50, p90, p99 = self.quantiles
+        if self.latencies or self.quantiles:
+            latency = {'p50': round(p50, 4), 'p90': round(p90, 4), 'p99': round(p99, 4)}
+        return {'unit': self.unit, 'items': self.items, 'seconds': round(self.seconds, 4),
+                'throughput': round(self.items / self.seconds, 2) if self.seconds else None,
+                'latency_ms': latency, 'peak_rss_mb': round(self.peak_rss / 2 ** 20, 1)}
+
+
+def skipped(unit, reason):
+    return {'unit': unit, 'skipped': reason}
+
+
+# Function to check that a network stage got every article it asked for
+def check_articles(name, urls, expected):
+    if len(urls) < expected:
+        raise RuntimeError(f"{name} saved {len(urls)} of {expected} articles")
+
+
+# Function to close the shared resources and empty the data directory, so the next stage
+# crawls from scratch with a cold HTTP cache
+def fresh_data_dir(news_topics):
+    news_topics.close_resources()
+    shutil.rmtree(news_topics.DATA_DIR)
+    os.makedirs(news_topics.DATA_DIR)
+    news_topics.reset_run_metrics()
+
+
+def run_network(args, sampler):
+    import nyt_api
+
+    stages = {}
+    with FixtureServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as data_dir:
+        # Point the real entry points at the fixture server before news_topics reads the settings
+        os.environ['NYT_TOPICS_DATA_DIR'] = data_dir
+        os.environ['NYT_TOPICS_BASE_URL'] = server.url('')
+        os.environ['NYT_TOPICS_API_ENDPOINT'] = server.url(API_PATH)
+        import news_topics
+
+        news_topics.HEADERS['User-Agent'] = USER_AGENT
+        news_topics.FETCH_WORKERS = news_topics.MAX_CONCURRENT_PER_HOST = args.workers
+        news_topics.RATE_LIMIT_PER_HOST = 0
+        news_topics.TOKENIZER_MODE = args.tokenizer
+        news_topics.TOPIC_MODEL = args.topic_model
+        news_topics.API_RATE_PER_MINUTE = args.api_rate
+        news_topics.API_BURST = args.workers
+        news_topics.API_PREFETCH_PAGES = args.workers - 1
+        reporter = news_topics.Reporter()
+
+        # Crawl: homepage, section pages and article pages through scrape_nyt. Per-request
+        # latency comes from the fetcher's timings in the run metrics.
+        fresh_data_dir(news_topics)
+        stage = Stage('scrape', 'articles', sampler)
+        with stage:
+            urls = news_topics.scrape_nyt(reporter, resume=False, target_articles=args.fetch_pages)
+            stage.record(len(urls))
+        check_articles('scrape_nyt', urls, args.fetch_pages)
+        stage.use_timer(news_topics.get_metrics().snapshot(), 'fetch')
+        stages['scrape'] = stage.result()
+
+        # The same crawl through the streaming pipeline, which also preprocesses and indexes
+        try:
+            from text_preprocessing import PreprocessingPipeline
+            PreprocessingPipeline(args.tokenizer)("Probe sentence.")
+        except LookupError:
+            stages['stream'] = skipped('articles', f"NLTK data for the '{args.tokenizer}' tokenizer is not installed")
+        else:
+            fresh_data_dir(news_topics)
+            stage = Stage('stream', 'articles', sampler)
+            with stage:
+                urls = news_topics.stream_scrape_nyt(reporter, resume=False, target_articles=args.fetch_pages)
+                stage.record(len(urls))
+            check_articles('stream_scrape_nyt', urls, args.fetch_pages)
+            stage.use_timer(news_topics.get_metrics().snapshot(), 'fetch')
+            stages['stream'] = stage.result()
+
+        # Article Search API through fetch_articles_from_api; latency per API page
+        fresh_data_dir(news_topics)
+        fetch_page = nyt_api.ArticleSearchClient.fetch_page
+        stage = Stage('api', 'articles', sampler)
+
+        def timed_fetch_page(client, query, page):
+            start = time.perf_counter()
+            docs = fetch_page(client, query, page)
+            stage.record(0, time.perf_counter() - start)
+            return docs
+
+        nyt_api.ArticleSearchClient.fetch_page = timed_fetch_page
+        try:
+            with stage:
+                urls = news_topics.fetch_articles_from_api(args.api_articles, reporter)
+                stage.record(len(urls))
+        finally:
+            nyt_api.ArticleSearchClient.fetch_page = fetch_page
+        check_articles('fetch_articles_from_api', urls, args.api_articles)
+        stages['api'] = stage.result()
+        news_topics.close_resources()
+    return stages
+
+
+def run_corpus(args, sampler, size, data_dir):
+    from html_extraction import extract_article_text
+    from similarity_index import SimilarityIndex
+    from tfidf_engine import build_document_term_matrix, compute_tf_idf, top_k_terms
+
+    os.environ['NYT_TOPICS_DATA_DIR'] = data_dir
+    import news_topics
+
+    news_topics.TOPIC_MODEL = args.topic_model
+    news_topics.TOKENIZER_MODE = args.tokenizer
+    corpus = SyntheticCorpus(size, words_per_document=args.words, vocabulary_size=args.vocabulary, seed=args.seed)
+    stop_words = frozenset(FUNCTION_WORDS)
+    urls, texts, token_lists = [], [], []
+    for url, text, words in corpus:
+        urls.append(url)
+        texts.append(text)
+        token_lists.append([word for word in words if word not in stop_words])
+    sample = range(min(size, args.sample))
+    stages = {}
+
+    pages = [corpus.html(i) for i in sample]
+    stage = Stage('extract', 'documents', sampler)
+    with stage:
+        for html in pages:
+            stage.timed(extract_article_text, html)
+    stages['extract'] = stage.result()
+    del pages
+
+    try:
+        from text_preprocessing import PreprocessingPipeline
+        pipeline = PreprocessingPipeline(args.tokenizer)
+        pipeline(texts[0])
+    except LookupError:
+        stages['preprocess'] = skipped('documents', f"NLTK data for the '{args.tokenizer}' tokenizer is not installed")
+    else:
+        stage = Stage('preprocess', 'documents', sampler)
+        with stage:
+            for i in sample:
+                stage.timed(pipeline, texts[i])
+        stages['preprocess'] = stage.result()
+
+    store = news_topics.get_article_store()
+    stage = Stage('store', 'documents', sampler)
+    with stage:
+        for start in range(0, size, 1000):
+            batch = slice(start, start + 1000)
+            store.append_many((url, text, 'scrape', None, None) for url, text in zip(urls[batch], texts[batch]))
+            store.put_tokens(urls[batch], texts[batch], token_lists[batch], news_topics.TOKENIZER_MODE)
+            stage.record(len(urls[batch]))
+    stages['store'] = stage.result()
+    del texts
+
+    stage = Stage('tfidf', 'documents', sampler)
+    with stage:
+        matrix = build_document_term_matrix(token_lists)
+        scores = compute_tf_idf(matrix)
+        top_k_terms(matrix, scores, k=news_topics.TOP_TERMS_PER_ARTICLE)
+        stage.record(size)
+    stages['tfidf'] = stage.result()
+    del token_lists
+
+    if size > args.analyze_limit:
+        stages['analyze'] = skipped('documents', f"more than --analyze-limit {args.analyze_limit} documents")
+    else:
+        stage = Stage('analyze', 'documents', sampler)
+        with stage:
+            stage.record(len(news_topics.analyze_tf_idf(urls)))
+        stages['analyze'] = stage.result()
+    news_topics.close_resources()
+
+    index = SimilarityIndex(os.path.join(data_dir, 'bench_similarity_index'))
+    stage = Stage('similarity_build', 'documents', sampler)
+    with stage:
+        index.add_matrix(urls, matrix, scores)
+        index.save()
+        stage.record(size)
+    stages['similarity_build'] = stage.result()
+    del matrix, scores
+
+    rng = np.random.default_rng(args.seed)
+    stage = Stage('similarity_query', 'queries', sampler)
+    with stage:
+        for i in rng.integers(0, size, args.queries):
+            stage.timed(index.similar_to, urls[i], news_topics.RELATED_ARTICLES)
+    stages['similarity_query'] = stage.result()
+    return stages
+
+
+# Function to run one group in this process and print its results as JSON
+def run_child(args):
+    sampler = RssSampler()
+    if args.child == 'network':
+        stages = run_network(args, sampler)
+    else:
+        with tempfile.TemporaryDirectory() as data_dir:
+            stages = run_corpus(args, sampler, int(args.child), data_dir)
+    sampler.stop()
+    print(json.dumps({'stages': stages, 'peak_rss_mb': round(sampler.overall_peak / 2 ** 20, 1)}))
+
+
+# Function to run one group in a fresh interpreter
+def run_group(name, argv):
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), *argv, '--child', name],
+                               cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {'failed': lines[-1] if lines else f"exit status {completed.returncode}, likely killed for memory"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    def git(*command):
+        return subprocess.run(['git', *command], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    commit = git('rev-parse', 'HEAD')
+    return (commit or None), bool(git('status', '--porcelain', '--untracked-files=no'))
+
+
+# Function to flatten a report into {"group/stage": stage result}
+def flatten(report):
+    return {f"{group}/{name}": stage for group, run in report['groups'].items()
+            for name, stage in run.get('stages', {}).items() if 'skipped' not in stage}
+
+
+def format_stage(name, stage):
+    latency = stage['latency_ms']
+    latency = f"p50 {latency['p50']:9.3f}  p90 {latency['p90']:9.3f}  p99 {latency['p99']:9.3f} ms" if latency else ''
+    return (f"  {name:<18} {stage['throughput']:>12,.1f} {stage['unit'] + '/s':<12} {latency:<50} "
+            f"peak {stage['peak_rss_mb']:7.1f} MB")
+
+
+# Function to print each stage's change against a baseline report; returns the regressed stages
+def compare(report, baseline, tolerance):
+    print(f"\nCompared with {baseline.get('commit') or 'unknown commit'} ({baseline.get('timestamp')}):")
+    current, previous = flatten(report), flatten(baseline)
+    regressions = []
+    for key in sorted(current.keys() & previous.keys()):
+        now, before = current[key], previous[key]
+        changes = [f"throughput {now['throughput'] / before['throughput'] - 1:+7.1%}"]
+        slower = now['throughput'] < before['throughput'] * (1 - tolerance)
+        if now['latency_ms'] and before['latency_ms']:
+            for percentile in ('p50', 'p99'):
+                change = now['latency_ms'][percentile] / max(before['latency_ms'][percentile], 1e-9) - 1
+                changes.append(f"{percentile} {change:+7.1%}")
+            slower = slower or now['latency_ms']['p50'] > before['latency_ms']['p50'] * (1 + tolerance)
+        changes.append(f"peak RSS {now['peak_rss_mb'] - before['peak_rss_mb']:+8.1f} MB")
+        if slower:
+            regressions.append(key)
+        print(f"  {key:<28} {'  '.join(changes)}{'  SLOWER' if slower else ''}")
+    for key in sorted(previous.keys() - current.keys()):
+        print(f"  {key:<28} not measured in this run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline end-to-end benchmark suite")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Synthetic corpus sizes")
+    parser.add_argument('--words', type=int, default=300, help="Mean words per synthetic article")
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sample', type=int, default=1000, help="Documents timed one by one in extraction and preprocessing")
+    parser.add_argument('--tokenizer', choices=('nltk', 'regex'), default='nltk')
+    parser.add_argument('--topic-model', choices=('lda', 'nmf'), default=None, help="Fit a topic model in analyze_tf_idf")
+    parser.add_argument('--analyze-limit', type=int, default=20000,
+                        help="Largest corpus given to the in-memory analyze_tf_idf (see bench_out_of_core.py beyond)")
+    parser.add_argument('--queries', type=int, default=500, help="Related-article queries per corpus size")
+    parser.add_argument('--skip-network', action='store_true', help="Skip the fixture-server stages")
+    parser.add_argument('--latency', type=float, default=0.01, help="Seconds of fixture server latency per response")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent fetches")
+    parser.add_argument('--fetch-pages', type=int, default=200, help="Articles saved by each crawl")
+    parser.add_argument('--api-articles', type=int, default=300, help="Documents read from the mock Article Search API")
+    parser.add_argument('--api-rate', type=float, default=6000.0, help="API client budget, requests per minute")
+    parser.add_argument('--output', default='benchmark-results.json', help="Where to write the JSON report")
+    parser.add_argument('--compare', metavar='BASELINE', help="Earlier report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="Relative slowdown reported as a regression")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run_child(args)
+
+    commit, dirty = git_commit()
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'child')}
+    report = {'commit': commit, 'dirty': dirty, 'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+              'config': config, 'groups': {}}
+    groups = ([] if args.skip_network else ['network']) + [str(size) for size in args.sizes]
+    for group in groups:
+        label = group if group == 'network' else f"corpus-{group}"
+        run = report['groups'][label] = run_group(group, sys.argv[1:])
+        print(f"{label} (peak RSS {run.get('peak_rss_mb', '?')} MB)")
+        if 'failed' in run:
+            print(f"  failed: {run['failed']}")
+        for name, stage in run.get('stages', {}).items():
+            print(f"  {name:<18} skipped: {stage['skipped']}" if 'skipped' in stage else format_stage(name, stage))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import itertools
+
+import numpy as np
+
+from fixture_server import SECTIONS, render_article_page
+
+# Synthetic news corpus generator for offline benchmarks.
+#
+# Generates any number of articles (100 to 100k and beyond) deterministically
+# from a seed. Words follow a Zipf distribution over a fixed vocabulary whose
+# most frequent ranks are English function words (so stopword removal has
+# work to do) and whose other entries are pronounceable pseudo-words. Each
+# article is about one of num_topics topics, and topic_fraction of its words
+# come from that topic's own word list, so articles on the same topic are
+# more alike than the Zipf background alone would make them; this gives the
+# TF-IDF top terms and the related-article index real structure to find.
+
+FUNCTION_WORDS = (
+    "the of and to a in that is was he for it with as his on be at by i this had not are but from or have an "
+    "they which one you were her all she there would their we him been has when who will more no if out so said "
+    "what up its about into than them can only other new some could time these two may then do first any my now"
+).split()
+
+_SYLLABLES = ("ba be bi bo bu da de di do du fa fe fi fo ka ke ki ko ku la le li lo lu ma me mi mo mu "
+              "na ne ni no nu pa pe pi po ra re ri ro ru sa se si so ta te ti to tu va ve vi vo za ze").split()
+
+WORDS_PER_PARAGRAPH = 60
+
+
+# Function to build a vocabulary of function words followed by unique pseudo-words
+def make_vocabulary(size):
+    words = FUNCTION_WORDS[:size]
+    for length in itertools.count(2):
+        for syllables in itertools.product(_SYLLABLES, repeat=length):
+            if len(words) >= size:
+                return words
+            words.append(''.join(syllables))
+
+
+def split_paragraphs(words):
+    return [' '.join(words[start:start + WORDS_PER_PARAGRAPH]).capitalize() + '.'
+            for start in range(0, len(words), WORDS_PER_PARAGRAPH)]
+
+
+class SyntheticCorpus:
+    def __init__(self, num_documents, words_per_document=300, vocabulary_size=50000, num_topics=50,
+                 topic_words=40, topic_fraction=0.2, zipf_exponent=1.1, seed=0):
+        self.num_documents = num_documents
+        self.words_per_document = words_per_document
+        self.topic_fraction = topic_fraction
+        self.seed = seed
+        self.vocabulary = np.array(make_vocabulary(vocabulary_size), dtype=object)
+        weights = 1.0 / np.arange(1, vocabulary_size + 1) ** zipf_exponent
+        self._cumulative = np.cumsum(weights / weights.sum())
+        rng = np.random.default_rng(seed)
+        # Topic words are drawn from the mid-frequency ranks, like the names and subjects of a story
+        content = np.arange(len(FUNCTION_WORDS), vocabulary_size)
+        self.topics = [rng.choice(content[:vocabulary_size // 5], size=topic_words, replace=False)
+                       for _ in range(num_topics)]
+
+    def __len__(self):
+        return self.num_documents
+
+    def url(self, index):
+        section = SECTIONS[index % len(SECTIONS)]
+        return f"https://www.nytimes.com/2025/{index % 12 + 1:02d}/{index % 28 + 1:02d}/{section}/synthetic-{index}.html"
+
+    # Function to get the topic an article is about
+    def topic(self, index):
+        return index % len(self.topics)
+
+    # Function to generate the words of one article
+    def words(self, index):
+        rng = np.random.default_rng((self.seed, index))
+        length = max(1, rng.poisson(self.words_per_document))
+        ids = np.minimum(np.searchsorted(self._cumulative, rng.random(length)), len(self.vocabulary) - 1)
+        on_topic = rng.random(length) < self.topic_fraction
+        topic = self.topics[self.topic(index)]
+        ids[on_topic] = topic[rng.integers(0, len(topic), on_topic.sum())]
+        return self.vocabulary[ids].tolist()
+
+    def paragraphs(self, index):
+        return split_paragraphs(self.words(index))
+
+    def text(self, index):
+        return '\n'.join(self.paragraphs(index))
+
+    def html(self, index):
+        return render_article_page(f"Synthetic story {index}", f"Story {index}", self.paragraphs(index))
+
+    # Generator yielding (url, text, words) for every article in order
+    def __iter__(self):
+        for index in range(self.num_documents):
+            words = self.words(index)
+            yield self.url(index), '\n'.join(split_paragraphs(words)), words
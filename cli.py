@@ -0,0 +1,146 @@
+import argparse
+import logging
+import os
+import sys
+
+# Headless entry point: scrape or fetch articles, analyze them with TF-IDF and
+# export the results as CSV or Parquet without Streamlit, e.g. from cron:
+#
+#   python cli.py scrape --articles 50 --output topics.csv
+#   python cli.py api --articles 20 --query climate --output -
+#   python cli.py analyze --out-of-core --memory-limit 512 --output backfill.csv
+#   python cli.py analyze --format parquet --max-text-chars 500 --output topics.parquet
+#
+# Arguments are parsed before the library is imported, so --help and argument
+# errors return immediately, and --data-dir takes effect before any store is
+# opened.
+
+
+def build_parser():
+    # Options shared by every command, accepted after the command name
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--data-dir', help="Directory for the article store, caches and crawl state")
+    common.add_argument('--output', '-o', default='nyt_articles_with_topics.csv',
+                        help="File to write, or - for stdout (CSV only)")
+    common.add_argument('--format', choices=('csv', 'parquet'), default='csv', help="Output format (Parquet needs pyarrow)")
+    common.add_argument('--columns', help="Comma-separated output columns (default: article data, URL, topic "
+                                          "and the corpus topic when modeled; also available: Top Terms)")
+    common.add_argument('--max-text-chars', type=int, help="Truncate the article text to this many characters")
+    common.add_argument('--tokenizer', choices=('nltk', 'regex'), help="Tokenizer mode (default: library setting)")
+    common.add_argument('--workers', type=int,
+                        help="Worker processes for extraction and preprocessing, 0 = one per CPU core (default: library setting)")
+    common.add_argument('--verbose', '-v', action='count', default=0, help="Show progress (-v) and status details (-vv)")
+    common.add_argument('--out-of-core', action='store_true',
+                        help="Analyze in memory-bounded chunks and write the CSV incrementally (IDF over the analyzed articles)")
+    common.add_argument('--memory-limit', type=int, help="Peak RSS bound in MB for --out-of-core (default: library setting)")
+    common.add_argument('--metrics-sample-rate', type=float,
+                        help="Fraction of stage events timed, 0 to turn metrics off (default: library setting)")
+
+    parser = argparse.ArgumentParser(description="Collect NYT articles and label each with its most probable topic (TF-IDF).")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape = subparsers.add_parser('scrape', parents=[common], help="Crawl nytimes.com sections and articles")
+    scrape.add_argument('--articles', type=int, default=100, help="Number of articles to save")
+    scrape.add_argument('--stream', action='store_true', help="Use the streaming pipeline")
+    scrape.add_argument('--restart', action='store_true', help="Start a new crawl instead of resuming the saved frontier")
+    scrape.add_argument('--time-budget', type=float, help="Stop after this many seconds; the next run resumes")
+    scrape.add_argument('--render', action='store_true',
+                        help="Render pages without a static article body in headless Chromium (needs Playwright; cannot be combined with --stream)")
+
+    api = subparsers.add_parser('api', parents=[common], help="Fetch article metadata from the Article Search API")
+    api.add_argument('--articles', type=int, default=10, help="Number of articles to fetch")
+    api.add_argument('--query', default='news', help="Search query")
+    api.add_argument('--api-key', help="NYT API key (default: NYT_API_KEY environment variable)")
+
+    subparsers.add_parser('analyze', parents=[common], help="Analyze every article already in the article store")
+    return parser
+
+
+# Function to run the memory-bounded analysis, streaming CSV rows to the output as chunks finish
+def analyze_out_of_core(news_topics, urls, args, reporter):
+    if not urls:
+        reporter.error("No articles saved for TF-IDF analysis.")
+        return 1
+    if args.output == '-':
+        summary = news_topics.analyze_tf_idf_out_of_core(urls, sys.stdout, reporter, args.memory_limit,
+                                                         args.columns, args.max_text_chars)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            summary = news_topics.analyze_tf_idf_out_of_core(urls, f, reporter, args.memory_limit,
+                                                             args.columns, args.max_text_chars)
+        if summary:
+            reporter.info(f"Wrote {summary['documents']} articles to {args.output}")
+    return 0 if summary else 1
+
+
+# Function to log the time spent in each stage and where the run's metrics were saved
+def report_metrics(run_metrics, reporter):
+    if run_metrics is None:
+        return
+    snapshot, json_path, prometheus_path = run_metrics
+    for timer in snapshot['timers']:
+        reporter.info(f"{timer['name']}: {timer['items']} items in {timer['count']} calls, {timer['seconds'] or 0.0:.2f}s")
+    reporter.info(f"Metrics written to {json_path} and {prometheus_path}")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.format == 'parquet' and (args.output == '-' or args.out_of_core):
+        parser.error("--format parquet needs an output file and cannot be combined with --out-of-core")
+    if args.command == 'scrape' and args.stream and args.render:
+        parser.error("--render is not available with --stream")
+    level = (logging.WARNING, logging.INFO, logging.DEBUG)[min(args.verbose, 2)]
+    logging.basicConfig(level=level, format='%(levelname)s %(message)s', stream=sys.stderr)
+    if args.data_dir:
+        os.environ['NYT_TOPICS_DATA_DIR'] = os.path.abspath(args.data_dir)
+
+    import news_topics
+
+    if args.columns:
+        args.columns = tuple(column.strip() for column in args.columns.split(','))
+        unknown = [column for column in args.columns if column not in news_topics.RESULT_COLUMNS]
+        if unknown:
+            parser.error(f"unknown columns {', '.join(unknown)}; choose from {', '.join(news_topics.RESULT_COLUMNS)}")
+    if args.tokenizer:
+        news_topics.TOKENIZER_MODE = args.tokenizer
+    if args.workers is not None:
+        news_topics.PARALLEL_WORKERS = args.workers
+    if args.metrics_sample_rate is not None:
+        news_topics.METRICS_SAMPLE_RATE = args.metrics_sample_rate
+    news_topics.reset_run_metrics()
+    # The library's default reporter logs, which is all a headless run needs
+    reporter = news_topics.Reporter()
+    try:
+        if args.command == 'scrape':
+            if args.time_budget:
+                news_topics.CRAWL_TIME_BUDGET_SECONDS = args.time_budget
+            if args.render:
+                news_topics.RENDER_FALLBACK = True
+            scrape = news_topics.stream_scrape_nyt if args.stream else news_topics.scrape_nyt
+            saved_urls = scrape(reporter, resume=not args.restart, target_articles=args.articles)
+        elif args.command == 'api':
+            if args.api_key:
+                news_topics.NYT_API_KEY = args.api_key
+            saved_urls = news_topics.fetch_articles_from_api(args.articles, reporter, query=args.query)
+        else:
+            saved_urls = news_topics.get_article_store().urls()
+
+        if args.out_of_core:
+            return analyze_out_of_core(news_topics, saved_urls, args, reporter)
+        results = news_topics.analyze_tf_idf(saved_urls, reporter)
+        if not results:
+            return 1
+        if args.output == '-':
+            news_topics.write_results_csv(results, sys.stdout, args.columns, args.max_text_chars)
+        else:
+            news_topics.export_results(results, args.output, args.format, args.columns, args.max_text_chars)
+            reporter.info(f"Wrote {len(results)} articles to {args.output}")
+        return 0
+    finally:
+        report_metrics(news_topics.save_run_metrics(args.command), reporter)
+        news_topics.close_resources()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+import numpy as np
+
+# Persistent corpus statistics for incremental IDF.
+#
+# Holds the total document count and the per-term document frequency of every
+# article ever analyzed, keyed by article URL so the same article is never
+# counted twice. Adding a batch only touches the batch's own documents and
+# terms, and IDF lookups only read the terms the batch needs, so the cost of a
+# run is proportional to the new batch rather than the whole history.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    url TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS term_df (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+class CorpusStats:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def document_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def _known_urls(self, urls):
+        known = set()
+        for start in range(0, len(urls), _QUERY_CHUNK):
+            chunk = urls[start:start + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            known.update(row[0] for row in self._db.execute(
+                f"SELECT url FROM documents WHERE url IN ({placeholders})", chunk))
+        return known
+
+    # Function to add a batch of documents; returns a list of booleans marking which were new
+    def add_documents(self, urls, token_lists):
+        urls = list(urls)
+        with self._lock:
+            known = self._known_urls(urls)
+            is_new = []
+            new_urls = []
+            term_counts = Counter()
+            for url, tokens in zip(urls, token_lists):
+                if url in known:
+                    is_new.append(False)
+                    continue
+                known.add(url)
+                is_new.append(True)
+                new_urls.append((url,))
+                term_counts.update(set(tokens))
+
+            with self._db:
+                self._db.executemany("INSERT INTO documents (url) VALUES (?)", new_urls)
+                self._db.executemany(
+                    "INSERT INTO term_df (term, df) VALUES (?, ?) "
+                    "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                    term_counts.items(),
+                )
+        return is_new
+
+    # Function to look up accumulated document frequencies, aligned with the given terms
+    def document_frequencies(self, terms):
+        terms = list(terms)
+        found = {}
+        with self._lock:
+            for start in range(0, len(terms), _QUERY_CHUNK):
+                chunk = terms[start:start + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(self._db.execute(
+                    f"SELECT term, df FROM term_df WHERE term IN ({placeholders})", chunk))
+        return np.fromiter((found.get(term, 0) for term in terms), dtype=np.int64, count=len(terms))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# Persistent crawl frontier.
+#
+# Every section and article URL the crawler has seen is recorded in SQLite with
+# its kind, state ('pending', 'fetched' or 'failed') and retry count, in the
+# order it was discovered. Pending URLs are also held in one in-memory deque per
+# kind, so taking the next URL is O(1). State changes are committed in small
+# batches (every `checkpoint_every` changes, and on checkpoint()), so after a
+# rerun, crash or timeout the crawler reloads the pending queues and continues
+# where it stopped instead of fetching everything again. URLs that were taken
+# but never marked are still 'pending' on disk and are picked up again by
+# resume(). So are URLs that failed and may be retried: they are not queued
+# again in the same run (the fetcher has already retried them with backoff),
+# only on the next resume().
+
+PENDING = 'pending'
+FETCHED = 'fetched'
+FAILED = 'failed'
+
+SECTION = 'section'
+ARTICLE = 'article'
+
+DEFAULT_MAX_RETRIES = 3  # Runs a URL may fail in before it is given up
+DEFAULT_CHECKPOINT_EVERY = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    state TEXT NOT NULL,
+    retries INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frontier_kind_state ON frontier (kind, state, seq);
+"""
+
+
+class CrawlFrontier:
+    def __init__(self, path, max_retries=DEFAULT_MAX_RETRIES, checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_retries = max_retries
+        self.checkpoint_every = checkpoint_every
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._queues = {SECTION: deque(), ARTICLE: deque()}
+        self._uncommitted = 0
+        self.known_skipped = 0  # Links ignored by add_many because they were already known, since reset_stats()
+        self.resume()
+
+    # Function to rebuild the pending queues from disk, in discovery order
+    def resume(self):
+        with self._lock:
+            self._db.commit()
+            for queue in self._queues.values():
+                queue.clear()
+            for url, kind in self._db.execute(
+                "SELECT url, kind FROM frontier WHERE state = ? ORDER BY seq", (PENDING,)
+            ):
+                self._queues.setdefault(kind, deque()).append(url)
+
+    def _changed(self, count=1):
+        self._uncommitted += count
+        if self._uncommitted >= self.checkpoint_every:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def checkpoint(self):
+        with self._lock:
+            self._db.commit()
+            self._uncommitted = 0
+
+    # Function to add newly discovered URLs; URLs already known (in any state) are ignored
+    def add_many(self, urls, kind):
+        with self._lock:
+            now = time.time()
+            added = 0
+            for url in urls:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO frontier (url, kind, state, updated_at) VALUES (?, ?, ?, ?)",
+                    (url, kind, PENDING, now),
+                )
+                if cursor.rowcount:
+                    self._queues[kind].append(url)
+                    added += 1
+                else:
+                    self.known_skipped += 1
+            self._changed(added)
+            return added
+
+    def add(self, url, kind):
+        return self.add_many([url], kind) == 1
+
+    # Function to take the next pending URL of a kind, or None
+    def pop(self, kind):
+        with self._lock:
+            queue = self._queues[kind]
+            return queue.popleft() if queue else None
+
+    def pop_many(self, kind, count):
+        with self._lock:
+            queue = self._queues[kind]
+            return [queue.popleft() for _ in range(min(count, len(queue)))]
+
+    def _set_state(self, url, state, retries_delta=0):
+        self._db.execute(
+            "UPDATE frontier SET state = ?, retries = retries + ?, updated_at = ? WHERE url = ?",
+            (state, retries_delta, time.time(), url),
+        )
+        self._changed()
+
+    def mark_fetched(self, url):
+        with self._lock:
+            self._set_state(url, FETCHED)
+
+    # Function to record a failure; retryable URLs stay pending on disk for the next resume()
+    def mark_failed(self, url, permanent=False):
+        with self._lock:
+            row = self._db.execute("SELECT retries FROM frontier WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return
+            retries = row[0]
+            if permanent or retries + 1 >= self.max_retries:
+                self._set_state(url, FAILED, retries_delta=1)
+            else:
+                self._set_state(url, PENDING, retries_delta=1)
+
+    def pending_count(self, kind):
+        with self._lock:
+            return len(self._queues[kind])
+
+    def has_pending(self):
+        with self._lock:
+            return any(self._queues.values())
+
+    # Function to count URLs per (kind, state)
+    def counts(self):
+        with self._lock:
+            return {
+                (kind, state): count
+                for kind, state, count in self._db.execute(
+                    "SELECT kind, state, COUNT(*) FROM frontier GROUP BY kind, state"
+                )
+            }
+
+    # Function to start a new crawl: sections and unfinished articles are forgotten so they
+    # can be rediscovered, while fetched articles stay recorded and are never fetched again
+    def start_new_crawl(self):
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM frontier WHERE kind = ? OR state != ?", (SECTION, FETCHED)
+            )
+            self._db.commit()
+            self._uncommitted = 0
+            for queue in self._queues.values():
+                queue.clear()
+
+    # Function to zero the per-run count of discovered URLs skipped because they were already known
+    def reset_stats(self):
+        with self._lock:
+            self.known_skipped = 0
+
+    # Function to forget all crawl state and start from scratch
+    def reset(self):
+        with self._lock:
+            self._db.execute("DELETE FROM frontier")
+            self._db.commit()
+            self._uncommitted = 0
+            for queue in self._queues.values():
+                queue.clear()
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
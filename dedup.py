@@ -0,0 +1,223 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import numpy as np
+
+# Duplicate detection for URLs and article text.
+#
+# normalize_url() canonicalizes a URL before it is queued or fetched: scheme and
+# host are lowercased, default ports are dropped, nytimes.com links become
+# https://www.nytimes.com, the fragment is dropped and query strings are
+# removed (tracking parameters such as smid= or utm_* never change an article),
+# so the variants of one link collapse into a single frontier entry.
+#
+# NearDuplicateDetector catches the same story under different URLs (wire
+# copies, live-blog updates). Each text is reduced to a MinHash signature of
+# its word shingles, and the signature is split into LSH bands stored in
+# SQLite with an index on (band, bucket). A lookup only reads the documents
+# sharing at least one band bucket, so checking a new article costs a few
+# indexed queries instead of a comparison with every stored article. Candidates
+# are confirmed by the estimated Jaccard similarity of their signatures.
+# Like the crawl frontier, new entries are committed in batches (every
+# `checkpoint_every` documents, and on checkpoint() or close()). remove() only
+# takes back documents indexed during the current run (since reset_stats()),
+# so an article saved on an earlier run keeps its signature if a later run
+# fails to save it again.
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 Jaccard become candidates
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_CHECKPOINT_EVERY = 50
+
+_WORD_PATTERN = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_NYT_HOSTS = ('nytimes.com', 'www.nytimes.com')
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    doc_key TEXT PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    doc_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lsh_bucket_lookup ON lsh_buckets (band, bucket);
+"""
+
+
+class NearDuplicateArticle(Exception):
+    def __init__(self, url, duplicate_of, similarity):
+        super().__init__(f"near-duplicate of {duplicate_of} ({similarity:.0%} similar)")
+        self.url = url
+        self.duplicate_of = duplicate_of
+        self.similarity = similarity
+
+
+# Function to canonicalize a URL; query parameters are dropped unless listed in keep_params
+def normalize_url(url, keep_params=()):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if host in _NYT_HOSTS:
+        scheme, host = 'https', 'www.nytimes.com'
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = ''
+    if keep_params:
+        query = urlencode([(key, value) for key, value in parse_qsl(parts.query) if key in keep_params])
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+# Function to split text into the set of lowercase word shingles of the given size
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        rng = np.random.default_rng(seed)
+        # Universal hashes (a * x + b) mod p; a, b and x are below 2**32 so a * x fits in 64 bits
+        self.a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    # Function to compute the MinHash signature of a text, or None for text without words
+    def signature(self, text):
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(text, self.shingle_size)),
+            dtype=np.uint64,
+        )
+        if hashes.size == 0:
+            return None
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+# Function to estimate the Jaccard similarity of two documents from their signatures
+def estimate_similarity(signature, other):
+    return float(np.mean(signature == other))
+
+
+class NearDuplicateDetector:
+    def __init__(self, path, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.checkpoint_every = checkpoint_every
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self.skipped = []  # (doc_key, duplicate_of, similarity) for the current run
+        self.added = set()  # Keys indexed during the current run
+
+    def _band_buckets(self, signature):
+        buckets = []
+        for band in range(self.bands):
+            digest = hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).digest()
+            buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+        return buckets
+
+    def _best_match(self, doc_key, signature, buckets):
+        where = ' OR '.join(['(band = ? AND bucket = ?)'] * len(buckets))
+        params = [value for bucket in buckets for value in bucket]
+        candidates = {key for (key,) in self._db.execute(f"SELECT DISTINCT doc_key FROM lsh_buckets WHERE {where}", params)}
+        candidates.discard(doc_key)
+        best = None
+        if candidates:
+            placeholders = ','.join('?' * len(candidates))
+            for key, blob in self._db.execute(
+                f"SELECT doc_key, signature FROM signatures WHERE doc_key IN ({placeholders})", list(candidates)
+            ):
+                similarity = estimate_similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity)
+        return best
+
+    # Function to check a document against everything indexed so far. Returns (duplicate_of,
+    # similarity) for a near-duplicate of another key, else None; non-duplicates are indexed.
+    def check(self, doc_key, text):
+        signature = self.hasher.signature(text)
+        if signature is None:
+            return None
+        buckets = self._band_buckets(signature)
+        with self._lock:
+            match = self._best_match(doc_key, signature, buckets)
+            if match is not None:
+                self.skipped.append((doc_key, match[0], match[1]))
+                return match
+            known = self._db.execute("SELECT 1 FROM signatures WHERE doc_key = ?", (doc_key,)).fetchone()
+            if known is None:
+                self._db.execute("INSERT INTO signatures (doc_key, signature) VALUES (?, ?)", (doc_key, signature.tobytes()))
+                self._db.executemany(
+                    "INSERT INTO lsh_buckets (band, bucket, doc_key) VALUES (?, ?, ?)",
+                    [(band, bucket, doc_key) for band, bucket in buckets],
+                )
+                self.added.add(doc_key)
+                self._uncommitted += 1
+                if self._uncommitted >= self.checkpoint_every:
+                    self._db.commit()
+                    self._uncommitted = 0
+        return None
+
+    # Function to drop documents indexed during this run, e.g. when an article that passed check() could
+    # not be saved; documents indexed on earlier runs are kept
+    def remove(self, doc_keys):
+        with self._lock:
+            for doc_key in doc_keys:
+                if doc_key not in self.added:
+                    continue
+                self.added.discard(doc_key)
+                row = self._db.execute("SELECT signature FROM signatures WHERE doc_key = ?", (doc_key,)).fetchone()
+                if row is None:
+                    continue
+                # Bucket rows are found through the (band, bucket) index rather than by scanning for the key
+                buckets = self._band_buckets(np.frombuffer(row[0], dtype=np.uint32))
+                self._db.executemany("DELETE FROM lsh_buckets WHERE band = ? AND bucket = ? AND doc_key = ?",
+                                     [(band, bucket, doc_key) for band, bucket in buckets])
+                self._db.execute("DELETE FROM signatures WHERE doc_key = ?", (doc_key,))
+                self._uncommitted += 1
+
+    def checkpoint(self):
+        with self._lock:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    # Function to summarize this run's skipped documents as (count, first few examples)
+    def duplicate_summary(self, top=5):
+        with self._lock:
+            return len(self.skipped), list(self.skipped[:top])
+
+    def reset_stats(self):
+        with self._lock:
+            self.skipped = []
+            self.added = set()
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
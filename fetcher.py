@@ -0,0 +1,234 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Concurrent, polite page fetcher.
+#
+# A bounded thread pool keeps several requests in flight over one shared
+# requests.Session, so keep-alive connections are pooled and reused. Every
+# request goes through a per-host limiter that enforces both a minimum spacing
+# between requests (rate limit) and a cap on concurrent requests to that host.
+# The robots.txt check runs in the calling thread before a fetch is scheduled,
+# and failed requests are retried with the same exponential backoff as before.
+# Backoff waits on a threading.Event, so close() interrupts them. With an
+# HttpCache attached, fresh responses are served from disk and stale ones are
+# revalidated with a conditional GET. With a RunMetrics attached (see
+# metrics.py), every request records its duration, status, bytes and time spent
+# waiting for the host rate limit, along with cache outcomes, retries and backoff.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RATE_PER_HOST = 2.0  # Requests per second per host
+DEFAULT_CONCURRENCY_PER_HOST = 4
+DEFAULT_TIMEOUT = 15
+
+
+class FetchCancelled(Exception):
+    pass
+
+
+class CrawlNotAllowed(ValueError):
+    pass
+
+
+class HostRateLimiter:
+    def __init__(self, rate_per_host=DEFAULT_RATE_PER_HOST, concurrency_per_host=DEFAULT_CONCURRENCY_PER_HOST, stop_event=None):
+        self.min_interval = 1.0 / rate_per_host if rate_per_host and rate_per_host > 0 else 0.0
+        self.concurrency_per_host = max(1, concurrency_per_host)
+        self.stop_event = stop_event or threading.Event()
+        self._lock = threading.Lock()
+        self._next_slot = {}
+        self._semaphores = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.concurrency_per_host)
+            return semaphore
+
+    def acquire(self, host):
+        semaphore = self._semaphore(host)
+        while not semaphore.acquire(timeout=0.1):
+            if self.stop_event.is_set():
+                raise FetchCancelled()
+        # Reserve the next free slot for this host, then wait for it outside the lock
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if self.stop_event.wait(max(0.0, slot - now)):
+            semaphore.release()
+            raise FetchCancelled()
+
+    def release(self, host):
+        self._semaphore(host).release()
+
+
+class Fetcher:
+    def __init__(self, headers=None, is_allowed=None, max_workers=DEFAULT_MAX_WORKERS,
+                 rate_per_host=DEFAULT_RATE_PER_HOST, concurrency_per_host=DEFAULT_CONCURRENCY_PER_HOST,
+                 max_retries=3, delay_base=2, timeout=DEFAULT_TIMEOUT, cache=None, metrics=None):
+        self.cache = cache
+        self.metrics = metrics
+        self.is_allowed = is_allowed or (lambda url: True)
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.delay_base = delay_base
+        self.timeout = timeout
+        self.stop_event = threading.Event()
+        self.limiter = HostRateLimiter(rate_per_host, concurrency_per_host, self.stop_event)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self._executor = None
+
+    def _check_allowed(self, url):
+        if not self.is_allowed(url):
+            raise CrawlNotAllowed("Crawling not permitted by robots.txt")
+
+    def _get(self, url, params=None, headers=None, before_request=None):
+        if before_request is not None:
+            before_request()
+        host = urlsplit(url).netloc
+        metrics = self.metrics
+        waited_at = time.perf_counter()
+        self.limiter.acquire(host)
+        try:
+            started_at = time.perf_counter()
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        finally:
+            self.limiter.release(host)
+        if metrics is not None and metrics.enabled:
+            metrics.observe('fetch', time.perf_counter() - started_at)
+            metrics.count('fetch_rate_limit_wait_seconds', started_at - waited_at)
+            metrics.count('fetch_responses', status=response.status_code)
+            metrics.count('fetch_bytes', len(response.content))
+        return response
+
+    # Single GET without robots check or retries, served from or revalidated against the cache.
+    # before_request() is called right before anything goes over the network (e.g. to take a
+    # rate-limit token), so cache hits cost nothing.
+    def request_text(self, url, params=None, before_request=None):
+        cache = self.cache
+        if cache is None:
+            response = self._get(url, params, before_request=before_request)
+            response.raise_for_status()
+            return response.text
+
+        key = cache.make_key(url, params)
+        entry = cache.lookup(key)
+        if entry is not None and cache.is_fresh(entry):
+            try:
+                text = cache.read_text(entry)
+                cache.record_hit(entry)
+                self._count('fetch_cache', result='hit')
+                return text
+            except OSError:
+                entry = None
+
+        response = self._get(url, params, entry.conditional_headers() if entry is not None else None, before_request)
+        if entry is not None and response.status_code == 304:
+            try:
+                text = cache.read_text(entry)
+                cache.record_hit(entry, revalidated=True, etag=response.headers.get('ETag'),
+                                 last_modified=response.headers.get('Last-Modified'))
+                self._count('fetch_cache', result='revalidated')
+                return text
+            except OSError:
+                response = self._get(url, params, before_request=before_request)
+        response.raise_for_status()
+        cache.record_miss()
+        self._count('fetch_cache', result='miss')
+        cache.store(key, response.content, response.encoding or response.apparent_encoding,
+                    response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.text
+
+    def _count(self, name, value=1, **labels):
+        if self.metrics is not None:
+            self.metrics.count(name, value, **labels)
+
+    # Fetch with retries and exponential backoff; the robots check is done by the caller
+    def _fetch_with_retries(self, url):
+        for attempt in range(self.max_retries):
+            try:
+                return self.request_text(url)
+            except FetchCancelled:
+                raise
+            except Exception as e:
+                logger.warning("Attempt %d/%d failed for %s: %s", attempt + 1, self.max_retries, url, e)
+                if attempt >= self.max_retries - 1:
+                    raise
+                delay = self.delay_base * (2 ** attempt)
+                self._count('fetch_retries')
+                self._count('fetch_backoff_seconds', delay)
+                if self.stop_event.wait(delay):
+                    raise FetchCancelled()
+
+    # Function to fetch a single page in the calling thread
+    def fetch(self, url):
+        self._check_allowed(url)
+        return self._fetch_with_retries(url)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetcher')
+        return self._executor
+
+    # Generator yielding (url, text, error) in input order while keeping up to
+    # max_workers fetches in flight. should_stop() is checked before each new
+    # fetch is scheduled, so no work is started once the caller has enough.
+    def fetch_many(self, urls, should_stop=None):
+        executor = self._get_executor()
+        pending = deque()
+        url_iter = iter(urls)
+
+        def schedule():
+            while len(pending) < self.max_workers:
+                if should_stop is not None and should_stop():
+                    return
+                url = next(url_iter, None)
+                if url is None:
+                    return
+                try:
+                    self._check_allowed(url)
+                except Exception as e:
+                    pending.append((url, None, e))
+                    continue
+                pending.append((url, executor.submit(self._fetch_with_retries, url), None))
+
+        schedule()
+        while pending:
+            url, future, error = pending.popleft()
+            text = None
+            if future is not None:
+                try:
+                    text = future.result()
+                except Exception as e:
+                    error = e
+            yield url, text, error
+            schedule()
+
+    def close(self):
+        self.stop_event.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
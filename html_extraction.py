@@ -0,0 +1,95 @@
+import os
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+# HTML extraction for NYT pages. Kept free of Streamlit calls so it can run
+# inside worker processes and pipeline threads.
+#
+# Pages are parsed with a SoupStrainer so only the tags we actually read are
+# built into the tree (anchors for link discovery, paragraphs and the article
+# body section for text), and each page is walked once: links are sorted into
+# article / section URLs in a single pass with precompiled matchers, and the
+# article body is chosen from one traversal of the paragraphs instead of
+# re-searching the tree for each fallback. lxml is used when installed.
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+# Site the links belong to; NYT_TOPICS_BASE_URL points it elsewhere, e.g. at the benchmark fixture server
+NYT_BASE_URL = os.environ.get('NYT_TOPICS_BASE_URL', 'https://www.nytimes.com').rstrip('/')
+
+_ARTICLE_HREF = re.compile(f'(?:{re.escape(NYT_BASE_URL)})?/20')
+_SECTION_HREF = re.compile(f'(?:{re.escape(NYT_BASE_URL)})?/section/')
+_EXCLUDED_SUFFIXES = ('.jpg', '.png', '/interactive/', '/video/', '.json', '.xml', '.rss')
+
+_LINK_STRAINER = SoupStrainer('a', href=True)
+_BODY_STRAINER = SoupStrainer(['p', 'section'])
+
+
+def _absolute(href):
+    return NYT_BASE_URL + href if href.startswith('/') else href
+
+
+# Function to turn an href into an absolute article URL, or None
+def article_url_from_href(href):
+    if _ARTICLE_HREF.match(href) and not href.endswith(_EXCLUDED_SUFFIXES):
+        return _absolute(href)
+    return None
+
+
+# Function to turn an href into an absolute section URL, or None
+def section_url_from_href(href):
+    if _SECTION_HREF.match(href):
+        return _absolute(href)
+    return None
+
+
+# Function to sort a page's links into (article_urls, section_urls), each
+# de-duplicated and in document order, in a single pass over the anchors
+def extract_links(html):
+    article_urls = {}
+    section_urls = {}
+    for a in BeautifulSoup(html, PARSER, parse_only=_LINK_STRAINER).find_all('a', href=True):
+        href = a['href']
+        url = article_url_from_href(href)
+        if url is not None:
+            article_urls.setdefault(url, None)
+            continue
+        url = section_url_from_href(href)
+        if url is not None:
+            section_urls.setdefault(url, None)
+    return list(article_urls), list(section_urls)
+
+
+def _is_article_body(tag):
+    return tag.name == 'section' and tag.get('name') == 'articleBody'
+
+
+# Function to extract the article body text from an article page. Preference
+# order: paragraphs with generated "css-" classes, then paragraphs inside the
+# articleBody section, then every paragraph on the page.
+def extract_article_text(html):
+    soup = BeautifulSoup(html, PARSER, parse_only=_BODY_STRAINER)
+    story_body = soup.find(_is_article_body)
+
+    css_paragraphs = []
+    body_paragraphs = []
+    all_paragraphs = []
+    for p in soup.find_all('p'):
+        text = p.get_text(strip=True)
+        if not text:
+            continue
+        all_paragraphs.append(text)
+        if 'css-' in ' '.join(p.get('class', ())):
+            css_paragraphs.append(text)
+        if story_body is not None and any(parent is story_body for parent in p.parents):
+            body_paragraphs.append(text)
+
+    if css_paragraphs:
+        return '\n'.join(css_paragraphs)
+    if story_body is not None:
+        return '\n'.join(body_paragraphs)
+    return '\n'.join(all_paragraphs)
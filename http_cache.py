@@ -0,0 +1,198 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+# Persistent, content-addressed on-disk HTTP response cache.
+#
+# Response bodies are gzip-compressed and stored once per SHA-256 of their
+# content under objects/, so identical pages fetched from different URLs share
+# storage. A small SQLite index maps each request key (URL plus sorted query
+# parameters) to its body, ETag, Last-Modified and timestamps. Entries younger
+# than the TTL are served straight from disk; older ones are revalidated with
+# If-None-Match / If-Modified-Since, and a 304 refreshes the entry without
+# transferring the body again. When the stored bodies exceed max_bytes the least
+# recently used entries are evicted.
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Query parameters that identify the caller rather than the resource
+_UNCACHED_PARAMS = frozenset({'api-key'})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    body_hash TEXT NOT NULL,
+    encoding TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_body_hash ON entries (body_hash);
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+
+class CacheEntry:
+    def __init__(self, key, body_hash, encoding, etag, last_modified, stored_at):
+        self.key = key
+        self.body_hash = body_hash
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def age(self, now=None):
+        return (now if now is not None else time.time()) - self.stored_at
+
+    # Headers for a conditional GET against this entry
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    def __init__(self, cache_dir, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    # Function to build the cache key for a request
+    @staticmethod
+    def make_key(url, params=None):
+        if not params:
+            return url
+        items = sorted((k, str(v)) for k, v in params.items() if k not in _UNCACHED_PARAMS)
+        return f"{url}?{urlencode(items)}" if items else url
+
+    def _object_path(self, body_hash):
+        return os.path.join(self.objects_dir, body_hash[:2], body_hash + '.gz')
+
+    def lookup(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body_hash, encoding, etag, last_modified, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        return CacheEntry(key, *row) if row else None
+
+    def is_fresh(self, entry):
+        return entry.age() < self.ttl
+
+    def read_body(self, entry):
+        with gzip.open(self._object_path(entry.body_hash), 'rb') as f:
+            return f.read()
+
+    def read_text(self, entry):
+        return self.read_body(entry).decode(entry.encoding or 'utf-8', errors='replace')
+
+    # Function to record a cache hit (fresh or revalidated) and bump the entry's recency
+    def record_hit(self, entry, revalidated=False, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+                self._db.execute(
+                    "UPDATE entries SET stored_at = ?, last_access = ?, etag = COALESCE(?, etag), "
+                    "last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                    (now, now, etag, last_modified, entry.key),
+                )
+            else:
+                self.hits += 1
+                self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, entry.key))
+            self._db.commit()
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def store(self, key, body, encoding=None, etag=None, last_modified=None):
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._object_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT body_hash FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR IGNORE INTO objects (hash, size) VALUES (?, ?)", (body_hash, os.path.getsize(path))
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, body_hash, encoding, etag, last_modified, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body_hash, encoding, etag, last_modified, now, now),
+            )
+            if previous and previous[0] != body_hash:
+                self._drop_object_if_unused(previous[0])
+            self._evict()
+            self._db.commit()
+
+    def _drop_object_if_unused(self, body_hash):
+        if self._db.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone():
+            return
+        self._db.execute("DELETE FROM objects WHERE hash = ?", (body_hash,))
+        try:
+            os.remove(self._object_path(body_hash))
+        except FileNotFoundError:
+            pass
+
+    def total_bytes(self):
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    # Evict least recently used entries until the stored bodies fit in max_bytes
+    def _evict(self):
+        total = self.total_bytes()
+        while total > self.max_bytes:
+            row = self._db.execute("SELECT key, body_hash FROM entries ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            self._drop_object_if_unused(row[1])
+            total = self.total_bytes()
+
+    def hit_rate(self):
+        lookups = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / lookups if lookups else 0.0
+
+    def stats(self):
+        with self._lock:
+            total = self.total_bytes()
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate(),
+            'bytes': total,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.revalidated = self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+import time
+
+# Lightweight run instrumentation.
+#
+# RunMetrics collects counters (running totals such as bytes downloaded or
+# responses per HTTP status) and timers (how often a stage ran, how many items
+# it handled and how long it took) for one scrape, fetch or analysis run.
+# Every event is counted, but only every 1/sample_rate-th event of each timer
+# is actually timed; totals are extrapolated from the timed events, and up to
+# RESERVOIR_SIZE durations per timer are kept for percentiles. With a sample
+# rate of 0 instrumentation is off and every call returns after one attribute
+# check. Counters and timers take optional labels (e.g. status=200). One
+# object is shared for the life of the process and reset() at the start of
+# each run, so long-lived users (the fetcher) can keep a reference to it.
+# Results export as a JSON-ready dict (snapshot) or in the Prometheus text
+# exposition format (to_prometheus), and write() saves both for a run.
+# All methods are thread-safe.
+
+RESERVOIR_SIZE = 1024  # Durations kept per timer for percentiles
+PROMETHEUS_PREFIX = 'nyt_topics_'
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'key', 'items', 'start')
+
+    def __init__(self, metrics, key, items):
+        self.metrics = metrics
+        self.key = key
+        self.items = items
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics._add_duration(self.key, time.perf_counter() - self.start)
+        return False
+
+
+class _TimerStats:
+    __slots__ = ('count', 'items', 'sampled', 'sampled_seconds', 'max_seconds', 'reservoir', 'next_slot')
+
+    def __init__(self):
+        self.count = 0
+        self.items = 0
+        self.sampled = 0
+        self.sampled_seconds = 0.0
+        self.max_seconds = 0.0
+        self.reservoir = []
+        self.next_slot = 0
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items()))) if labels else (name, ())
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _prometheus_labels(labels, extra=()):
+    pairs = [(name, str(value)) for name, value in labels] + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class RunMetrics:
+    def __init__(self, sample_rate=1.0):
+        self._lock = threading.Lock()
+        self.reset(sample_rate)
+
+    # Function to clear everything recorded and start a new run, optionally with a new sample rate
+    def reset(self, sample_rate=None):
+        with self._lock:
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+                self.enabled = sample_rate > 0
+                self._sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            self._counters = {}
+            self._timers = {}
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    # Function to get a context manager timing one event of `items` items (when it is sampled)
+    def timer(self, name, items=1, **labels):
+        if not self.enabled:
+            return _NO_TIMER
+        key = _key(name, labels)
+        with self._lock:
+            stats = self._timers.get(key)
+            if stats is None:
+                stats = self._timers[key] = _TimerStats()
+            stats.count += 1
+            stats.items += items
+            sampled = stats.count % self._sample_every == 0 if self._sample_every > 1 else True
+        return _Timer(self, key, items) if sampled else _NO_TIMER
+
+    # Function to record an event timed by the caller
+    def observe(self, name, seconds, items=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            stats = self._timers.get(key)
+            if stats is None:
+                stats = self._timers[key] = _TimerStats()
+            stats.count += 1
+            stats.items += items
+            if self._sample_every > 1 and stats.count % self._sample_every:
+                return
+        self._add_duration(key, seconds)
+
+    def _add_duration(self, key, seconds):
+        with self._lock:
+            stats = self._timers.get(key)
+            if stats is None:
+                return  # Reset while the event was being timed
+            stats.sampled += 1
+            stats.sampled_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            if len(stats.reservoir) < RESERVOIR_SIZE:
+                stats.reservoir.append(seconds)
+            else:
+                # Overwrite the oldest sample, so percentiles follow the most recent events
+                stats.reservoir[stats.next_slot] = seconds
+                stats.next_slot = (stats.next_slot + 1) % RESERVOIR_SIZE
+
+    # Function to get the value of one counter, 0 if it was never incremented
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    # Function to get a JSON-ready dict of everything recorded in this run
+    def snapshot(self):
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            timers = []
+            for (name, labels), stats in sorted(self._timers.items()):
+                durations = sorted(stats.reservoir)
+                mean = stats.sampled_seconds / stats.sampled if stats.sampled else None
+                timers.append({
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': stats.count,
+                    'items': stats.items,
+                    'sampled': stats.sampled,
+                    'seconds': mean * stats.count if mean is not None else None,
+                    'mean_seconds': mean,
+                    'max_seconds': stats.max_seconds if stats.sampled else None,
+                    'quantiles': {str(q): _percentile(durations, q) for q in QUANTILES} if durations else {},
+                })
+            return {
+                'started_at': self.started_at,
+                'elapsed_seconds': time.perf_counter() - self._started,
+                'sample_rate': self.sample_rate,
+                'counters': counters,
+                'timers': timers,
+            }
+
+    # Function to render a snapshot in the Prometheus text exposition format. Timers become
+    # summaries (quantiles, _sum and _count) plus an _items_total counter.
+    @staticmethod
+    def to_prometheus(snapshot, prefix=PROMETHEUS_PREFIX):
+        families = {}  # Metric name -> (type, sample lines); samples of one metric must be contiguous
+        for counter in snapshot['counters']:
+            name = f"{prefix}{counter['name']}_total"
+            samples = families.setdefault(name, ('counter', []))[1]
+            samples.append(f"{name}{_prometheus_labels(sorted(counter['labels'].items()))} {counter['value']}")
+        for timer in snapshot['timers']:
+            name = f"{prefix}{timer['name']}_seconds"
+            labels = sorted(timer['labels'].items())
+            samples = families.setdefault(name, ('summary', []))[1]
+            for q, value in timer['quantiles'].items():
+                samples.append(f"{name}{_prometheus_labels(labels, [('quantile', q)])} {value:.6f}")
+            samples.append(f"{name}_sum{_prometheus_labels(labels)} {timer['seconds'] or 0.0:.6f}")
+            samples.append(f"{name}_count{_prometheus_labels(labels)} {timer['count']}")
+            items_name = f"{prefix}{timer['name']}_items_total"
+            families.setdefault(items_name, ('counter', []))[1].append(
+                f"{items_name}{_prometheus_labels(labels)} {timer['items']}")
+        families[f"{prefix}run_elapsed_seconds"] = ('gauge', [f"{prefix}run_elapsed_seconds {snapshot['elapsed_seconds']:.3f}"])
+        lines = []
+        for name, (kind, samples) in families.items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    # Function to save the run as <name>.json and <name>.prom in a directory; returns both paths
+    def write(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+        snapshot = self.snapshot()
+        json_path = os.path.join(directory, f"{name}.json")
+        prometheus_path = os.path.join(directory, f"{name}.prom")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=1)
+        with open(prometheus_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(snapshot))
+        return json_path, prometheus_path
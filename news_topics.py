@@ -0,0 +1,1274 @@
+import csv
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from crawl_frontier import CrawlFrontier, SECTION, ARTICLE
+from pipeline import StreamingPipeline, PipelineItem, map_stage
+from text_preprocessing import ensure_nltk_resources, get_pipeline, count_words
+
+# Core of the NYT topics modeler: scraping, API fetching and TF-IDF analysis,
+# usable from the Streamlit app, the command line (cli.py) or any other script.
+#
+# Importing this module has no side effects: shared resources are created on
+# first use by the get_* accessors, and heavy dependencies are imported inside
+# the functions that need them. Progress and problems go through a Reporter,
+# so the same code drives Streamlit widgets or log output.
+
+logger = logging.getLogger(__name__)
+
+# Define constants for web scraping and API
+NYT_BASE_URL = os.environ.get('NYT_TOPICS_BASE_URL', 'https://www.nytimes.com').rstrip('/')  # Site crawled (html_extraction reads the same variable)
+NYT_URL = NYT_BASE_URL + '/'
+ROBOTS_URL = NYT_BASE_URL + '/robots.txt'
+NYT_API_ENDPOINT = os.environ.get('NYT_TOPICS_API_ENDPOINT')  # Article Search API URL; None = the public endpoint
+NYT_API_KEY = os.environ.get('NYT_API_KEY', 'tTO8EfnrGsUovwLNDCUY0rQyNuDoNFnA')  # Replace with your actual NYT API key
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive'
+}
+TARGET_ARTICLES_TO_SAVE = 100
+URL_COLLECTION_MARGIN = 100  # Extra article links collected beyond the number of articles wanted
+URL_COLLECTION_TARGET = TARGET_ARTICLES_TO_SAVE + URL_COLLECTION_MARGIN
+MAX_SECTIONS_TO_PROCESS = 25
+TOKENIZER_MODE = 'nltk'  # 'nltk' matches word_tokenize exactly, 'regex' is much faster
+PARALLEL_WORKERS = 1  # 1 = serial; >1 = size of the process pool; 0 = one worker per CPU core
+PARALLEL_CHUNK_SIZE = 16  # Items sent to a worker per IPC round trip
+FETCH_WORKERS = 8  # Requests kept in flight by the fetcher
+RATE_LIMIT_PER_HOST = 2.0  # Requests per second to any one host
+MAX_CONCURRENT_PER_HOST = 4  # Simultaneous connections to any one host
+DATA_DIR = os.environ.get(
+    'NYT_TOPICS_DATA_DIR', os.path.join(os.path.expanduser('~'), '.nyt_topics_modeler')
+)  # Persists across runs
+HTTP_CACHE_DIR = os.path.join(DATA_DIR, 'http_cache')
+HTTP_CACHE_TTL = 3600  # Seconds before a cached response is revalidated
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Compressed bodies kept on disk before LRU eviction
+CORPUS_STATS_PATH = os.path.join(DATA_DIR, 'corpus_stats.sqlite')  # Accumulated document frequencies
+ARTICLE_STORE_DIR = os.path.join(DATA_DIR, 'articles')  # Append-only article log and token cache
+PIPELINE_QUEUE_SIZE = 16  # Items buffered between streaming pipeline stages
+ROBOTS_CACHE_PATH = os.path.join(DATA_DIR, 'robots.txt')
+ROBOTS_TTL = 24 * 3600  # Seconds before robots.txt is fetched again
+API_RATE_PER_MINUTE = 5  # Article Search API quota (requests per minute)
+API_BURST = 5  # Requests that may be sent back-to-back before the rate limit applies
+API_PREFETCH_PAGES = 2  # Pages requested ahead of the one being processed
+API_QUERY = 'news'
+MIN_CONTENT_WORDS = 20  # Minimum number of words for an API document to be kept
+CRAWL_FRONTIER_PATH = os.path.join(DATA_DIR, 'crawl_frontier.sqlite')  # Crawl queue and URL states
+CRAWL_TIME_BUDGET_SECONDS = 0  # Stop a crawl slice after this many seconds and resume on the next run; 0 = no limit
+TOP_TERMS_PER_ARTICLE = 4
+CSV_COLUMNS = ('Article Data', 'Article URL', 'Most Probable Topic')
+RESULT_COLUMNS = CSV_COLUMNS + ('Corpus Topic', 'Top Terms')  # Every column results can be exported with
+EXPORT_FORMATS = ('csv', 'parquet')  # Parquet needs pyarrow
+EXPORT_TEXT_CHARS = None  # Characters of article text kept per exported row; None = the full text
+EXPORT_CHUNK_ROWS = 1000  # Rows converted per chunk (one Parquet row group)
+EXPORT_DIR = os.path.join(DATA_DIR, 'exports')  # Where the app writes downloadable exports
+TOPIC_MODEL = 'lda'  # Corpus-level topic model: 'lda', 'nmf', or None to label articles by TF-IDF only
+TOPIC_MODEL_TOPICS = 10
+TOPIC_MODEL_TERMS = 8  # Top terms listed per corpus topic
+TOPIC_MODEL_PATH = os.path.join(DATA_DIR, 'topic_model.npz')  # Updated with every analyzed batch
+TOPIC_MODEL_KEYS_PATH = os.path.join(DATA_DIR, 'topic_model_keys.sqlite')  # URLs the topic model was trained on
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Estimated Jaccard similarity of word shingles above which an article is skipped; None = keep all
+NEAR_DUPLICATE_PATH = os.path.join(DATA_DIR, 'near_duplicates.sqlite')  # MinHash signatures and LSH buckets
+SIMILARITY_INDEX_DIR = os.path.join(DATA_DIR, 'similarity_index')  # TF-IDF vectors and inverted index for related articles
+RELATED_ARTICLES = 5  # Related articles returned per query
+OUT_OF_CORE_MEMORY_LIMIT_MB = 512  # Peak RSS the out-of-core analysis sizes its chunks for
+OUT_OF_CORE_FEATURES = 2 ** 20  # Hashing-trick buckets for out-of-core document frequencies (8 bytes each, memory-mapped)
+OUT_OF_CORE_BYTES_PER_STORED_BYTE = 32  # Peak working memory per byte of stored article while its chunk is processed
+OUT_OF_CORE_CSV_PATH = os.path.join(DATA_DIR, 'article_store_topics.csv')  # Where the app writes whole-store results
+METRICS_SAMPLE_RATE = 1.0  # Fraction of stage events timed (all are counted); 0 = instrumentation off
+METRICS_DIR = os.path.join(DATA_DIR, 'metrics')  # One JSON and one Prometheus text file per run
+SKIPPED_EXAMPLES = 3  # Example URLs listed per reason when skipped articles are reported
+RENDER_FALLBACK = False  # Render pages without a static article body in headless Chromium (needs Playwright)
+RENDER_POOL_SIZE = 2  # Long-lived browser contexts, i.e. pages rendered at once
+RENDER_TIMEOUT_SECONDS = 20  # Per-page limit for loading and waiting for the article body
+TERM_TRENDS_PATH = os.path.join(DATA_DIR, 'term_trends.sqlite')  # Per-day term and document frequencies by publication date
+TREND_WINDOW_DAYS = 7  # Days compared with the same number of days before when finding trending terms
+TRENDING_TERMS = 20
+TREND_MIN_DOCUMENTS = 3  # Articles in the window a term must appear in to count as trending
+TREND_CHART_DAYS = 60  # Days covered by a term trend series
+
+
+# Progress and message sink. The base class logs; the Streamlit app and the
+# CLI subclass it to render progress bars, status lines and messages.
+class Reporter:
+    def status(self, text):
+        logger.debug(text)
+
+    def progress(self, fraction):
+        pass
+
+    def info(self, message):
+        logger.info(message)
+
+    def success(self, message):
+        logger.info(message)
+
+    def caption(self, message):
+        logger.info(message)
+
+    def warning(self, message):
+        logger.warning(message)
+
+    def error(self, message):
+        logger.error(message)
+
+    def metric(self, label, value):
+        logger.info("%s: %s", label, value)
+
+    # Called by the streaming scrape for every article as soon as it is processed
+    def article(self, index, topic, url):
+        logger.info("%d. %s - %s", index, topic, url)
+
+
+_resources = {}
+_resources_lock = threading.RLock()
+
+
+# Function to create a shared resource on first use and return the same object afterwards
+def _shared(name, factory):
+    with _resources_lock:
+        resource = _resources.get(name)
+        if resource is None:
+            resource = _resources[name] = factory()
+        return resource
+
+
+# Persistent article store shared by scraping, API fetching and analysis
+def get_article_store():
+    from article_store import ArticleStore
+    return _shared('article_store', lambda: ArticleStore(ARTICLE_STORE_DIR))
+
+
+# robots.txt policy: fetched lazily, cached on disk for ROBOTS_TTL, rules compiled for our user agent
+def get_robots_policy():
+    from robots_policy import RobotsPolicy
+    return _shared('robots_policy', lambda: RobotsPolicy(
+        ROBOTS_URL, HEADERS['User-Agent'], ttl=ROBOTS_TTL, cache_path=ROBOTS_CACHE_PATH
+    ))
+
+
+# On-disk HTTP cache shared by page fetches and API calls
+def get_http_cache():
+    from http_cache import HttpCache
+    return _shared('http_cache', lambda: HttpCache(HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL, max_bytes=HTTP_CACHE_MAX_BYTES))
+
+
+# Document frequencies accumulated across runs, keyed by article URL
+def get_corpus_stats():
+    from corpus_stats import CorpusStats
+    return _shared('corpus_stats', lambda: CorpusStats(CORPUS_STATS_PATH))
+
+
+# Persistent crawl frontier: pending, fetched and failed URLs survive reruns and crashes
+def get_crawl_frontier():
+    return _shared('crawl_frontier', lambda: CrawlFrontier(CRAWL_FRONTIER_PATH))
+
+
+# Timers and counters of the current run, shared by every stage and the fetcher
+def get_metrics():
+    from metrics import RunMetrics
+    return _shared('metrics', lambda: RunMetrics(METRICS_SAMPLE_RATE))
+
+
+# Shared fetcher: pooled keep-alive connections, per-host rate limit and concurrency cap
+def get_fetcher():
+    from fetcher import Fetcher
+    return _shared('fetcher', lambda: Fetcher(
+        headers=HEADERS,
+        cache=get_http_cache(),
+        metrics=get_metrics(),
+        is_allowed=is_crawl_allowed,
+        max_workers=FETCH_WORKERS,
+        rate_per_host=RATE_LIMIT_PER_HOST,
+        concurrency_per_host=MAX_CONCURRENT_PER_HOST,
+    ))
+
+
+# Corpus topic model, loaded from TOPIC_MODEL_PATH when a model of the configured kind was saved;
+# otherwise a new model starts and the keys recorded for the old one are cleared
+def get_topic_modeler():
+    from topic_models import TopicModeler
+
+    def load():
+        if os.path.exists(TOPIC_MODEL_PATH):
+            try:
+                modeler = TopicModeler.load(TOPIC_MODEL_PATH, keys_path=TOPIC_MODEL_KEYS_PATH)
+                if modeler.method == TOPIC_MODEL and modeler.n_topics == TOPIC_MODEL_TOPICS:
+                    return modeler
+                modeler.trained_keys.close()
+            except Exception as e:
+                logger.warning("Ignoring unreadable topic model %s: %s", TOPIC_MODEL_PATH, e)
+        modeler = TopicModeler(TOPIC_MODEL, TOPIC_MODEL_TOPICS, keys_path=TOPIC_MODEL_KEYS_PATH)
+        modeler.trained_keys.clear()
+        return modeler
+    return _shared('topic_modeler', load)
+
+
+_topic_model_lock = threading.Lock()
+
+
+# MinHash/LSH index of every article text kept so far, used to skip near-duplicates
+def get_duplicate_detector():
+    from dedup import NearDuplicateDetector
+    return _shared('duplicate_detector', lambda: NearDuplicateDetector(NEAR_DUPLICATE_PATH, threshold=NEAR_DUPLICATE_THRESHOLD))
+
+
+# Related-article index over the normalized TF-IDF vectors of every analyzed article
+def get_similarity_index():
+    from similarity_index import SimilarityIndex
+    return _shared('similarity_index', lambda: SimilarityIndex(SIMILARITY_INDEX_DIR))
+
+
+# Headless browser pool for pages that only have an article body once their scripts ran; it
+# shares the fetcher's per-host rate limit and the robots.txt policy
+def get_render_pool():
+    from renderer import RenderPool
+    return _shared('render_pool', lambda: RenderPool(
+        pool_size=RENDER_POOL_SIZE,
+        timeout=RENDER_TIMEOUT_SECONDS,
+        is_allowed=is_crawl_allowed,
+        user_agent=HEADERS['User-Agent'],
+        limiter=get_fetcher().limiter,
+        metrics=get_metrics(),
+    ))
+
+
+# Per-day term aggregates of every analyzed article with a known publication date
+def get_term_trends():
+    from term_trends import TermTrends
+    return _shared('term_trends', lambda: TermTrends(TERM_TRENDS_PATH))
+
+
+# Function to release the shared resources (open connections, thread pools, browsers, databases)
+def close_resources():
+    with _resources_lock:
+        for name in ('render_pool', 'fetcher', 'crawl_frontier', 'corpus_stats', 'term_trends', 'http_cache',
+                     'duplicate_detector', 'topic_modeler'):
+            resource = _resources.pop(name, None)
+            if resource is not None and hasattr(resource, 'close'):
+                resource.close()
+        _resources.clear()
+
+
+# Function to clear the metrics before a run (picking up a changed METRICS_SAMPLE_RATE)
+def reset_run_metrics():
+    get_metrics().reset(METRICS_SAMPLE_RATE)
+
+
+# Function to save the metrics of the run as <kind>-<time>.json and .prom in METRICS_DIR.
+# Returns the snapshot and the two paths, or None when instrumentation is off.
+def save_run_metrics(kind):
+    metrics = get_metrics()
+    if not metrics.enabled:
+        return None
+    snapshot = metrics.snapshot()
+    name = f"{kind}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(snapshot['started_at']))}"
+    json_path, prometheus_path = metrics.write(METRICS_DIR, name)
+    return snapshot, json_path, prometheus_path
+
+
+# Function to record a URL skipped for a reason, for one aggregated message per run
+def note_skipped(skipped, reason, url, error=None):
+    count, examples = skipped.get(reason, (0, []))
+    if len(examples) < SKIPPED_EXAMPLES:
+        examples.append(f"{url} ({error})" if error is not None else url)
+    skipped[reason] = (count + 1, examples)
+    get_metrics().count('skipped', reason=reason)
+
+
+# Function to report the URLs skipped during a run as counts per reason, with a few examples
+def report_skipped(reporter, skipped, noun='articles'):
+    if not skipped:
+        return
+    total = sum(count for count, examples in skipped.values())
+    reasons = ", ".join(f"{count} {reason}" for reason, (count, examples) in skipped.items())
+    examples = "; ".join(example for count, examples in skipped.values() for example in examples)
+    reporter.warning(f"Skipped {total} {noun}: {reasons}. For example: {examples}.")
+
+
+# Function to check if URL is crawlable; denials are collected for one summary per run
+def is_crawl_allowed(url):
+    return get_robots_policy().allows(url)
+
+
+# Function to make sure the NLTK data for the configured tokenizer is installed
+def prepare_preprocessing(reporter):
+    missing = ensure_nltk_resources(TOKENIZER_MODE)
+    if missing:
+        reporter.error(f"Failed to download NLTK resources: {', '.join(missing)}")
+    return not missing
+
+
+# Preprocessing and TF-IDF functions
+def preprocess_document(document):
+    return get_pipeline(TOKENIZER_MODE)(document)
+
+
+def evaluate_term_frequency(document):
+    term_frequency = {}
+    processed_document = preprocess_document(document)
+    for word in processed_document:
+        term_frequency[word] = term_frequency.get(word, 0) + 1
+    doc_length = len(processed_document)
+    if doc_length == 0:
+        return {}
+    for word in term_frequency:
+        term_frequency[word] /= doc_length
+    return term_frequency
+
+
+def evaluate_inverse_document_frequency(documents_list):
+    import math
+
+    inverse_document_frequency = {}
+    total_documents = len(documents_list)
+    if total_documents == 0:
+        return {}
+    all_words_in_docs = {}
+    for document_content in documents_list:
+        processed_doc = preprocess_document(document_content)
+        unique_words_in_doc = set(processed_doc)
+        for word in unique_words_in_doc:
+            all_words_in_docs[word] = all_words_in_docs.get(word, 0) + 1
+    for word, count in all_words_in_docs.items():
+        inverse_document_frequency[word] = math.log(total_documents / (1 + count))
+    return inverse_document_frequency
+
+
+def evaluate_tf_idf(documents_list):
+    from tfidf_engine import build_document_term_matrix, compute_tf_idf, score_maps
+
+    if not documents_list:
+        return []
+    # Tokenize each document once and score the whole batch on the sparse matrix
+    matrix = build_document_term_matrix([preprocess_document(doc) for doc in documents_list])
+    return score_maps(matrix, compute_tf_idf(matrix))
+
+
+# Function to resume an unfinished crawl, or start a new one from the homepage.
+# Returns True when pending work from an earlier run was picked up.
+def prepare_crawl_frontier(resume=True):
+    crawl_frontier = get_crawl_frontier()
+    crawl_frontier.resume()
+    if resume and crawl_frontier.has_pending():
+        return True
+    crawl_frontier.start_new_crawl()
+    crawl_frontier.add(NYT_URL, SECTION)
+    return False
+
+
+# Function to compute when the current crawl slice has to stop, or None without a time budget
+def crawl_deadline():
+    return time.monotonic() + CRAWL_TIME_BUDGET_SECONDS if CRAWL_TIME_BUDGET_SECONDS else None
+
+
+def past_deadline(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _is_permanent_fetch_error(error):
+    from fetcher import CrawlNotAllowed
+    return isinstance(error, CrawlNotAllowed)
+
+
+# Function to normalize discovered links and keep the crawlable ones, in order and without repeats
+def allowed_unique_urls(urls):
+    from dedup import normalize_url
+    return [url for url in dict.fromkeys(normalize_url(url) for url in urls) if is_crawl_allowed(url)]
+
+
+# Function to raise NearDuplicateArticle when the text nearly matches an article kept under another URL.
+# Texts that pass are indexed, so later copies of them are caught too. Safe to call from worker threads.
+def check_near_duplicate(url, text):
+    from dedup import NearDuplicateArticle
+
+    if NEAR_DUPLICATE_THRESHOLD is None:
+        return
+    metrics = get_metrics()
+    with metrics.timer('dedup'):
+        match = get_duplicate_detector().check(url, text)
+    if match is not None:
+        metrics.count('near_duplicates')
+        raise NearDuplicateArticle(url, *match)
+
+
+# Function to take articles that passed check_near_duplicate in this run but could not be saved out
+# of the index again, so a retry (or another copy of the story) is not skipped as a duplicate of nothing
+def forget_near_duplicates(urls):
+    if NEAR_DUPLICATE_THRESHOLD is not None:
+        get_duplicate_detector().remove(urls)
+
+
+# Function to reset the per-run duplicate counters
+def reset_duplicate_stats():
+    get_crawl_frontier().reset_stats()
+    if NEAR_DUPLICATE_THRESHOLD is not None:
+        get_duplicate_detector().reset_stats()
+
+
+# Function to save the near-duplicate index and report the links and articles skipped during this run
+def report_duplicates(reporter, skipped_urls=0):
+    skipped_urls += get_crawl_frontier().known_skipped
+    if skipped_urls:
+        reporter.caption(f"Skipped {skipped_urls} links already queued or fetched (after URL normalization).")
+    if NEAR_DUPLICATE_THRESHOLD is None:
+        return
+    detector = get_duplicate_detector()
+    detector.checkpoint()
+    count, examples = detector.duplicate_summary()
+    if count:
+        listed = "; ".join(f"{url} ({similarity:.0%} similar to {original})" for url, original, similarity in examples)
+        more = f" and {count - len(examples)} more" if count > len(examples) else ""
+        reporter.warning(f"Skipped {count} near-duplicate articles: {listed}{more}.")
+
+
+# Function to record a fetched section page in the frontier and queue the allowed links on it.
+# Returns the error that made the page fail, or None. Safe to call from worker threads.
+def record_section_page(section_url, page_text, error):
+    from html_extraction import extract_links
+
+    crawl_frontier = get_crawl_frontier()
+    if error is None:
+        try:
+            with get_metrics().timer('parse'):
+                article_urls, section_urls = extract_links(page_text)
+            crawl_frontier.add_many(allowed_unique_urls(article_urls), ARTICLE)
+            crawl_frontier.add_many(allowed_unique_urls(section_urls), SECTION)
+            crawl_frontier.mark_fetched(section_url)
+            return None
+        except Exception as e:
+            error = e
+    crawl_frontier.mark_failed(section_url, permanent=_is_permanent_fetch_error(error))
+    return error
+
+
+# Function to render the pages whose static extraction came back empty and extract them again.
+# Fills in `contents` in place; returns the render errors by position.
+def render_empty_pages(links, contents):
+    from parallel import extract_article_texts
+
+    metrics = get_metrics()
+    empty = [i for i, content in enumerate(contents) if not content]
+    render_errors = {}
+    rendered = []
+    rendered_pages = []
+    for i, (link, page, error) in zip(empty, get_render_pool().render_many(links[i] for i in empty)):
+        if error is not None:
+            render_errors[i] = error
+        else:
+            rendered.append(i)
+            rendered_pages.append(page)
+    with metrics.timer('extract', items=len(rendered_pages), source='rendered'):
+        texts = extract_article_texts(rendered_pages, PARALLEL_WORKERS, PARALLEL_CHUNK_SIZE)
+    for i, text in zip(rendered, texts):
+        contents[i] = text
+    metrics.count('render_recovered', sum(1 for text in texts if text))
+    return render_errors
+
+
+# Main web scraping function
+def scrape_nyt(reporter=None, resume=True, target_articles=TARGET_ARTICLES_TO_SAVE, render_fallback=None):
+    from dedup import NearDuplicateArticle
+    from parallel import extract_article_texts
+    from renderer import RendererUnavailable
+
+    reporter = reporter or Reporter()
+    render_fallback = RENDER_FALLBACK if render_fallback is None else render_fallback
+    crawl_frontier = get_crawl_frontier()
+    fetcher = get_fetcher()
+    article_store = get_article_store()
+    metrics = get_metrics()
+    saved_article_urls = []
+    saved_articles_count = 0
+    skipped = {}
+
+    reporter.progress(0)
+    reset_duplicate_stats()
+    if prepare_crawl_frontier(resume):
+        reporter.status(
+            f"Resuming crawl: {crawl_frontier.pending_count(SECTION)} sections and "
+            f"{crawl_frontier.pending_count(ARTICLE)} articles pending."
+        )
+    else:
+        reporter.status("Starting article link collection...")
+    deadline = crawl_deadline()
+
+    # Visit pending sections (the homepage first) in batches until enough article links are queued.
+    # A batch is only taken once the previous one has been parsed, so the sections found on the
+    # homepage are visited in the next batch. Returns the number of article links queued.
+    sections_processed_count = 0
+
+    def collect_article_links():
+        nonlocal sections_processed_count
+        url_collection_target = target_articles - saved_articles_count + URL_COLLECTION_MARGIN
+        while (crawl_frontier.pending_count(ARTICLE) < url_collection_target
+               and sections_processed_count < MAX_SECTIONS_TO_PROCESS and not past_deadline(deadline)):
+            section_links = crawl_frontier.pop_many(
+                SECTION, min(FETCH_WORKERS, MAX_SECTIONS_TO_PROCESS - sections_processed_count)
+            )
+            if not section_links:
+                break
+            for section_link, section_page_text, error in fetcher.fetch_many(section_links):
+                sections_processed_count += 1
+                reporter.status(f"Processing section {sections_processed_count}/{MAX_SECTIONS_TO_PROCESS}: {section_link}")
+                reporter.progress(min(crawl_frontier.pending_count(ARTICLE) / url_collection_target, 1.0))
+                error = record_section_page(section_link, section_page_text, error)
+                if error is not None:
+                    note_skipped(skipped, 'section pages failed', section_link, error)
+            crawl_frontier.checkpoint()
+        return crawl_frontier.pending_count(ARTICLE)
+
+    total_candidates = collect_article_links()
+    reporter.status(f"{total_candidates} article links queued.")
+
+    articles_processed_count = 0
+    while saved_articles_count < target_articles and not past_deadline(deadline):
+        if not crawl_frontier.pending_count(ARTICLE):
+            # The queued links ran out before enough articles were saved: visit more sections
+            found = collect_article_links()
+            if not found:
+                break
+            total_candidates = articles_processed_count + found
+            reporter.status(f"{found} more article links queued.")
+        # Fetch only as many pages as are still needed, then extract them as one batch
+        batch_links = crawl_frontier.pop_many(ARTICLE, target_articles - saved_articles_count)
+        fetched_links = []
+        fetched_pages = []
+        for link, article_page_text, error in fetcher.fetch_many(batch_links):
+            articles_processed_count += 1
+            reporter.status(f"Scraping article {articles_processed_count}/{total_candidates}: {link}")
+            reporter.progress(min(articles_processed_count / max(total_candidates, 1), 1.0))
+            if error is not None:
+                note_skipped(skipped, 'failed to fetch', link, error)
+                crawl_frontier.mark_failed(link, permanent=_is_permanent_fetch_error(error))
+                continue
+            fetched_pages.append(article_page_text)
+            fetched_links.append(link)
+
+        try:
+            with metrics.timer('extract', items=len(fetched_pages)):
+                contents = extract_article_texts(fetched_pages, PARALLEL_WORKERS, PARALLEL_CHUNK_SIZE)
+        except Exception as e:
+            reporter.warning(f"Failed to extract article batch: {str(e)}")
+            for link in fetched_links:
+                crawl_frontier.mark_failed(link)
+            continue
+
+        # Pages that only get an article body from their scripts are rendered in a browser
+        render_errors = {}
+        if render_fallback and not all(contents):
+            contents = list(contents)
+            try:
+                render_errors = render_empty_pages(fetched_links, contents)
+            except RendererUnavailable as e:
+                reporter.warning(f"Rendering fallback disabled for this run: {str(e)}")
+                render_fallback = False
+
+        for i, (link, content) in enumerate(zip(fetched_links, contents)):
+            if not content:
+                note_skipped(skipped, 'without content', link, render_errors.get(i))
+                # A failed render (e.g. a timeout) may succeed on a later run
+                crawl_frontier.mark_failed(link, permanent=i not in render_errors)
+                continue
+            try:
+                check_near_duplicate(link, content)
+            except NearDuplicateArticle:
+                # Fetched, but not kept: the story is already in the store under another URL
+                crawl_frontier.mark_fetched(link)
+                continue
+            try:
+                with metrics.timer('store'):
+                    article_store.append(link, content, 'scrape')
+                crawl_frontier.mark_fetched(link)
+                saved_article_urls.append(link)
+                saved_articles_count += 1
+                metrics.count('articles_saved')
+            except Exception as e:
+                note_skipped(skipped, 'failed to save', link, e)
+                forget_near_duplicates([link])
+                crawl_frontier.mark_failed(link)
+        crawl_frontier.checkpoint()
+
+    if past_deadline(deadline):
+        reporter.info(f"Crawl time budget of {CRAWL_TIME_BUDGET_SECONDS}s reached; run again to continue where this run stopped.")
+    report_skipped(reporter, skipped, 'URLs')
+    report_duplicates(reporter)
+    reporter.status(f"Saved {saved_articles_count} articles.")
+    reporter.progress(1.0)
+    return saved_article_urls
+
+
+# Streaming scrape pipeline: discover -> fetch -> extract -> preprocess -> update statistics.
+# Stages run in worker threads and must not report; results are reported by the
+# consumer in stream_scrape_nyt.
+def discover_article_urls(stop_event, deadline=None):
+    crawl_frontier = get_crawl_frontier()
+    fetcher = get_fetcher()
+    sections_processed = 0
+    while not stop_event.is_set() and not past_deadline(deadline):
+        url = crawl_frontier.pop(ARTICLE)
+        if url is not None:
+            yield PipelineItem(url)
+            continue
+        # No queued articles left: visit the next batch of pending sections to find more
+        if sections_processed >= MAX_SECTIONS_TO_PROCESS:
+            return
+        section_urls = crawl_frontier.pop_many(SECTION, min(FETCH_WORKERS, MAX_SECTIONS_TO_PROCESS - sections_processed))
+        if not section_urls:
+            return
+        for section_url, section_page_text, error in fetcher.fetch_many(section_urls, should_stop=stop_event.is_set):
+            sections_processed += 1
+            record_section_page(section_url, section_page_text, error)
+        crawl_frontier.checkpoint()
+
+
+def fetch_stage(items, stop_event):
+    pending_items = {}
+
+    def urls():
+        for item in items:
+            pending_items[item.url] = item
+            yield item.url
+
+    for url, page_text, error in get_fetcher().fetch_many(urls(), should_stop=stop_event.is_set):
+        item = pending_items.pop(url)
+        item.html = page_text
+        if error is not None:
+            item.error = error
+            item.failed_stage = 'fetch'
+        yield item
+
+
+def extract_stage(item):
+    from html_extraction import extract_article_text
+
+    with get_metrics().timer('extract'):
+        item.text = extract_article_text(item.html)
+    item.html = None
+    if not item.text:
+        raise ValueError("No content extracted")
+    # Checked before preprocessing, so duplicates are never tokenized or counted
+    check_near_duplicate(item.url, item.text)
+
+
+def preprocess_stage(item):
+    with get_metrics().timer('preprocess'):
+        item.tokens = preprocess_document(item.text)
+
+
+def update_statistics_stage(item):
+    from term_trends import publication_day
+    from tfidf_engine import build_document_term_matrix, compute_idf, compute_tf_idf, top_k_terms
+
+    article_store = get_article_store()
+    corpus_stats = get_corpus_stats()
+    metrics = get_metrics()
+    with metrics.timer('store'):
+        article_store.append(item.url, item.text, 'scrape')
+        article_store.put_tokens([item.url], [item.text], [item.tokens], TOKENIZER_MODE)
+        get_crawl_frontier().mark_fetched(item.url)
+        corpus_stats.add_documents([item.url], [item.tokens])
+    with metrics.timer('term_trends'):
+        get_term_trends().add_documents([item.url], [publication_day(item.url)], [item.tokens])
+    # Provisional topic against the statistics accumulated so far
+    with metrics.timer('tfidf'):
+        matrix = build_document_term_matrix([item.tokens])
+        idf = compute_idf(corpus_stats.document_frequencies(matrix.terms), corpus_stats.document_count())
+        scores = compute_tf_idf(matrix, idf)
+        item.result = top_k_terms(matrix, scores, k=TOP_TERMS_PER_ARTICLE)[0]
+    with metrics.timer('similarity_index'):
+        get_similarity_index().add_matrix([item.url], matrix, scores)
+    item.text = None
+    item.tokens = None
+
+
+# Function to build the update stage of a streaming scrape that commits at most target_articles
+# articles. Items behind the last one are not taken from the queue, so nothing past the target is
+# stored, marked fetched or counted; those URLs stay pending in the frontier for the next run.
+def update_stage_until(target_articles):
+    update = map_stage(update_statistics_stage, 'update')
+    saved = 0
+
+    def admitted(items):
+        for item in items:
+            if saved >= target_articles:
+                return
+            yield item
+
+    def transform(items, stop_event):
+        nonlocal saved
+        for item in update(admitted(items), stop_event):
+            if item.error is None:
+                saved += 1
+            yield item
+    transform.__name__ = 'update'
+    return transform
+
+
+def stream_scrape_nyt(reporter=None, resume=True, target_articles=TARGET_ARTICLES_TO_SAVE):
+    from dedup import NearDuplicateArticle
+
+    reporter = reporter or Reporter()
+    crawl_frontier = get_crawl_frontier()
+    saved_article_urls = []
+    skipped = {}
+    reporter.progress(0)
+    if not prepare_preprocessing(reporter):
+        return saved_article_urls
+    reset_duplicate_stats()
+    if prepare_crawl_frontier(resume):
+        reporter.status(f"Resuming streaming scrape: {crawl_frontier.pending_count(ARTICLE)} articles pending...")
+    else:
+        reporter.status("Starting streaming scrape...")
+    deadline = crawl_deadline()
+    # URLs whose text passed the near-duplicate check but is not saved yet; whatever is left when
+    # the pipeline stops (items dropped in flight) is taken out of the duplicate index again.
+    # The extract thread may outlive stop(), so once stopping it forgets its items itself.
+    unsaved_urls = set()
+    unsaved_lock = threading.Lock()
+    stopping = False
+
+    def extract_and_track(item):
+        extract_stage(item)
+        with unsaved_lock:
+            if not stopping:
+                unsaved_urls.add(item.url)
+                return
+        forget_near_duplicates([item.url])
+
+    def mark_resolved(url):
+        with unsaved_lock:
+            unsaved_urls.discard(url)
+
+    pipeline = StreamingPipeline(
+        lambda stop_event: discover_article_urls(stop_event, deadline),
+        [
+            fetch_stage,
+            map_stage(extract_and_track, 'extract'),
+            map_stage(preprocess_stage, 'preprocess'),
+            update_stage_until(target_articles),
+        ],
+        queue_size=PIPELINE_QUEUE_SIZE,
+    )
+    started_at = time.perf_counter()
+    try:
+        for item in pipeline:
+            if isinstance(item.error, NearDuplicateArticle):
+                crawl_frontier.mark_fetched(item.url)
+                continue
+            if item.error is not None:
+                note_skipped(skipped, f"failed to {item.failed_stage}", item.url, item.error)
+                if item.failed_stage in ('preprocess', 'update'):
+                    # The text passed the duplicate check in the extract stage but was not saved
+                    forget_near_duplicates([item.url])
+                    mark_resolved(item.url)
+                # Fetch errors are retried on a later run; pages without content never will be
+                crawl_frontier.mark_failed(
+                    item.url, permanent=item.failed_stage == 'extract' or _is_permanent_fetch_error(item.error)
+                )
+                continue
+            if not saved_article_urls:
+                reporter.metric("Time to First Result", f"{time.perf_counter() - started_at:.2f}s")
+            saved_article_urls.append(item.url)
+            mark_resolved(item.url)
+            get_metrics().count('articles_saved')
+            topic = " ".join(word for word, score in item.result).title()
+            reporter.article(len(saved_article_urls), topic, item.url)
+            reporter.progress(min(len(saved_article_urls) / target_articles, 1.0))
+            reporter.status(f"Saved {len(saved_article_urls)}/{target_articles} articles...")
+            if len(saved_article_urls) >= target_articles:
+                break
+    except Exception as e:
+        reporter.error(f"Streaming scrape failed: {str(e)}")
+    finally:
+        pipeline.stop()
+        with unsaved_lock:
+            stopping = True
+            dropped_urls = list(unsaved_urls)
+        forget_near_duplicates(dropped_urls)
+        crawl_frontier.checkpoint()
+        get_similarity_index().save()
+
+    if past_deadline(deadline):
+        reporter.info(f"Crawl time budget of {CRAWL_TIME_BUDGET_SECONDS}s reached; run again to continue where this run stopped.")
+    report_skipped(reporter, skipped)
+    report_duplicates(reporter)
+    reporter.status(f"Saved {len(saved_article_urls)} articles in {time.perf_counter() - started_at:.1f}s.")
+    reporter.progress(1.0)
+    return saved_article_urls
+
+
+# Updated API-based article fetching function
+def fetch_articles_from_api(num_articles, reporter=None, query=API_QUERY):
+    import requests
+    from dedup import NearDuplicateArticle, normalize_url
+    from nyt_api import API_ENDPOINT, ArticleSearchClient
+
+    reporter = reporter or Reporter()
+    articles = []
+    article_urls = set()
+    skipped_short = 0
+    skipped_urls = 0
+
+    reporter.progress(0)
+    reporter.status("Starting API article fetching...")
+    reset_duplicate_stats()
+
+    client = ArticleSearchClient(
+        get_fetcher(),
+        NYT_API_KEY,
+        endpoint=NYT_API_ENDPOINT or API_ENDPOINT,
+        rate_per_minute=API_RATE_PER_MINUTE,
+        burst=API_BURST,
+        prefetch=API_PREFETCH_PAGES,
+    )
+    try:
+        # Pages are prefetched within the rate budget; stop consuming once enough articles are valid
+        for doc in client.iter_documents(query):
+            # Combine multiple fields for richer content
+            headline = doc.get('headline', {}).get('main', '')
+            snippet = doc.get('snippet', '')
+            abstract = doc.get('abstract', '')
+            lead_paragraph = doc.get('lead_paragraph', '')
+            byline = doc.get('byline', {}).get('original', '')
+            # Combine fields in order, avoiding duplicates
+            content_parts = []
+            for part in [headline, snippet, abstract, lead_paragraph, byline]:
+                if part and part not in content_parts:
+                    content_parts.append(part)
+            content = ' '.join(content_parts).strip()
+            # Validate content length
+            if not content or count_words(content) < MIN_CONTENT_WORDS:
+                skipped_short += 1
+                continue
+            url = normalize_url(doc['web_url']) if doc.get('web_url') else doc.get('_id', '')
+            if not url:
+                # Without a URL or id the article could not be stored or told apart from others
+                get_metrics().count('skipped', reason='no URL')
+                continue
+            if url in article_urls:
+                skipped_urls += 1
+                continue
+            try:
+                check_near_duplicate(url, content)
+            except NearDuplicateArticle:
+                continue
+            article_urls.add(url)
+            articles.append({
+                'url': url,
+                'content': content,
+                'published': doc.get('pub_date'),
+            })
+            reporter.progress(min(len(articles) / num_articles, 1.0))
+            reporter.status(f"Fetched {len(articles)}/{num_articles} articles ({client.requests_made} API requests)...")
+            if len(articles) >= num_articles:
+                break
+    except requests.exceptions.HTTPError as e:
+        reporter.error(f"API request failed: {str(e)}")
+        if e.response is not None and e.response.status_code == 401:
+            reporter.error("Invalid API key. Please check the NYT_API_KEY setting.")
+        elif e.response is not None and e.response.status_code == 429:
+            reporter.error("API rate limit still exceeded after backing off. Please wait and try again.")
+    except Exception as e:
+        reporter.error(f"Unexpected error during API fetch: {str(e)}")
+    finally:
+        client.close()
+
+    metrics = get_metrics()
+    metrics.count('api_requests', client.requests_made)
+    metrics.count('api_throttled', client.throttled)
+    metrics.count('api_duplicate_documents', client.duplicates_skipped)
+    if skipped_short:
+        metrics.count('skipped', skipped_short, reason='too short')
+        reporter.warning(f"Skipped {skipped_short} articles with fewer than {MIN_CONTENT_WORDS} words of content.")
+    if client.throttled or client.duplicates_skipped:
+        reporter.caption(f"API: {client.throttled} rate-limited requests retried, {client.duplicates_skipped} duplicate documents skipped.")
+    report_duplicates(reporter, skipped_urls)
+
+    # Save articles to the store in a single append
+    articles = articles[:num_articles]
+    saved_article_urls = []
+    try:
+        with metrics.timer('store', items=len(articles)):
+            get_article_store().append_many(
+                (article['url'], article['content'], 'api', None, article['published']) for article in articles
+            )
+        saved_article_urls = [article['url'] for article in articles]
+        metrics.count('articles_saved', len(saved_article_urls))
+        reporter.success(f"Saved {len(saved_article_urls)} articles to the article store.")
+    except Exception as e:
+        reporter.warning(f"Failed to save API articles: {str(e)}")
+        forget_near_duplicates([article['url'] for article in articles])
+
+    reporter.status(f"Saved {len(saved_article_urls)} articles via API.")
+    reporter.progress(1.0)
+    return saved_article_urls
+
+
+# Function to compute a content hash of a corpus (URLs and texts, in order)
+def corpus_digest(urls, texts):
+    digest = hashlib.sha1()
+    for url, text in zip(urls, texts):
+        digest.update(url.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+# Function to load saved articles, tokenize them (reusing cached tokens) and fold them into the
+# corpus statistics. Returns a dict with urls, texts, token_lists, new_count, total_documents and
+# digest, or None when there is nothing to analyze.
+def prepare_corpus(article_urls, reporter=None):
+    from parallel import preprocess_documents
+    from term_trends import publication_day
+
+    reporter = reporter or Reporter()
+    if not article_urls:
+        reporter.error("No articles saved for TF-IDF analysis.")
+        return None
+
+    article_store = get_article_store()
+    corpus_stats = get_corpus_stats()
+    metrics = get_metrics()
+    documents_content_list = []
+    file_urls = []
+    publication_days = []
+    skipped = {}
+    with metrics.timer('load', items=len(article_urls)):
+        records = article_store.get_many(article_urls)
+    for url, record in zip(article_urls, records):
+        if record is None:
+            note_skipped(skipped, 'not in the article store', url)
+            continue
+        documents_content_list.append(record['text'].strip())
+        file_urls.append(url)
+        publication_days.append(publication_day(url, record.get('published')))
+    del records
+    report_skipped(reporter, skipped)
+
+    if not documents_content_list:
+        reporter.error("No content read for TF-IDF analysis.")
+        return None
+
+    # Reuse cached token lists and only preprocess articles not tokenized before
+    token_lists = article_store.get_tokens(file_urls, documents_content_list, TOKENIZER_MODE)
+    missing = [i for i, tokens in enumerate(token_lists) if tokens is None]
+    metrics.count('token_cache', len(token_lists) - len(missing), result='hit')
+    metrics.count('token_cache', len(missing), result='miss')
+    if missing:
+        if not prepare_preprocessing(reporter):
+            return None
+        missing_texts = [documents_content_list[i] for i in missing]
+        with metrics.timer('preprocess', items=len(missing)):
+            fresh_tokens = preprocess_documents(missing_texts, TOKENIZER_MODE, PARALLEL_WORKERS, PARALLEL_CHUNK_SIZE)
+        for i, tokens in zip(missing, fresh_tokens):
+            token_lists[i] = tokens
+        article_store.put_tokens([file_urls[i] for i in missing], missing_texts, fresh_tokens, TOKENIZER_MODE)
+
+    # Fold the batch into the persistent statistics; the IDF is computed over everything accumulated
+    with metrics.timer('corpus_stats', items=len(file_urls)):
+        is_new = corpus_stats.add_documents(file_urls, token_lists)
+    with metrics.timer('term_trends', items=len(file_urls)):
+        get_term_trends().add_documents(file_urls, publication_days, token_lists)
+    total_documents = corpus_stats.document_count()
+    reporter.caption(f"{sum(is_new)} of {len(is_new)} articles are new to the corpus; IDF is computed over {total_documents} articles.")
+    return {
+        'urls': file_urls,
+        'texts': documents_content_list,
+        'token_lists': token_lists,
+        'is_new': is_new,
+        'new_count': sum(is_new),
+        'total_documents': total_documents,
+        'digest': corpus_digest(file_urls, documents_content_list),
+    }
+
+
+# Function to score a prepared corpus with TF-IDF against the accumulated corpus statistics.
+# Returns one dict per article with its url, content, topic and top (term, score) pairs.
+def score_corpus(corpus):
+    from tfidf_engine import build_document_term_matrix, compute_idf, compute_tf_idf, top_k_terms
+
+    metrics = get_metrics()
+    with metrics.timer('tfidf', items=len(corpus['urls'])):
+        matrix = build_document_term_matrix(corpus['token_lists'])
+        idf = compute_idf(get_corpus_stats().document_frequencies(matrix.terms), corpus['total_documents'])
+        scores = compute_tf_idf(matrix, idf)
+        top_terms_per_doc = top_k_terms(matrix, scores, k=TOP_TERMS_PER_ARTICLE)
+
+    # Articles analyzed for the first time join the related-article index
+    similarity_index = get_similarity_index()
+    with metrics.timer('similarity_index', items=len(corpus['urls'])):
+        similarity_index.add_matrix(corpus['urls'], matrix, scores, keep=[url not in similarity_index for url in corpus['urls']])
+        similarity_index.save()
+
+    results = []
+    for url, content, sorted_terms in zip(corpus['urls'], corpus['texts'], top_terms_per_doc):
+        results.append({
+            'url': url,
+            'content': content,
+            'topic': " ".join(word for word, score in sorted_terms).title(),
+            'top_terms': [(word, float(score)) for word, score in sorted_terms],
+        })
+    if TOPIC_MODEL:
+        with metrics.timer('topic_model', items=len(results)):
+            add_corpus_topics(corpus, results)
+    return results
+
+
+# Function to update the corpus topic model with the batch's articles it was not trained on yet
+# and give every article its topic distribution and most probable corpus topic. Which articles
+# were trained on is kept with the model, not taken from is_new: the streaming scrape adds its
+# articles to the corpus statistics before they are ever analyzed here.
+def add_corpus_topics(corpus, results):
+    modeler = get_topic_modeler()
+    with _topic_model_lock:
+        modeler.partial_fit(corpus['token_lists'], keys=corpus['urls'])
+        if modeler.trained_keys.pending:
+            modeler.save(TOPIC_MODEL_PATH)
+        if not modeler.is_fitted or modeler.model.n_terms == 0:
+            return
+        distributions = modeler.transform(corpus['token_lists'])
+        topic_terms = modeler.topic_terms(TOPIC_MODEL_TERMS)
+    for result, distribution in zip(results, distributions):
+        best = int(distribution.argmax())
+        result['topic_distribution'] = [float(weight) for weight in distribution]
+        result['corpus_topic'] = best
+        result['corpus_topic_label'] = f"Topic {best + 1}: " + ", ".join(term for term, weight in topic_terms[best])
+
+
+# Function to list the corpus topics as (label, [(term, weight)]) pairs, or [] before any fit
+def corpus_topics(k=TOPIC_MODEL_TERMS):
+    if not TOPIC_MODEL:
+        return []
+    modeler = get_topic_modeler()
+    with _topic_model_lock:
+        if not modeler.is_fitted or modeler.model.n_terms == 0:
+            return []
+        return [(f"Topic {i + 1}", terms) for i, terms in enumerate(modeler.topic_terms(k))]
+
+
+# Function to find the indexed articles most similar to an analyzed article, as (url, cosine) pairs
+def related_articles(url, k=RELATED_ARTICLES):
+    return get_similarity_index().similar_to(url, k)
+
+
+# Function to find the indexed articles most similar to free text, weighted with the corpus IDF
+def search_articles(text, k=RELATED_ARTICLES, reporter=None):
+    from collections import Counter
+    from tfidf_engine import compute_idf
+
+    reporter = reporter or Reporter()
+    if not prepare_preprocessing(reporter):
+        return []
+    counts = Counter(preprocess_document(text))
+    if not counts:
+        return []
+    terms = list(counts)
+    corpus_stats = get_corpus_stats()
+    idf = compute_idf(corpus_stats.document_frequencies(terms), corpus_stats.document_count())
+    total = sum(counts.values())
+    return get_similarity_index().query({term: counts[term] / total * weight for term, weight in zip(terms, idf)}, k)
+
+
+# Function to find the terms whose share of articles rose most in the window_days up to `end`
+# (a date or YYYY-MM-DD; default the latest publication day) against the window_days before.
+# Returns (end date, list of dicts), see TermTrends.trending.
+def trending_terms(end=None, window_days=TREND_WINDOW_DAYS, k=TRENDING_TERMS, min_documents=TREND_MIN_DOCUMENTS):
+    with get_metrics().timer('trend_query'):
+        return get_term_trends().trending(end, window_days, k, min_documents)
+
+
+# Function to get, for each of the `days` days up to `end`, the share of articles containing each
+# term over the preceding window_days. Returns (days, articles per window, {term: shares}).
+def term_trend_series(terms, end=None, days=TREND_CHART_DAYS, window_days=TREND_WINDOW_DAYS):
+    with get_metrics().timer('trend_query'):
+        return get_term_trends().rolling_shares(terms, end, days, window_days)
+
+
+# Function to score saved articles with TF-IDF against the accumulated corpus statistics
+def analyze_tf_idf(article_urls, reporter=None):
+    corpus = prepare_corpus(article_urls, reporter)
+    if corpus is None:
+        return []
+    return score_corpus(corpus)
+
+
+# Function to analyze articles in chunks that fit a peak-RSS bound, writing the CSV incrementally.
+# IDF is computed over the analyzed articles (hashed document frequencies, see out_of_core.py);
+# the corpus statistics and the topic model are not updated, the term trends are (so this also
+# backfills them for older articles). The CSV has the given columns (default CSV_COLUMNS).
+# Returns a summary dict, or None.
+def analyze_tf_idf_out_of_core(article_urls, file, reporter=None, memory_limit_mb=None, columns=None,
+                               max_text_chars=EXPORT_TEXT_CHARS):
+    from out_of_core import OutOfCoreTfIdf, current_rss
+    from parallel import preprocess_documents
+    from term_trends import publication_day
+
+    reporter = reporter or Reporter()
+    article_store = get_article_store()
+    metrics = get_metrics()
+    memory_limit = (memory_limit_mb or OUT_OF_CORE_MEMORY_LIMIT_MB) * 2 ** 20
+    engine = OutOfCoreTfIdf(DATA_DIR, OUT_OF_CORE_FEATURES)
+    chunk_bytes = (memory_limit - current_rss() - engine.df.nbytes) // OUT_OF_CORE_BYTES_PER_STORED_BYTE
+    if chunk_bytes < 64 * 1024:
+        reporter.warning(f"A memory limit of {memory_limit // 2 ** 20} MB leaves almost no room for documents; "
+                         "processing one small chunk at a time.")
+        chunk_bytes = 64 * 1024
+    chunks = []
+    peak_rss = current_rss()
+    preprocessing_ready = False
+    try:
+        # Pass 1: tokenize chunk by chunk, update the hashed document frequencies and spill term counts
+        reporter.status("Counting terms...")
+        for chunk_urls in article_store.iter_chunks(article_urls, chunk_bytes):
+            with metrics.timer('load', items=len(chunk_urls)):
+                records = article_store.get_many(chunk_urls)
+                texts = [record['text'].strip() for record in records]
+                publication_days = [publication_day(url, record.get('published'))
+                                    for url, record in zip(chunk_urls, records)]
+                del records
+                token_lists = article_store.get_tokens(chunk_urls, texts, TOKENIZER_MODE)
+            missing = [i for i, tokens in enumerate(token_lists) if tokens is None]
+            metrics.count('token_cache', len(token_lists) - len(missing), result='hit')
+            metrics.count('token_cache', len(missing), result='miss')
+            if missing:
+                if not preprocessing_ready and not prepare_preprocessing(reporter):
+                    return None
+                preprocessing_ready = True
+                missing_texts = [texts[i] for i in missing]
+                with metrics.timer('preprocess', items=len(missing)):
+                    fresh_tokens = preprocess_documents(missing_texts, TOKENIZER_MODE, PARALLEL_WORKERS, PARALLEL_CHUNK_SIZE)
+                for i, tokens in zip(missing, fresh_tokens):
+                    token_lists[i] = tokens
+                article_store.put_tokens([chunk_urls[i] for i in missing], missing_texts, fresh_tokens, TOKENIZER_MODE)
+                del missing_texts, fresh_tokens
+            del texts
+            with metrics.timer('tfidf', items=len(token_lists)):
+                engine.add_chunk(token_lists)
+            with metrics.timer('term_trends', items=len(token_lists)):
+                get_term_trends().add_documents(chunk_urls, publication_days, token_lists)
+            chunks.append(chunk_urls)
+            del token_lists
+            peak_rss = max(peak_rss, current_rss())
+            reporter.progress(0.5 * engine.n_docs / max(len(article_urls), 1))
+
+        if not engine.n_docs:
+            reporter.error("No content read for TF-IDF analysis.")
+            return None
+        if engine.n_docs < len(article_urls):
+            reporter.warning(f"{len(article_urls) - engine.n_docs} articles were not found in the article store and were skipped.")
+
+        # Pass 2: score each spilled chunk against the final IDF and append its rows to the CSV
+        reporter.status(f"Scoring {engine.n_docs} articles in {len(chunks)} chunks...")
+        writer = csv.writer(file, lineterminator='\n')
+        columns = columns or CSV_COLUMNS
+        writer.writerow(columns)
+        written = 0
+        top_terms_per_chunk = engine.iter_top_terms(TOP_TERMS_PER_ARTICLE)
+        for chunk_urls in chunks:
+            with metrics.timer('tfidf', items=len(chunk_urls)):
+                top_terms_per_doc = next(top_terms_per_chunk)
+            results = [
+                {'url': url, 'content': record['text'].strip(),
+                 'topic': " ".join(word for word, score in sorted_terms).title(), 'top_terms': sorted_terms}
+                for url, record, sorted_terms in zip(chunk_urls, article_store.get_many(chunk_urls), top_terms_per_doc)
+            ]
+            with metrics.timer('csv_export', items=len(results)):
+                writer.writerows(csv_rows(results, columns, max_text_chars))
+            written += len(results)
+            del results
+            peak_rss = max(peak_rss, current_rss())
+            reporter.progress(0.5 + 0.5 * written / engine.n_docs)
+    finally:
+        engine.close()
+
+    reporter.caption(f"Analyzed {written} articles in {len(chunks)} chunks; peak RSS {peak_rss / 2 ** 20:.0f} MB "
+                     f"(limit {memory_limit // 2 ** 20} MB), IDF over the analyzed articles.")
+    reporter.progress(1.0)
+    return {'documents': written, 'chunks': len(chunks), 'peak_rss': peak_rss, 'memory_limit': memory_limit}
+
+
+# Function to get the default export columns for a set of results; the corpus topic is added when modeled
+def csv_columns(results):
+    if results and 'corpus_topic_label' in results[0]:
+        return CSV_COLUMNS + ('Corpus Topic',)
+    return CSV_COLUMNS
+
+
+# Function to shorten text to at most max_chars characters (None or 0 = no limit)
+def truncate_text(text, max_chars=None):
+    if max_chars and len(text) > max_chars:
+        return text[:max_chars].rstrip() + '...'
+    return text
+
+
+# Function to get the value of one export column (see RESULT_COLUMNS) for an analysis result
+def result_value(result, column, max_text_chars=None):
+    if column == 'Article Data':
+        # Replace newlines to avoid CSV formatting issues
+        return truncate_text(result['content'], max_text_chars).replace('\n', ' ')
+    if column == 'Article URL':
+        return result['url']
+    if column == 'Most Probable Topic':
+        return result['topic']
+    if column == 'Corpus Topic':
+        return result.get('corpus_topic_label', '')
+    if column == 'Top Terms':
+        return ", ".join(f"{word} ({score:.4f})" for word, score in result.get('top_terms', ()))
+    raise ValueError(f"Unknown result column: {column}")
+
+
+# Function to turn analysis results into rows of the given columns (default: csv_columns)
+def csv_rows(results, columns=None, max_text_chars=EXPORT_TEXT_CHARS):
+    columns = columns or csv_columns(results)
+    for result in results:
+        yield tuple(result_value(result, column, max_text_chars) for column in columns)
+
+
+# Function to write analysis results as CSV to an open text file, row by row
+def write_results_csv(results, file, columns=None, max_text_chars=EXPORT_TEXT_CHARS):
+    columns = columns or csv_columns(results)
+    with get_metrics().timer('csv_export', items=len(results)):
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(columns)
+        writer.writerows(csv_rows(results, columns, max_text_chars))
+
+
+# Function to write analysis results as a Parquet file, converting EXPORT_CHUNK_ROWS rows at a
+# time into one row group, so the whole table is never held in memory. Needs pyarrow.
+def write_results_parquet(results, path, columns=None, max_text_chars=EXPORT_TEXT_CHARS):
+    import itertools
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow; run 'pip install pyarrow'") from None
+
+    columns = columns or csv_columns(results)
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    rows = csv_rows(results, columns, max_text_chars)
+    with get_metrics().timer('parquet_export', items=len(results)), pq.ParquetWriter(path, schema) as writer:
+        while True:
+            chunk = list(itertools.islice(rows, EXPORT_CHUNK_ROWS))
+            if not chunk:
+                break
+            writer.write_table(pa.Table.from_arrays([pa.array(values, pa.string()) for values in zip(*chunk)],
+                                                    schema=schema))
+
+
+# Function to export analysis results to a file in one of EXPORT_FORMATS
+def export_results(results, path, export_format='csv', columns=None, max_text_chars=EXPORT_TEXT_CHARS):
+    if export_format == 'parquet':
+        write_results_parquet(results, path, columns, max_text_chars)
+    elif export_format == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            write_results_csv(results, f, columns, max_text_chars)
+    else:
+        raise ValueError(f"Unknown export format: {export_format}")
+    return path
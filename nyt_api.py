@@ -0,0 +1,156 @@
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Concurrent, rate-limited client for the NYT Article Search API.
+#
+# Every network call takes a token from a token bucket sized to the API quota,
+# so several pages can be prefetched while the total request rate stays within
+# budget; pages served from the HTTP cache cost no tokens. A 429 does not abort
+# the run: the bucket pauses for Retry-After (or an exponential delay) and
+# halves its rate, the page is retried, and the rate climbs back toward the
+# configured budget as requests succeed. Documents are de-duplicated by
+# web_url / _id across pages and yielded in page order; documents with neither
+# cannot be told apart and are all yielded.
+
+logger = logging.getLogger(__name__)
+
+API_ENDPOINT = "https://api.nytimes.com/svc/search/v2/articlesearch.json"
+DOCS_PER_PAGE = 10
+MAX_PAGES = 100  # The API refuses page numbers above 100
+DEFAULT_RATE_PER_MINUTE = 5
+DEFAULT_BURST = 5
+DEFAULT_PREFETCH = 2
+DEFAULT_MAX_RETRIES = 5
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute=DEFAULT_RATE_PER_MINUTE, capacity=DEFAULT_BURST, stop_event=None):
+        self.max_rate = rate_per_minute / 60.0
+        self.rate = self.max_rate
+        self.min_rate = self.max_rate / 16
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.stop_event = stop_event or threading.Event()
+        self._paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Function to block until a token is available; returns False if stopped
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self._paused_until - now, (1 - self.tokens) / self.rate)
+            if self.stop_event.wait(wait):
+                return False
+
+    # Function to pause and slow down after the server throttled us
+    def backoff(self, delay):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    # Function to recover the rate additively after successful requests
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 8)
+
+
+class ArticleSearchClient:
+    def __init__(self, fetcher, api_key, endpoint=API_ENDPOINT, rate_per_minute=DEFAULT_RATE_PER_MINUTE,
+                 burst=DEFAULT_BURST, prefetch=DEFAULT_PREFETCH, max_retries=DEFAULT_MAX_RETRIES, backoff_base=2.0):
+        self.fetcher = fetcher
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.prefetch = max(0, prefetch)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.stop_event = threading.Event()
+        self.bucket = TokenBucket(rate_per_minute, burst, self.stop_event)
+        self.requests_made = 0
+        self.throttled = 0
+        self.duplicates_skipped = 0
+        self._lock = threading.Lock()  # Guards the counters, which prefetch threads update
+
+    def _acquire_token(self):
+        if not self.bucket.acquire():
+            raise RuntimeError("API client stopped")
+        with self._lock:
+            self.requests_made += 1
+
+    def fetch_page(self, query, page):
+        params = {'q': query, 'page': page, 'api-key': self.api_key}
+        for attempt in range(self.max_retries + 1):
+            try:
+                text = self.fetcher.request_text(self.endpoint, params=params, before_request=self._acquire_token)
+                self.bucket.succeeded()
+                return json.loads(text).get('response', {}).get('docs', []) or []
+            except requests.exceptions.HTTPError as e:
+                response = e.response
+                if response is None or response.status_code != 429 or attempt >= self.max_retries:
+                    raise
+                with self._lock:
+                    self.throttled += 1
+                retry_after = response.headers.get('Retry-After', '')
+                delay = float(retry_after) if retry_after.replace('.', '', 1).isdigit() else self.backoff_base * (2 ** attempt)
+                logger.warning("API rate limited on page %d, backing off %.1fs", page, delay)
+                self.bucket.backoff(delay)
+
+    # Generator yielding unique documents in page order, prefetching upcoming pages. Without
+    # max_documents the caller decides when to stop; up to `prefetch` pages may then go unused.
+    def iter_documents(self, query, max_documents=None):
+        self.stop_event.clear()
+        seen = set()
+        yielded = 0
+        next_page = 0
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.prefetch + 1, thread_name_prefix='nyt-api') as executor:
+            try:
+                while max_documents is None or yielded < max_documents:
+                    # Keep the current page plus `prefetch` pages in flight, but never more than needed
+                    window = self.prefetch + 1
+                    if max_documents is not None:
+                        window = min(window, math.ceil((max_documents - yielded) / DOCS_PER_PAGE))
+                    while next_page < MAX_PAGES and len(pending) < window:
+                        pending.append(executor.submit(self.fetch_page, query, next_page))
+                        next_page += 1
+                    if not pending:
+                        return
+                    docs = pending.popleft().result()
+                    if not docs:
+                        return
+                    for doc in docs:
+                        key = doc.get('web_url') or doc.get('_id')
+                        if key is not None:
+                            if key in seen:
+                                self.duplicates_skipped += 1
+                                continue
+                            seen.add(key)
+                        yield doc
+                        yielded += 1
+                        if max_documents is not None and yielded >= max_documents:
+                            return
+            finally:
+                self.stop_event.set()
+                for future in pending:
+                    future.cancel()
+
+    def close(self):
+        self.stop_event.set()
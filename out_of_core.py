@@ -0,0 +1,119 @@
+import os
+import shutil
+import sys
+import tempfile
+import zlib
+
+import numpy as np
+
+from tfidf_engine import DocumentTermMatrix, build_document_term_matrix, compute_idf, compute_tf_idf, top_k_terms
+
+# Out-of-core TF-IDF for corpora larger than memory.
+#
+# Documents are processed in chunks, in two passes. The first pass builds each
+# chunk's document-term matrix and spills it to disk: term ids and counts are
+# appended to flat binary files (read back as memory-mapped NumPy arrays) and the
+# chunk's vocabulary to a text file. Document frequencies are kept in a
+# hashing-trick vocabulary: a fixed-size memory-mapped array of n_features
+# counters indexed by crc32(term) % n_features, so their memory does not grow
+# with the vocabulary (colliding terms share a counter, which can only raise
+# their df). The second pass maps each spilled chunk back in, scores it against
+# the hashed IDF and yields its top terms, so at any time only one chunk's
+# matrix and the df array are in memory. Top terms keep their exact strings;
+# only the df lookup is hashed.
+
+DEFAULT_N_FEATURES = 2 ** 20
+_ENTRY_DTYPE = np.int32
+
+
+# Function to get the resident set size of this process in bytes (peak size where the current
+# one is not available)
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# Function to map terms to hashing-trick feature ids
+def hash_terms(terms, n_features):
+    return np.fromiter((zlib.crc32(term.encode('utf-8')) for term in terms), dtype=np.int64, count=len(terms)) % n_features
+
+
+class OutOfCoreTfIdf:
+    def __init__(self, spill_dir=None, n_features=DEFAULT_N_FEATURES):
+        self.n_features = n_features
+        self.spill_dir = tempfile.mkdtemp(prefix='tfidf-spill-', dir=spill_dir)
+        self._df_path = os.path.join(self.spill_dir, 'df.bin')
+        self.df = np.memmap(self._df_path, dtype=np.int64, mode='w+', shape=(n_features,))
+        self._indices = open(os.path.join(self.spill_dir, 'indices.bin'), 'wb')
+        self._counts = open(os.path.join(self.spill_dir, 'counts.bin'), 'wb')
+        self._vocabulary = open(os.path.join(self.spill_dir, 'vocabulary.txt'), 'wb')
+        self.chunks = []  # (n_docs, entries, vocabulary bytes, doc lengths, row sizes) per spilled chunk
+        self.n_docs = 0
+        self.n_entries = 0
+
+    # Function to add a chunk of token lists: update the hashed df and spill the chunk's term counts
+    def add_chunk(self, token_lists):
+        matrix = build_document_term_matrix(token_lists)
+        features = hash_terms(matrix.terms, self.n_features)[matrix.indices]
+        # Terms of one document that collide count once for that document
+        per_document = np.unique(matrix.row_ids() * self.n_features + features) % self.n_features
+        touched, increments = np.unique(per_document, return_counts=True)
+        self.df[touched] += increments
+
+        vocabulary = '\n'.join(matrix.terms.tolist()).encode('utf-8')
+        self._indices.write(matrix.indices.astype(_ENTRY_DTYPE).tobytes())
+        self._counts.write(matrix.counts.astype(_ENTRY_DTYPE).tobytes())
+        self._vocabulary.write(vocabulary)
+        self.chunks.append((matrix.n_docs, len(matrix.indices), len(vocabulary),
+                            matrix.doc_lengths.astype(_ENTRY_DTYPE), np.diff(matrix.indptr).astype(_ENTRY_DTYPE)))
+        self.n_docs += matrix.n_docs
+        self.n_entries += len(matrix.indices)
+        return matrix.n_docs
+
+    # Function to score the spilled chunks in order, yielding one list of top (term, score) lists per chunk
+    def iter_top_terms(self, k=4):
+        for handle in (self._indices, self._counts, self._vocabulary):
+            handle.close()
+        self.df.flush()
+        if not self.n_entries:
+            for n_docs, *_ in self.chunks:
+                yield [[] for _ in range(n_docs)]
+            return
+        entry_start = 0
+        with open(os.path.join(self.spill_dir, 'vocabulary.txt'), 'rb') as vocabulary_file:
+            for n_docs, n_entries, vocabulary_bytes, doc_lengths, row_sizes in self.chunks:
+                vocabulary = vocabulary_file.read(vocabulary_bytes).decode('utf-8')
+                terms = np.array(vocabulary.split('\n') if vocabulary_bytes else [], dtype=object)
+                indptr = np.zeros(n_docs + 1, dtype=np.int64)
+                np.cumsum(row_sizes, out=indptr[1:])
+                matrix = DocumentTermMatrix(indptr, self._map_entries('indices.bin', entry_start, n_entries),
+                                            self._map_entries('counts.bin', entry_start, n_entries),
+                                            doc_lengths.astype(np.int64), terms)
+                entry_start += n_entries
+                idf = compute_idf(self.df[hash_terms(terms, self.n_features)], self.n_docs)
+                yield top_k_terms(matrix, compute_tf_idf(matrix, idf), k=k)
+
+    # Function to copy one chunk's entries out of a spill file; only that chunk is mapped, so
+    # pages of earlier chunks do not stay resident
+    def _map_entries(self, name, start, count):
+        if not count:
+            return np.empty(0, dtype=np.int64)
+        mapped = np.memmap(os.path.join(self.spill_dir, name), dtype=_ENTRY_DTYPE, mode='r',
+                           offset=start * _ENTRY_DTYPE().itemsize, shape=(count,))
+        entries = mapped.astype(np.int64)
+        del mapped
+        return entries
+
+    # Function to remove the spill files; calling it again does nothing
+    def close(self):
+        if self.df is None:
+            return
+        for handle in (self._indices, self._counts, self._vocabulary):
+            handle.close()
+        self.df = None
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
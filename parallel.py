@@ -0,0 +1,79 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from html_extraction import extract_article_text
+from text_preprocessing import get_pipeline
+
+# Opt-in process-pool execution for the CPU-bound stages (HTML extraction and
+# document preprocessing). Work is shipped to the workers in chunks to keep IPC
+# overhead low, and results come back in input order so the output is identical
+# to the serial path. With workers <= 1 everything runs in-process. The pool is
+# created on first use and kept for the life of the process (shut down at
+# exit), so worker startup and NLTK loading are paid once, not once per batch;
+# asking for a different worker count replaces it.
+
+DEFAULT_CHUNK_SIZE = 16
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+# Function to resolve a worker count; 0 or None means "one per CPU core"
+def resolve_workers(workers):
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+# Function to get the shared process pool with the given number of workers
+def get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+# Function to shut the shared process pool down; the next parallel_map starts a new one
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+# Function to map func over items, in a process pool when workers > 1
+def parallel_map(func, items, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    items = list(items)
+    workers = resolve_workers(workers)
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    # Executor.map yields results in submission order regardless of completion order
+    return list(get_pool(workers).map(func, items, chunksize=max(1, chunk_size)))
+
+
+def _preprocess_with_mode(mode, document):
+    # Each worker process builds its own pipeline once and reuses it for every chunk
+    return get_pipeline(mode)(document)
+
+
+# Function to extract article text from many HTML pages
+def extract_article_texts(html_pages, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    return parallel_map(extract_article_text, html_pages, workers, chunk_size)
+
+
+# Function to preprocess many documents into token lists
+def preprocess_documents(documents, mode='nltk', workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    return parallel_map(partial(_preprocess_with_mode, mode), documents, workers, chunk_size)
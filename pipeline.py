@@ -0,0 +1,145 @@
+import queue
+import threading
+import time
+
+# Generator-based streaming pipeline.
+#
+# A source generator feeds a chain of stages, each running in its own thread
+# and connected to the next by a bounded queue, so only a handful of items are
+# ever in flight and memory stays flat no matter how many articles pass
+# through. Each stage is a transform: it takes an iterator of items and yields
+# items, which lets a stage batch, fan out or keep several requests in flight
+# internally. The consumer iterates the pipeline in its own thread (the
+# Streamlit script thread) and sees every item as soon as the last stage
+# yields it. Calling stop() - or simply stopping iteration - makes every stage
+# wind down at its next queue operation.
+
+DEFAULT_QUEUE_SIZE = 16
+_POLL_INTERVAL = 0.1
+_DONE = object()
+
+
+class PipelineItem:
+    def __init__(self, url):
+        self.url = url
+        self.html = None
+        self.text = None
+        self.tokens = None
+        self.result = None
+        self.error = None
+        self.failed_stage = None
+
+
+class _StageFailure:
+    def __init__(self, stage_name, exception):
+        self.stage_name = stage_name
+        self.exception = exception
+
+
+class _UpstreamFailed(Exception):
+    def __init__(self, failure):
+        super().__init__(failure.stage_name)
+        self.failure = failure
+
+
+# Function to wrap a per-item function as a stage transform. Items that already
+# failed pass through untouched; an exception marks the item as failed.
+def map_stage(func, name=None):
+    stage_name = name or func.__name__
+
+    def transform(items, stop_event):
+        for item in items:
+            if item.error is None:
+                try:
+                    func(item)
+                except Exception as e:
+                    item.error = e
+                    item.failed_stage = stage_name
+            yield item
+    transform.__name__ = stage_name
+    return transform
+
+
+class StreamingPipeline:
+    def __init__(self, source, stages, queue_size=DEFAULT_QUEUE_SIZE):
+        # source(stop_event) -> iterable of items; stages: transforms(items, stop_event) -> iterable
+        self.source = source
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.stop_event = threading.Event()
+        self.started_at = None
+        self.first_result_seconds = None
+        self.results_count = 0
+        self._threads = []
+
+    def _put(self, q, item):
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _iter_queue(self, q):
+        while not self.stop_event.is_set():
+            try:
+                item = q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _StageFailure):
+                raise _UpstreamFailed(item)
+            yield item
+
+    def _run_stage(self, name, produce, out_queue):
+        try:
+            for item in produce():
+                if not self._put(out_queue, item):
+                    return
+            self._put(out_queue, _DONE)
+        except _UpstreamFailed as e:
+            # Forward the original failure so the consumer reports the stage that broke
+            self._put(out_queue, e.failure)
+        except Exception as e:
+            self._put(out_queue, _StageFailure(name, e))
+
+    def __iter__(self):
+        self.started_at = time.perf_counter()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        producers = [('source', lambda: self.source(self.stop_event))]
+        for i, stage in enumerate(self.stages):
+            producers.append((getattr(stage, '__name__', f'stage_{i}'),
+                              lambda stage=stage, q=queues[i]: stage(self._iter_queue(q), self.stop_event)))
+        for i, (name, produce) in enumerate(producers):
+            thread = threading.Thread(target=self._run_stage, args=(name, produce, queues[i]),
+                                      name=f'pipeline-{name}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    item = queues[-1].get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    return
+                if isinstance(item, _StageFailure):
+                    raise RuntimeError(f"Pipeline stage '{item.stage_name}' failed: {item.exception}") from item.exception
+                if self.first_result_seconds is None:
+                    self.first_result_seconds = time.perf_counter() - self.started_at
+                self.results_count += 1
+                yield item
+        finally:
+            self.stop()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at if self.started_at is not None else 0.0
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from fetcher import CrawlNotAllowed
+
+# Headless rendering fallback for pages whose static HTML has no article body.
+#
+# A RenderPool keeps one headless Chromium and a small pool of long-lived
+# browser contexts open, instead of launching a browser per page as
+# solution.py does. Playwright's async API runs on an event loop in a
+# dedicated thread; render() and render_many() can be called from any thread
+# and block on futures, the way Fetcher.fetch and fetch_many do. Each render
+# borrows a context, opens a page, waits for the article body to appear (or
+# the timeout) and returns the rendered HTML for html_extraction to parse.
+# Images, fonts and media are aborted before they are requested, and every
+# document request (the page itself, redirects, iframes) goes through the
+# same robots.txt check as static fetches. Navigations share the fetcher's
+# per-host rate limiter when one is given. Contexts are replaced after
+# max_pages_per_context pages so their memory does not grow without bound.
+#
+# Playwright is optional: it is imported only when a pool is created, and
+# RendererUnavailable explains how to install it when it is missing
+# (pip install playwright && playwright install chromium).
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_TIMEOUT = 20  # Seconds per page, including waiting for the article body
+DEFAULT_BLOCKED_RESOURCES = ('image', 'font', 'media')
+DEFAULT_MAX_PAGES_PER_CONTEXT = 100
+ARTICLE_BODY_SELECTOR = 'section[name="articleBody"] p, p[class*="css-"]'
+_STOP_TIMEOUT = 10
+
+
+class RendererUnavailable(RuntimeError):
+    pass
+
+
+class RenderPool:
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, is_allowed=None, user_agent=None,
+                 blocked_resources=DEFAULT_BLOCKED_RESOURCES, wait_selector=ARTICLE_BODY_SELECTOR,
+                 max_pages_per_context=DEFAULT_MAX_PAGES_PER_CONTEXT, limiter=None, metrics=None):
+        try:
+            from playwright.async_api import async_playwright
+        except ImportError:
+            raise RendererUnavailable(
+                "Playwright is not installed; run 'pip install playwright && playwright install chromium'"
+            ) from None
+        self._async_playwright = async_playwright
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.is_allowed = is_allowed or (lambda url: True)
+        self.user_agent = user_agent
+        self.blocked_resources = frozenset(blocked_resources)
+        self.wait_selector = wait_selector
+        self.max_pages_per_context = max_pages_per_context
+        self.limiter = limiter
+        self.metrics = metrics
+        self.pages_rendered = 0
+        self.requests_blocked = 0
+        self._playwright = None
+        self._browser = None
+        self._contexts = None
+        self._context_pages = {}
+        self._closed = False
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='renderer', daemon=True)
+        self._thread.start()
+        try:
+            self._call(self._start())
+        except Exception as e:
+            self.close()
+            raise RendererUnavailable(f"Could not start headless Chromium: {e}") from e
+
+    def _call(self, coroutine, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    async def _start(self):
+        self._playwright = await self._async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._contexts = asyncio.Queue()
+        for _ in range(self.pool_size):
+            self._contexts.put_nowait(await self._new_context())
+
+    async def _new_context(self):
+        options = {'user_agent': self.user_agent} if self.user_agent else {}
+        context = await self._browser.new_context(**options)
+        context.set_default_timeout(self.timeout * 1000)
+        await context.route('**/*', self._route)
+        self._context_pages[context] = 0
+        return context
+
+    # Request interception: drop heavy resources, apply robots.txt to every document request
+    async def _route(self, route):
+        request = route.request
+        if request.resource_type in self.blocked_resources:
+            self.requests_blocked += 1
+            self._count('render_blocked_requests', resource=request.resource_type)
+            await route.abort()
+        elif request.resource_type == 'document' and not self.is_allowed(request.url):
+            self._count('render_robots_denied')
+            await route.abort('blockedbyclient')
+        else:
+            await route.continue_()
+
+    def _count(self, name, value=1, **labels):
+        if self.metrics is not None:
+            self.metrics.count(name, value, **labels)
+
+    async def _render(self, url):
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        context = await self._contexts.get()
+        page = None
+        try:
+            page = await context.new_page()
+            deadline = time.monotonic() + self.timeout
+            response = await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout * 1000)
+            if response is not None and response.status >= 400:
+                raise RuntimeError(f"HTTP {response.status} rendering {url}")
+            try:
+                remaining = max(deadline - time.monotonic(), 0.001)
+                await page.wait_for_selector(self.wait_selector, timeout=remaining * 1000)
+            except PlaywrightTimeoutError:
+                pass  # No article body appeared; extraction of the rendered HTML decides
+            return await page.content()
+        finally:
+            if page is not None:
+                await page.close()
+            self._context_pages[context] += 1
+            if self._context_pages[context] >= self.max_pages_per_context:
+                del self._context_pages[context]
+                await context.close()
+                context = await self._new_context()
+            self._contexts.put_nowait(context)
+
+    async def _render_with_timeout(self, url):
+        # The page timeouts cover navigation and waiting; this also bounds waiting for a free context
+        return await asyncio.wait_for(self._render(url), self.timeout * 2)
+
+    # Function to check robots.txt, take a rate-limit slot and schedule a render; returns a
+    # concurrent.futures.Future of the rendered HTML
+    def _submit(self, url):
+        if self._closed:
+            raise RuntimeError("Render pool is closed")
+        if not self.is_allowed(url):
+            raise CrawlNotAllowed("Crawling not permitted by robots.txt")
+        host = urlsplit(url).netloc
+        if self.limiter is not None:
+            self.limiter.acquire(host)
+        started_at = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(self._render_with_timeout(url), self._loop)
+
+        def done(future):
+            if self.limiter is not None:
+                self.limiter.release(host)
+            if future.cancelled() or future.exception() is not None:
+                self._count('render_failures')
+            else:
+                self.pages_rendered += 1
+                if self.metrics is not None:
+                    self.metrics.observe('render', time.perf_counter() - started_at)
+        future.add_done_callback(done)
+        return future
+
+    # Function to render a single page, blocking the calling thread
+    def render(self, url):
+        return self._submit(url).result()
+
+    # Generator yielding (url, html, error) in input order while keeping up to pool_size renders
+    # in flight; should_stop() is checked before each new render is scheduled
+    def render_many(self, urls, should_stop=None):
+        pending = deque()
+        url_iter = iter(urls)
+
+        def schedule():
+            while len(pending) < self.pool_size:
+                if should_stop is not None and should_stop():
+                    return
+                url = next(url_iter, None)
+                if url is None:
+                    return
+                try:
+                    pending.append((url, self._submit(url), None))
+                except Exception as e:
+                    pending.append((url, None, e))
+
+        schedule()
+        while pending:
+            url, future, error = pending.popleft()
+            html = None
+            if future is not None:
+                try:
+                    html = future.result()
+                except Exception as e:
+                    error = e
+            yield url, html, error
+            schedule()
+
+    async def _stop(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._call(self._stop(), _STOP_TIMEOUT)
+        except Exception:
+            pass  # The browser is gone either way once the loop stops
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(_STOP_TIMEOUT)
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
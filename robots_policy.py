@@ -0,0 +1,233 @@
+import os
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from urllib.parse import urlsplit, unquote
+
+import requests
+
+# Cached, compiled robots.txt decision layer.
+#
+# robots.txt is fetched lazily on first use, kept in memory and on disk for a
+# TTL, and its rules for our user agent are compiled once into a matcher:
+# plain path prefixes are checked with str.startswith and only rules containing
+# '*' or '$' fall back to a precompiled regex. Rules are ordered longest first
+# so the first match is the most specific one (Allow wins ties), as in RFC 9309.
+# Decisions are memoized per path, and denials are collected into a summary
+# instead of being reported one by one.
+#
+# Group selection follows urllib.robotparser: the first group whose agent token
+# appears in our user agent's product name applies, otherwise the '*' group.
+# As there, a 401/403 for robots.txt disallows everything and other 4xx allow
+# everything. A network error or 5xx is treated as temporary: the rules loaded
+# before (or, after a restart, the expired copy on disk) keep applying, and
+# only with neither is everything disallowed; either way the download is
+# retried after retry_interval seconds instead of the full TTL.
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_RETRY_INTERVAL = 60  # Seconds before a failed robots.txt download is retried
+DECISION_CACHE_SIZE = 65536
+
+
+class _Rule:
+    def __init__(self, path, allow):
+        self.path = path
+        self.allow = allow
+        if '*' in path or path.endswith('$'):
+            anchored = path.endswith('$')
+            body = path[:-1] if anchored else path
+            pattern = '.*'.join(re.escape(part) for part in body.split('*'))
+            self.regex = re.compile(pattern + ('$' if anchored else ''))
+        else:
+            self.regex = None
+
+    def matches(self, path):
+        if self.regex is None:
+            return path.startswith(self.path)
+        return self.regex.match(path) is not None
+
+
+# Function to parse robots.txt into [(agents, rules, crawl_delay)] groups
+def parse_robots_txt(text):
+    groups = []
+    agents, rules, crawl_delay = [], [], None
+    last_was_agent = False
+    for raw_line in text.splitlines():
+        line = raw_line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        field, value = line.split(':', 1)
+        field, value = field.strip().lower(), value.strip()
+        if field == 'user-agent':
+            if not last_was_agent and agents:
+                groups.append((agents, rules, crawl_delay))
+                agents, rules, crawl_delay = [], [], None
+            agents.append(value)
+            last_was_agent = True
+            continue
+        last_was_agent = False
+        if not agents:
+            continue
+        if field in ('allow', 'disallow'):
+            if value:
+                rules.append(_Rule(unquote(value), field == 'allow'))
+            elif field == 'disallow':
+                # An empty Disallow means everything is allowed for this group
+                rules.append(_Rule('', True))
+        elif field == 'crawl-delay':
+            try:
+                crawl_delay = float(value)
+            except ValueError:
+                pass
+    if agents:
+        groups.append((agents, rules, crawl_delay))
+    return groups
+
+
+class CompiledRules:
+    def __init__(self, rules, crawl_delay=None, default_allow=True):
+        # Longest path first; for equal length Allow sorts before Disallow
+        self.rules = sorted(rules, key=lambda rule: (-len(rule.path), not rule.allow))
+        self.crawl_delay = crawl_delay
+        self.default_allow = default_allow
+
+    def allows(self, path):
+        for rule in self.rules:
+            if rule.matches(path):
+                return rule.allow
+        return self.default_allow
+
+
+# Function to compile the rules that apply to a user agent
+def compile_rules(text, user_agent):
+    product = user_agent.split('/')[0].lower()
+    default_group = None
+    for agents, rules, crawl_delay in parse_robots_txt(text):
+        for agent in agents:
+            if agent == '*':
+                if default_group is None:
+                    default_group = (rules, crawl_delay)
+            elif agent.lower() in product:
+                return CompiledRules(rules, crawl_delay)
+    if default_group is not None:
+        return CompiledRules(*default_group)
+    return CompiledRules([])
+
+
+class RobotsPolicy:
+    def __init__(self, robots_url, user_agent, ttl=DEFAULT_TTL, cache_path=None, fetch_text=None, timeout=15,
+                 retry_interval=DEFAULT_RETRY_INTERVAL):
+        self.robots_url = robots_url
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self._fetch_text = fetch_text
+        self._lock = threading.Lock()
+        self._compiled = None
+        self._loaded_at = 0.0
+        self._expires_at = 0.0
+        self.load_error = None
+        self.denied = Counter()
+
+    def _download(self):
+        if self._fetch_text is not None:
+            return self._fetch_text(self.robots_url)
+        response = requests.get(self.robots_url, headers={'User-Agent': self.user_agent}, timeout=self.timeout)
+        if response.status_code in (401, 403):
+            return CompiledRules([], default_allow=False)
+        if 400 <= response.status_code < 500:
+            return ''
+        response.raise_for_status()
+        return response.text
+
+    # Function to read the disk copy as (text, loaded_at); None if missing or, unless stale_ok, expired
+    def _read_disk_cache(self, stale_ok=False):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        age = time.time() - os.path.getmtime(self.cache_path)
+        if age >= self.ttl and not stale_ok:
+            return None
+        with open(self.cache_path, 'r', encoding='utf-8') as f:
+            return f.read(), time.time() - age
+
+    def _write_disk_cache(self, text):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, self.cache_path)
+
+    def _install(self, compiled, loaded_at, expires_at=None):
+        self._compiled = compiled
+        self._loaded_at = loaded_at
+        self._expires_at = loaded_at + self.ttl if expires_at is None else expires_at
+        self._decide = lru_cache(maxsize=DECISION_CACHE_SIZE)(compiled.allows)
+
+    # Function to (re)load robots.txt when missing, older than the TTL or due for a retry after a failed download
+    def refresh(self, force=False):
+        with self._lock:
+            if not force and self._compiled is not None and time.time() < self._expires_at:
+                return
+            cached = None if force else self._read_disk_cache()
+            if cached is not None:
+                text, loaded_at = cached
+                self._install(compile_rules(text, self.user_agent), loaded_at)
+                self.load_error = None
+                return
+            try:
+                result = self._download()
+            except Exception as e:
+                self.load_error = e
+                retry_at = time.time() + self.retry_interval
+                if self._compiled is not None:
+                    self._expires_at = retry_at
+                    return
+                stale = self._read_disk_cache(stale_ok=True)
+                if stale is not None:
+                    self._install(compile_rules(stale[0], self.user_agent), stale[1], retry_at)
+                else:
+                    self._install(CompiledRules([], default_allow=False), time.time(), retry_at)
+                return
+            self.load_error = None
+            if isinstance(result, CompiledRules):
+                self._install(result, time.time())
+            else:
+                self._write_disk_cache(result)
+                self._install(compile_rules(result, self.user_agent), time.time())
+
+    @property
+    def crawl_delay(self):
+        self.refresh()
+        return self._compiled.crawl_delay
+
+    # Function to decide whether a URL may be fetched; denials are recorded
+    def allows(self, url):
+        self.refresh()
+        parts = urlsplit(url)
+        path = unquote(parts.path) or '/'
+        if parts.query:
+            path += '?' + parts.query
+        allowed = self._decide(path)
+        if not allowed:
+            with self._lock:
+                self.denied[path] += 1
+        return allowed
+
+    def decision_cache_info(self):
+        self.refresh()
+        return self._decide.cache_info()
+
+    # Function to summarize denials as (distinct paths, total denials, most common paths)
+    def denial_summary(self, top=20):
+        with self._lock:
+            return len(self.denied), sum(self.denied.values()), self.denied.most_common(top)
+
+    def reset_denials(self):
+        with self._lock:
+            self.denied.clear()
@@ -0,0 +1,268 @@
+import glob
+import json
+import os
+import threading
+
+import numpy as np
+
+# Related-article search over L2-normalized TF-IDF vectors.
+#
+# Every document is stored once as a sparse row (term ids and weights, CSR) and
+# indexed in an inverted index: per term, the documents containing it with
+# their weights, plus the term's largest weight. A query is scored term at a
+# time in descending order of its upper bound (query weight x largest weight).
+# As soon as the bound left for the unprocessed terms can no longer lift more
+# than a few documents into the top k (checked each time that bound has shrunk
+# by a constant factor), scoring stops and only those candidates
+# are rescored exactly against their rows, so the long posting lists of common,
+# low-weight terms are usually never read. Because rows are normalized, the dot
+# product is the cosine similarity.
+#
+# Documents added after the last rebuild are kept out of the inverted index and
+# always rescored exactly; the inverted index is rebuilt once they exceed
+# `rebuild_fraction` of the indexed documents. Re-adding a URL replaces its
+# vector. On disk the index is a directory of append-only segment files (one
+# per save(), holding the documents and terms added since the previous one),
+# compacted into one when there are more than `max_segments`. A compacted
+# segment is marked as a base: it is written before the segments it replaces
+# are removed, and loading starts at the newest base, so a crash in between
+# leaves old segments that are skipped (and removed) rather than loaded twice.
+
+DEFAULT_REBUILD_FRACTION = 0.1
+DEFAULT_MAX_SEGMENTS = 8
+_MIN_PENDING_FOR_REBUILD = 256
+_CANDIDATES_PER_RESULT = 4  # Stop term-at-a-time scoring once at most this many candidates per result remain
+_PRUNE_CHECK_DECAY = 0.7  # Check for pruning each time the remaining upper bound has shrunk by this factor
+
+
+# Function to L2-normalize the rows of a CSR matrix given as (indptr, weights)
+def normalize_rows(indptr, weights):
+    sizes = np.diff(indptr)
+    rows = np.repeat(np.arange(len(sizes)), sizes)
+    norms = np.sqrt(np.bincount(rows, weights=weights.astype(np.float64) ** 2, minlength=len(sizes)))
+    norms[norms == 0] = 1.0
+    return (weights / norms[rows]).astype(np.float32)
+
+
+class SimilarityIndex:
+    def __init__(self, path, rebuild_fraction=DEFAULT_REBUILD_FRACTION, max_segments=DEFAULT_MAX_SEGMENTS):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.rebuild_fraction = rebuild_fraction
+        self.max_segments = max_segments
+        self._lock = threading.RLock()
+        self._terms = {}
+        self._term_list = []
+        self.urls = []
+        self._doc_ids = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+        self._n_indexed = 0
+        self._saved_docs = 0
+        self._saved_terms = 0
+        self._load()
+        self._build_inverted_index()
+
+    def __len__(self):
+        return len(self._doc_ids)
+
+    def __contains__(self, url):
+        return url in self._doc_ids
+
+    def _segment_paths(self):
+        return sorted(path for path in glob.glob(os.path.join(self.path, 'segment-*.npz'))
+                      if not path.endswith('.tmp.npz'))
+
+    def _load(self):
+        segments = self._segment_paths()
+        for position in range(len(segments) - 1, 0, -1):
+            with np.load(segments[position]) as segment:
+                if json.loads(str(segment['state'])).get('base'):
+                    # Segments before the newest base were compacted into it
+                    for old_path in segments[:position]:
+                        os.remove(old_path)
+                    segments = segments[position:]
+                    break
+        for segment_path in segments:
+            with np.load(segment_path) as segment:
+                state = json.loads(str(segment['state']))
+                # A segment's terms extend the vocabulary of the segments before it; its indices are global ids
+                for term in state['terms']:
+                    self._terms.setdefault(term, len(self._term_list))
+                    self._term_list.append(term)
+                self._add_rows(state['urls'], None, segment['indptr'], segment['indices'], segment['weights'])
+        self._saved_docs = len(self.urls)
+        self._saved_terms = len(self._term_list)
+
+    def _term_ids(self, terms):
+        return np.fromiter((self._terms.setdefault(term, len(self._terms)) for term in terms),
+                           dtype=np.int32, count=len(terms))
+
+    # Function to append normalized rows whose indices refer to `terms` (or are index term ids when
+    # terms is None) and retire the older rows of the same URLs
+    def _add_rows(self, urls, terms, indptr, indices, weights):
+        if terms is not None:
+            new_terms = [term for term in terms if term not in self._terms]
+            term_ids = self._term_ids(terms)
+            indices = term_ids[indices] if len(indices) else np.zeros(0, dtype=np.int32)
+            self._term_list.extend(new_terms)
+        first = len(self.urls)
+        alive = np.ones(len(urls), dtype=bool)
+        for offset, url in enumerate(urls):
+            previous = self._doc_ids.get(url)
+            if previous is not None:
+                if previous >= first:
+                    alive[previous - first] = False
+                else:
+                    self._alive[previous] = False
+            self._doc_ids[url] = first + offset
+        self.urls.extend(urls)
+        self._alive = np.concatenate([self._alive, alive])
+        self._indptr = np.concatenate([self._indptr, self._indptr[-1] + np.asarray(indptr[1:], dtype=np.int64)])
+        self._indices = np.concatenate([self._indices, np.asarray(indices, dtype=np.int32)])
+        self._weights = np.concatenate([self._weights, np.asarray(weights, dtype=np.float32)])
+
+    # Function to add documents from a document-term matrix (tfidf_engine) and its TF-IDF entry
+    # scores; `keep` optionally selects the rows to add. Entries with a non-positive score (terms
+    # found in nearly every article) are left out, so every contribution to a cosine is positive.
+    def add_matrix(self, urls, matrix, scores, keep=None):
+        keep = np.ones(matrix.n_docs, dtype=bool) if keep is None else np.asarray(keep, dtype=bool)
+        if not keep.any():
+            return
+        rows = np.repeat(np.arange(matrix.n_docs), np.diff(matrix.indptr))
+        kept_entries = keep[rows] & (scores > 0)
+        indptr = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[kept_entries], minlength=matrix.n_docs)[keep], out=indptr[1:])
+        with self._lock:
+            self._add_rows([url for url, kept in zip(urls, keep) if kept], list(matrix.terms), indptr,
+                           matrix.indices[kept_entries], normalize_rows(indptr, scores[kept_entries]))
+            pending = len(self.urls) - self._n_indexed
+            if pending >= max(_MIN_PENDING_FOR_REBUILD, self.rebuild_fraction * self._n_indexed):
+                self._build_inverted_index()
+
+    def _build_inverted_index(self):
+        n_terms = len(self._term_list)
+        rows = np.repeat(np.arange(len(self.urls), dtype=np.int32), np.diff(self._indptr))
+        keep = self._alive[rows]
+        indices, weights, rows = self._indices[keep], self._weights[keep], rows[keep]
+        order = np.argsort(indices, kind='stable')
+        self._posting_docs = rows[order]
+        self._posting_weights = weights[order]
+        self._posting_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=n_terms), out=self._posting_ptr[1:])
+        self._max_weight = np.zeros(n_terms, dtype=np.float32)
+        non_empty = np.flatnonzero(np.diff(self._posting_ptr))
+        if len(non_empty):
+            self._max_weight[non_empty] = np.maximum.reduceat(self._posting_weights, self._posting_ptr[non_empty])
+        self._n_indexed = len(self.urls)
+
+    # Function to turn {term: weight} into normalized (term ids, weights), dropping unknown terms
+    def _query_vector(self, term_weights):
+        known = [(self._terms[term], weight) for term, weight in term_weights.items() if term in self._terms and weight > 0]
+        if not known:
+            return None, None
+        ids = np.array([term_id for term_id, _ in known], dtype=np.int64)
+        weights = np.array([weight for _, weight in known], dtype=np.float64)
+        return ids, weights / np.linalg.norm(weights)
+
+    # Function to find the k documents most similar to a query vector, as (url, cosine) pairs
+    def query(self, term_weights, k=5, exclude=()):
+        with self._lock:
+            ids, weights = self._query_vector(term_weights)
+            if ids is None:
+                return []
+            return self._top_k(ids, weights, k, {self._doc_ids[url] for url in exclude if url in self._doc_ids})
+
+    # Function to find the k documents most similar to an indexed document
+    def similar_to(self, url, k=5):
+        with self._lock:
+            doc_id = self._doc_ids.get(url)
+            if doc_id is None:
+                return []
+            start, end = self._indptr[doc_id], self._indptr[doc_id + 1]
+            ids = self._indices[start:end].astype(np.int64)
+            weights = self._weights[start:end].astype(np.float64)
+            if not len(ids):
+                return []
+            return self._top_k(ids, weights, k, {doc_id})
+
+    def _top_k(self, ids, weights, k, excluded):
+        # Terms first seen after the last rebuild only occur in documents that are rescored anyway
+        in_index = np.flatnonzero(ids < len(self._max_weight))
+        upper_bounds = weights[in_index] * self._max_weight[ids[in_index]]
+        order = in_index[np.argsort(-upper_bounds, kind='stable')]
+        upper_bounds = dict(zip(in_index.tolist(), upper_bounds.tolist()))
+        remaining = sum(upper_bounds.values())
+        scores = np.zeros(self._n_indexed, dtype=np.float64)
+        wanted = k + len(excluded)
+        candidates = None
+        next_check = remaining * _PRUNE_CHECK_DECAY
+        for position, term in enumerate(order):
+            remaining -= upper_bounds[term]
+            start, end = self._posting_ptr[ids[term]], self._posting_ptr[ids[term] + 1]
+            scores[self._posting_docs[start:end]] += weights[term] * self._posting_weights[start:end]
+            last = position == len(order) - 1
+            if last or remaining <= next_check:
+                next_check = remaining * _PRUNE_CHECK_DECAY
+                if last or len(scores) <= wanted:
+                    candidates = np.flatnonzero(scores > 0) if last else np.arange(len(scores))
+                    break
+                # Any document outside the candidates ends below the current k-th partial score
+                threshold = np.partition(scores, -wanted)[-wanted]
+                if threshold > 0:
+                    survivors = np.flatnonzero(scores + remaining >= threshold)
+                    if len(survivors) <= _CANDIDATES_PER_RESULT * wanted:
+                        candidates = survivors
+                        break
+        if candidates is None:
+            candidates = np.flatnonzero(scores > 0)
+
+        # Rescore the candidates and every document added since the last rebuild exactly
+        candidates = np.concatenate([candidates, np.arange(self._n_indexed, len(self.urls))]).astype(np.int64)
+        candidates = candidates[self._alive[candidates]]
+        if excluded:
+            candidates = candidates[~np.isin(candidates, list(excluded))]
+        if not len(candidates):
+            return []
+        query = np.zeros(len(self._term_list), dtype=np.float64)
+        query[ids] = weights
+        starts, ends = self._indptr[candidates], self._indptr[candidates + 1]
+        sizes = ends - starts
+        entries = np.repeat(starts - np.concatenate([[0], np.cumsum(sizes)[:-1]]), sizes) + np.arange(sizes.sum())
+        exact = np.bincount(np.repeat(np.arange(len(candidates)), sizes),
+                            weights=self._weights[entries] * query[self._indices[entries]], minlength=len(candidates))
+        best = np.argsort(-exact, kind='stable')[:k]
+        return [(self.urls[candidates[i]], float(exact[i])) for i in best if exact[i] > 0]
+
+    # Function to write the documents and terms added since the last save as a new segment
+    def save(self):
+        with self._lock:
+            if self._saved_docs == len(self.urls):
+                return
+            segments = self._segment_paths()
+            number = int(os.path.basename(segments[-1])[8:-4]) + 1 if segments else 1
+            if len(segments) >= self.max_segments:
+                self._write_segment(number, 0, 0, alive_only=True)
+                for old_path in segments:
+                    os.remove(old_path)
+            else:
+                self._write_segment(number, self._saved_docs, self._saved_terms)
+            self._saved_docs = len(self.urls)
+            self._saved_terms = len(self._term_list)
+
+    def _write_segment(self, number, first_doc, first_term, alive_only=False):
+        doc_ids = np.arange(first_doc, len(self.urls))
+        if alive_only:
+            doc_ids = doc_ids[self._alive[doc_ids]]
+        starts, ends = self._indptr[doc_ids], self._indptr[doc_ids + 1]
+        sizes = ends - starts
+        indptr = np.zeros(len(doc_ids) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=indptr[1:])
+        entries = np.repeat(starts - indptr[:-1], sizes) + np.arange(indptr[-1])
+        state = {'urls': [self.urls[i] for i in doc_ids], 'terms': self._term_list[first_term:], 'base': alive_only}
+        temporary_path = os.path.join(self.path, f"segment-{number:06d}.tmp.npz")
+        np.savez(temporary_path, state=np.array(json.dumps(state)), indptr=indptr,
+                 indices=self._indices[entries], weights=self._weights[entries])
+        os.replace(temporary_path, os.path.join(self.path, f"segment-{number:06d}.npz"))
@@ -0,0 +1,223 @@
+import heapq
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+
+# Pre-aggregated term trends by publication day.
+#
+# For every day, holds the number of articles published that day and, per
+# term, its total count (tf) and the number of those articles containing it
+# (df). Articles are added with their token lists as they are analyzed, keyed
+# by URL so the same article is never counted twice; the publication day comes
+# from the /YYYY/MM/DD/ part of the URL or the API's pub_date. Window queries
+# (trending terms over the last N days against the N days before, rolling
+# document shares per day) only read the aggregate rows of the days involved,
+# never the articles themselves. Days are stored as ISO strings (YYYY-MM-DD),
+# which sort and compare like the dates they stand for.
+
+# Every batch upserts a row per (day, term), so commits are large; write-ahead logging without a
+# sync per commit triples the ingest rate, and a crash can only lose the last batches, which the
+# next analysis of the same articles adds again
+_SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS documents (
+    url TEXT PRIMARY KEY,
+    day TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS day_totals (
+    day TEXT PRIMARY KEY,
+    documents INTEGER NOT NULL,
+    terms INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS term_days (
+    day TEXT NOT NULL,
+    term TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    df INTEGER NOT NULL,
+    PRIMARY KEY (day, term)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS term_days_by_term ON term_days (term, day);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+_URL_DATE = re.compile(r'/(\d{4})/(\d{2})/(\d{2})/')
+
+
+# Function to get the publication day of an article as YYYY-MM-DD: from an explicit
+# timestamp (e.g. the API's pub_date) if given, otherwise from the URL path; None if unknown
+def publication_day(url, published=None):
+    if published:
+        candidate = published[:10]
+    else:
+        match = _URL_DATE.search(url or '')
+        if match is None:
+            return None
+        candidate = '-'.join(match.groups())
+    try:
+        return date.fromisoformat(candidate).isoformat()
+    except ValueError:
+        return None
+
+
+def _day(value):
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+class TermTrends:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def document_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # Function to get the first and last day with articles, or None when nothing was added
+    def day_range(self):
+        with self._lock:
+            first, last = self._db.execute("SELECT MIN(day), MAX(day) FROM day_totals").fetchone()
+        return (date.fromisoformat(first), date.fromisoformat(last)) if first else None
+
+    def _known_urls(self, urls):
+        known = set()
+        for start in range(0, len(urls), _QUERY_CHUNK):
+            chunk = urls[start:start + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            known.update(row[0] for row in self._db.execute(
+                f"SELECT url FROM documents WHERE url IN ({placeholders})", chunk))
+        return known
+
+    # Function to add a batch of articles with their publication days (None = unknown, skipped);
+    # returns the number of articles added
+    def add_documents(self, urls, days, token_lists):
+        urls = list(urls)
+        with self._lock:
+            known = self._known_urls(urls)
+            new_documents = []
+            day_totals = {}
+            term_days = {}
+            for url, day, tokens in zip(urls, days, token_lists):
+                if day is None or url in known:
+                    continue
+                known.add(url)
+                new_documents.append((url, day))
+                totals = day_totals.setdefault(day, [0, 0])
+                totals[0] += 1
+                totals[1] += len(tokens)
+                for term, count in Counter(tokens).items():
+                    counts = term_days.get((day, term))
+                    if counts is None:
+                        term_days[(day, term)] = [count, 1]
+                    else:
+                        counts[0] += count
+                        counts[1] += 1
+
+            with self._db:
+                self._db.executemany("INSERT INTO documents (url, day) VALUES (?, ?)", new_documents)
+                self._db.executemany(
+                    "INSERT INTO day_totals (day, documents, terms) VALUES (?, ?, ?) "
+                    "ON CONFLICT(day) DO UPDATE SET documents = documents + excluded.documents, "
+                    "terms = terms + excluded.terms",
+                    ((day, documents, terms) for day, (documents, terms) in day_totals.items()),
+                )
+                self._db.executemany(
+                    "INSERT INTO term_days (day, term, tf, df) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(day, term) DO UPDATE SET tf = tf + excluded.tf, df = df + excluded.df",
+                    ((day, term, tf, df) for (day, term), (tf, df) in term_days.items()),
+                )
+        return len(new_documents)
+
+    def _documents_between(self, first, last):
+        return self._db.execute("SELECT COALESCE(SUM(documents), 0) FROM day_totals WHERE day BETWEEN ? AND ?",
+                                (first.isoformat(), last.isoformat())).fetchone()[0]
+
+    # Function to get the terms whose share of articles grew most in the window_days up to `end`
+    # (default: the last day with articles) compared with the window_days before. Returns
+    # (end, list of dicts with term, documents, previous_documents, share, previous_share, change);
+    # without articles in the previous window there is no change, and terms rank by share.
+    def trending(self, end=None, window_days=7, k=20, min_documents=3):
+        if end is None:
+            day_range = self.day_range()
+            if day_range is None:
+                return None, []
+            end = day_range[1]
+        end = _day(end)
+        start = end - timedelta(days=window_days - 1)
+        previous_start = start - timedelta(days=window_days)
+        with self._lock:
+            documents = self._documents_between(start, end)
+            previous_documents = self._documents_between(previous_start, start - timedelta(days=1))
+            # One pass over both windows; terms rare in the current window are dropped in SQLite
+            rows = self._db.execute(
+                "SELECT term, SUM(CASE WHEN day >= ?1 THEN df ELSE 0 END) AS current, "
+                "SUM(CASE WHEN day < ?1 THEN df ELSE 0 END) FROM term_days "
+                "WHERE day BETWEEN ?2 AND ?3 GROUP BY term HAVING current >= ?4",
+                (start.isoformat(), previous_start.isoformat(), end.isoformat(), min_documents),
+            ).fetchall()
+        if not documents:
+            return end, []
+        # Add-one smoothing of the previous share, so terms new in this window get a finite change
+        baseline = 1 / (previous_documents + 1)
+        top = heapq.nlargest(k, rows, key=lambda row: (row[1] / documents / ((row[2] + 1) * baseline), row[1]))
+        return end, [{
+            'term': term,
+            'documents': current,
+            'previous_documents': previous,
+            'share': current / documents,
+            'previous_share': previous / previous_documents if previous_documents else None,
+            'change': current / documents / ((previous + 1) * baseline) if previous_documents else None,
+        } for term, current, previous in top]
+
+    # Function to get the rolling share of articles containing each term over the window_days up to
+    # each of the `days` days ending at `end`. Returns (list of days, article counts per window,
+    # {term: list of shares}).
+    def rolling_shares(self, terms, end=None, days=60, window_days=7):
+        terms = list(terms)
+        if end is None:
+            day_range = self.day_range()
+            if day_range is None:
+                return [], [], {term: [] for term in terms}
+            end = day_range[1]
+        end = _day(end)
+        first = end - timedelta(days=days + window_days - 2)
+        span = (end - first).days + 1
+        documents = np.zeros(span, dtype=np.int64)
+        frequencies = np.zeros((len(terms), span), dtype=np.int64)
+        positions = {term: i for i, term in enumerate(terms)}
+        with self._lock:
+            for day, count in self._db.execute("SELECT day, documents FROM day_totals WHERE day BETWEEN ? AND ?",
+                                               (first.isoformat(), end.isoformat())):
+                documents[(date.fromisoformat(day) - first).days] = count
+            for start in range(0, len(terms), _QUERY_CHUNK):
+                chunk = terms[start:start + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                for term, day, df in self._db.execute(
+                        f"SELECT term, day, df FROM term_days WHERE term IN ({placeholders}) AND day BETWEEN ? AND ?",
+                        chunk + [first.isoformat(), end.isoformat()]):
+                    frequencies[positions[term], (date.fromisoformat(day) - first).days] = df
+
+        # Rolling sums over window_days as differences of cumulative sums
+        def rolling(values):
+            cumulative = np.concatenate([np.zeros(values.shape[:-1] + (1,), dtype=np.int64), values.cumsum(axis=-1)], axis=-1)
+            return cumulative[..., window_days:] - cumulative[..., :-window_days]
+
+        window_documents = rolling(documents)
+        # Windows without any articles have no share (NaN), rather than a share of 0
+        shares = np.where(window_documents > 0, rolling(frequencies) / np.maximum(window_documents, 1), np.nan)
+        labels = [(first + timedelta(days=window_days - 1 + i)).isoformat() for i in range(days)]
+        return labels, window_documents.tolist(), {term: shares[i].tolist() for i, term in enumerate(terms)}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fixture_server import FixtureServer  # noqa: E402
+
+# Shared test setup: the library and the benchmark helpers (fixture server,
+# synthetic corpus) are importable, and `fixture_server` is a local NYT-like
+# HTTP server started once per test module.
+
+
+@pytest.fixture(scope='module')
+def fixture_server():
+    with FixtureServer() as server:
+        yield server
@@ -0,0 +1,31 @@
+from crawl_frontier import ARTICLE, FAILED, PENDING, CrawlFrontier
+
+# Failed URLs stay pending on disk but are only queued again by the next
+# resume(), and are given up after max_retries runs.
+
+
+def test_failed_url_is_retried_on_the_next_run_only(tmp_path):
+    frontier = CrawlFrontier(str(tmp_path / 'frontier.sqlite'), max_retries=3)
+    frontier.add_many(['http://a/1', 'http://a/2'], ARTICLE)
+    assert frontier.pop(ARTICLE) == 'http://a/1'
+    frontier.mark_failed('http://a/1')
+    assert frontier.pop_many(ARTICLE, 10) == ['http://a/2']
+    assert frontier.pop(ARTICLE) is None
+    assert frontier.counts()[(ARTICLE, PENDING)] == 2
+
+    frontier.resume()
+    assert frontier.pop_many(ARTICLE, 10) == ['http://a/1', 'http://a/2']
+    frontier.close()
+
+
+def test_url_is_given_up_after_max_retries(tmp_path):
+    frontier = CrawlFrontier(str(tmp_path / 'frontier.sqlite'), max_retries=2)
+    frontier.add('http://a/1', ARTICLE)
+    for _ in range(2):
+        frontier.resume()
+        assert frontier.pop(ARTICLE) == 'http://a/1'
+        frontier.mark_failed('http://a/1')
+    frontier.resume()
+    assert frontier.pop(ARTICLE) is None
+    assert frontier.counts() == {(ARTICLE, FAILED): 1}
+    frontier.close()
@@ -0,0 +1,32 @@
+from dedup import NearDuplicateDetector
+
+# remove() only takes back documents indexed during the current run, so a
+# failed save never deletes the signature of an article saved on an earlier run.
+
+STORY = "The city council approved the new budget on Tuesday after a long debate over school funding and transit. " * 3
+OTHER = "A storm moved up the coast overnight, closing schools and cutting power to thousands of homes in the region. " * 3
+
+
+def test_remove_takes_back_a_signature_added_in_this_run(tmp_path):
+    detector = NearDuplicateDetector(str(tmp_path / 'dedup.sqlite'))
+    assert detector.check('http://a/1', STORY) is None
+    detector.remove(['http://a/1'])
+    assert len(detector) == 0
+    assert detector.check('http://a/2', STORY) is None
+    detector.close()
+
+
+def test_remove_keeps_signatures_from_earlier_runs(tmp_path):
+    path = str(tmp_path / 'dedup.sqlite')
+    detector = NearDuplicateDetector(path)
+    detector.check('http://a/1', STORY)
+    detector.close()
+
+    detector = NearDuplicateDetector(path)
+    detector.reset_stats()
+    assert detector.check('http://a/1', STORY) is None
+    assert detector.check('http://a/3', OTHER) is None
+    detector.remove(['http://a/1', 'http://a/3'])
+    assert len(detector) == 1
+    assert detector.check('http://a/2', STORY)[0] == 'http://a/1'
+    detector.close()
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+import requests
+
+from fetcher import CrawlNotAllowed, Fetcher
+from fixture_server import article_path
+
+# Fetcher against the local fixture server: per-host rate limit and
+# concurrency cap, retries with exponential backoff on 5xx, and fetch_many
+# yielding results in input order.
+
+
+def make_fetcher(**options):
+    options.setdefault('rate_per_host', 0)
+    options.setdefault('delay_base', 0.05)
+    return Fetcher(**options)
+
+
+def test_rate_limit_spaces_requests_to_one_host(fixture_server):
+    urls = [fixture_server.url(article_path('world', i)) for i in range(6)]
+    with make_fetcher(rate_per_host=20, concurrency_per_host=6) as fetcher:
+        started = time.monotonic()
+        results = list(fetcher.fetch_many(urls))
+        elapsed = time.monotonic() - started
+    assert all(error is None for url, text, error in results)
+    # Six requests 50 ms apart: the last one cannot start before 250 ms
+    assert elapsed >= 0.25
+
+
+def test_concurrency_cap_per_host(fixture_server):
+    fixture_server.httpd.latency = 0.1
+    try:
+        urls = [fixture_server.url(article_path('us', i)) for i in range(4)]
+        with make_fetcher(max_workers=4, concurrency_per_host=1) as fetcher:
+            started = time.monotonic()
+            list(fetcher.fetch_many(urls))
+            serial = time.monotonic() - started
+        with make_fetcher(max_workers=4, concurrency_per_host=4) as fetcher:
+            started = time.monotonic()
+            list(fetcher.fetch_many(urls))
+            parallel = time.monotonic() - started
+    finally:
+        fixture_server.httpd.latency = 0.0
+    assert serial >= 0.4
+    assert parallel < serial / 2
+
+
+def test_retries_5xx_with_backoff(fixture_server):
+    with make_fetcher(max_retries=3, delay_base=0.1) as fetcher:
+        started = time.monotonic()
+        text = fetcher.fetch(fixture_server.url('/flaky/2/retry'))
+        elapsed = time.monotonic() - started
+    assert 'Attempt 3' in text
+    assert fixture_server.httpd.path_requests['/flaky/2/retry'] == 3
+    # Backoff of 0.1 s, then 0.2 s
+    assert elapsed >= 0.3
+
+
+def test_gives_up_after_max_retries(fixture_server):
+    with make_fetcher(max_retries=2) as fetcher:
+        with pytest.raises(requests.HTTPError):
+            fetcher.fetch(fixture_server.url('/flaky/5/give-up'))
+    assert fixture_server.httpd.path_requests['/flaky/5/give-up'] == 2
+
+
+def test_fetch_many_keeps_input_order(fixture_server):
+    urls = [fixture_server.url(article_path(section, i)) for i in range(5) for section in ('science', 'sports')]
+    urls.insert(3, fixture_server.url('/status/404'))
+    urls.insert(6, fixture_server.url('/private/admin'))
+    with make_fetcher(max_workers=8, max_retries=1,
+                      is_allowed=lambda url: '/private/' not in url) as fetcher:
+        results = list(fetcher.fetch_many(urls))
+    assert [url for url, text, error in results] == urls
+    for url, text, error in results:
+        if url.endswith('/status/404'):
+            assert isinstance(error, requests.HTTPError)
+        elif '/private/' in url:
+            assert isinstance(error, CrawlNotAllowed)
+        else:
+            assert error is None
+            assert f"Story {url.rsplit('story-', 1)[1].split('.')[0]}" in text
@@ -0,0 +1,78 @@
+import json
+import time
+
+import pytest
+import requests
+
+from fetcher import Fetcher
+from fixture_server import API_DOCS_PER_PAGE, API_PATH, FixtureServer
+from nyt_api import ArticleSearchClient
+
+# ArticleSearchClient against the fixture server's mock Article Search API:
+# the token bucket keeps the request rate within budget, a 429 pauses the
+# client and the run resumes with every document, and documents repeated
+# across pages are yielded once.
+
+
+def make_client(server, **options):
+    fetcher = Fetcher(rate_per_host=0, max_workers=8, concurrency_per_host=8)
+    return ArticleSearchClient(fetcher, 'test-key', endpoint=server.url(API_PATH), **options)
+
+
+def test_documents_repeated_across_pages_are_yielded_once(fixture_server):
+    client = make_client(fixture_server, rate_per_minute=6000, burst=5, prefetch=2)
+    docs = list(client.iter_documents('news', max_documents=3 * (API_DOCS_PER_PAGE - 1) + 1))
+    ids = [doc['_id'] for doc in docs]
+    assert len(ids) == len(set(ids)) == 28
+    # Page order is kept: the fixture numbers its documents consecutively
+    assert ids == [f"nyt://article/{i}" for i in range(28)]
+    assert client.duplicates_skipped == 2
+
+
+def test_token_bucket_limits_request_rate(fixture_server):
+    # 10 requests per second with no burst: 5 pages cannot take less than 0.4 s
+    client = make_client(fixture_server, rate_per_minute=600, burst=1, prefetch=4)
+    started = time.monotonic()
+    docs = list(client.iter_documents('news', max_documents=5 * (API_DOCS_PER_PAGE - 1) + 1))
+    elapsed = time.monotonic() - started
+    assert len(docs) == 46
+    assert client.requests_made == 5
+    assert elapsed >= 0.4
+
+
+def test_throttled_requests_back_off_and_resume():
+    with FixtureServer(api_rate_limit=2) as server:
+        client = make_client(server, rate_per_minute=6000, burst=5, prefetch=4, backoff_base=0.1)
+        docs = list(client.iter_documents('news', max_documents=6 * (API_DOCS_PER_PAGE - 1) + 1))
+        assert len(docs) == 55
+        assert client.throttled > 0
+        assert client.throttled == server.httpd.api_throttled
+        assert client.requests_made == server.httpd.api_requests + server.httpd.api_throttled
+        assert server.httpd.api_max_per_second <= 2
+
+
+def test_missing_api_key_is_an_error(fixture_server):
+    fetcher = Fetcher(rate_per_host=0)
+    client = ArticleSearchClient(fetcher, '', endpoint=fixture_server.url(API_PATH), rate_per_minute=6000)
+    with pytest.raises(requests.HTTPError):
+        list(client.iter_documents('news', max_documents=1))
+
+
+class _PagesFetcher:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def request_text(self, url, params=None, before_request=None):
+        before_request()
+        page = params['page']
+        docs = self.pages[page] if page < len(self.pages) else []
+        return json.dumps({'response': {'docs': docs}})
+
+
+def test_documents_without_url_or_id_are_all_kept():
+    pages = [[{'headline': {'main': 'a'}}, {'headline': {'main': 'b'}}, {'_id': 'x'}],
+             [{'headline': {'main': 'c'}}, {'_id': 'x'}]]
+    client = ArticleSearchClient(_PagesFetcher(pages), 'key', rate_per_minute=6000, prefetch=0)
+    docs = list(client.iter_documents('news'))
+    assert [doc.get('_id') or doc['headline']['main'] for doc in docs] == ['a', 'b', 'x', 'c']
+    assert client.duplicates_skipped == 1
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+from bench_out_of_core import ROOT, run
+from out_of_core import OutOfCoreTfIdf
+
+# The out-of-core analysis stays within its memory limit: a synthetic article
+# store (with cached token lists, so NLTK is not needed) is analyzed in a fresh
+# interpreter that reports its peak RSS.
+
+MEMORY_LIMIT_MB = 128  # The in-memory analysis of this store peaks near 280 MB
+
+BUILD_STORE = """
+import sys
+from bench_out_of_core import build_store
+build_store(sys.argv[1], int(sys.argv[2]), 300, 20000)
+"""
+
+
+def test_out_of_core_peak_rss_stays_within_the_limit(tmp_path):
+    data_dir = str(tmp_path)
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, 'benchmarks'))
+    subprocess.run([sys.executable, '-c', BUILD_STORE, data_dir, '5000'], cwd=ROOT, env=env, check=True)
+    result, detail = run(data_dir, 'out-of-core', MEMORY_LIMIT_MB)
+    assert result is not None, detail
+    assert result['peak_rss'] <= MEMORY_LIMIT_MB * 2 ** 20
+    with open(os.path.join(data_dir, 'out-of-core.csv'), encoding='utf-8') as f:
+        assert sum(1 for _ in f) > 5000
+
+
+def test_close_can_be_called_twice(tmp_path):
+    engine = OutOfCoreTfIdf(str(tmp_path), n_features=1024)
+    engine.add_chunk([['a', 'b'], ['b', 'c']])
+    engine.close()
+    engine.close()
+    assert not os.path.exists(engine.spill_dir)
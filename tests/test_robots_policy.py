@@ -0,0 +1,97 @@
+import os
+import time
+
+import pytest
+
+from robots_policy import RobotsPolicy, compile_rules
+
+# RobotsPolicy against the fixture server's robots.txt: longest-match
+# Allow/Disallow decisions, the deny-all fallback when robots.txt cannot be
+# read, and the retry of a failed download after retry_interval.
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36'
+
+FIXTURE_DECISIONS = {
+    '/': True,
+    '/2025/05/01/world/story-1.html': True,
+    '/private/admin': False,
+    '/private/public/page': True,
+    '/search?q=news': False,
+    '/section/world?query=x': False,
+    '/reports/annual.pdf': False,
+    '/reports/annual.pdf?download=1': True,
+}
+
+
+@pytest.mark.parametrize('path, expected', FIXTURE_DECISIONS.items())
+def test_fixture_decisions(fixture_server, tmp_path, path, expected):
+    policy = RobotsPolicy(fixture_server.url('/robots.txt'), USER_AGENT, cache_path=str(tmp_path / 'robots.txt'))
+    assert policy.allows(fixture_server.url(path)) is expected
+
+
+def test_agent_group_disallows_everything(fixture_server):
+    assert not RobotsPolicy(fixture_server.url('/robots.txt'), 'GPTBot/1.0').allows(fixture_server.url('/'))
+
+
+def test_longest_match_wins_and_allow_wins_ties():
+    rules = compile_rules("User-agent: *\nDisallow: /a\nAllow: /a/b\nDisallow: /a/b/c\n"
+                          "Allow: /tie\nDisallow: /tie\n", 'bot')
+    assert not rules.allows('/a/x')
+    assert rules.allows('/a/b/x')
+    assert not rules.allows('/a/b/c/x')
+    assert rules.allows('/tie')
+
+
+def test_disk_cache_is_used_within_ttl(fixture_server, tmp_path):
+    cache_path = str(tmp_path / 'robots.txt')
+    RobotsPolicy(fixture_server.url('/robots.txt'), USER_AGENT, cache_path=cache_path).refresh()
+    requests_before = fixture_server.request_count
+    policy = RobotsPolicy(fixture_server.url('/robots.txt'), USER_AGENT, cache_path=cache_path)
+    assert not policy.allows(fixture_server.url('/private/admin'))
+    assert fixture_server.request_count == requests_before
+
+
+@pytest.mark.parametrize('status, allowed', [(503, False), (500, False), (401, False), (403, False), (404, True)])
+def test_unreadable_robots_txt(fixture_server, status, allowed):
+    policy = RobotsPolicy(fixture_server.url(f'/status/{status}'), USER_AGENT)
+    assert policy.allows(fixture_server.url('/2025/05/01/world/story-1.html')) is allowed
+    assert (policy.load_error is not None) == (status >= 500)
+
+
+def test_failed_download_is_retried_after_retry_interval(fixture_server):
+    # The first request fails with 503, the next one succeeds (with no rules)
+    policy = RobotsPolicy(fixture_server.url('/flaky/1/robots.txt'), USER_AGENT, retry_interval=0.2)
+    url = fixture_server.url('/private/admin')
+    assert not policy.allows(url)
+    assert policy.load_error is not None
+    assert not policy.allows(url)
+    assert fixture_server.httpd.path_requests['/flaky/1/robots.txt'] == 1
+    time.sleep(0.25)
+    assert policy.allows(url)
+    assert policy.load_error is None
+    assert fixture_server.httpd.path_requests['/flaky/1/robots.txt'] == 2
+
+
+def test_failed_refresh_keeps_loaded_rules(tmp_path):
+    texts = iter(["User-agent: *\nDisallow: /private/\n"])
+
+    def fetch_text(url):
+        text = next(texts, None)
+        if text is None:
+            raise OSError("connection refused")
+        return text
+
+    policy = RobotsPolicy('http://example.test/robots.txt', USER_AGENT, ttl=0, retry_interval=60,
+                          cache_path=str(tmp_path / 'robots.txt'), fetch_text=fetch_text)
+    assert policy.allows('http://example.test/page')
+    # The TTL has passed and the download fails: the rules loaded before still apply
+    assert policy.allows('http://example.test/other')
+    assert not policy.allows('http://example.test/private/x')
+    assert isinstance(policy.load_error, OSError)
+
+    # After a restart, the expired disk copy applies instead of denying everything
+    restarted = RobotsPolicy('http://example.test/robots.txt', USER_AGENT, ttl=0,
+                             cache_path=str(tmp_path / 'robots.txt'), fetch_text=fetch_text)
+    assert os.path.exists(restarted.cache_path)
+    assert restarted.allows('http://example.test/page')
+    assert not restarted.allows('http://example.test/private/x')
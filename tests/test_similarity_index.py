@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+
+import similarity_index
+from similarity_index import SimilarityIndex
+from tfidf_engine import build_document_term_matrix
+
+# Saving appends one segment per save() and compacts them into a base segment;
+# a compaction interrupted before the old segments are removed must not load
+# any document or term twice.
+
+
+def add_batch(index, batch):
+    urls = [f'http://a/{batch}-{i}' for i in range(3)]
+    matrix = build_document_term_matrix([[f'common{i}', f'term{batch}', f'word{batch}-{i}'] for i in range(3)])
+    index.add_matrix(urls, matrix, np.ones(len(matrix.indices)))
+    return urls
+
+
+def test_interrupted_compaction_is_loaded_once(tmp_path, monkeypatch):
+    path = str(tmp_path / 'index')
+    index = SimilarityIndex(path, max_segments=3)
+    urls = []
+    for batch in range(3):
+        urls += add_batch(index, batch)
+        index.save()
+    assert len(os.listdir(path)) == 3
+
+    # The process dies after writing the compacted segment, before removing the old ones
+    urls += add_batch(index, 3)
+    with monkeypatch.context() as patch:
+        patch.setattr(similarity_index.os, 'remove', lambda path: None)
+        index.save()
+    assert len(os.listdir(path)) == 4
+
+    reloaded = SimilarityIndex(path, max_segments=3)
+    assert reloaded.urls == urls
+    assert len(reloaded._term_list) == len(set(reloaded._term_list)) == len(index._term_list)
+    assert reloaded.similar_to('http://a/3-0') == index.similar_to('http://a/3-0')
+    assert len(os.listdir(path)) == 1
+
+
+def test_segments_are_appended_and_compacted(tmp_path):
+    path = str(tmp_path / 'index')
+    index = SimilarityIndex(path, max_segments=2)
+    urls = []
+    for batch in range(3):
+        urls += add_batch(index, batch)
+        index.save()
+    assert len(os.listdir(path)) == 1
+    urls += add_batch(index, 3)
+    index.save()
+    assert len(os.listdir(path)) == 2
+    assert SimilarityIndex(path).urls == urls
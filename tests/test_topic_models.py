@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from topic_models import TopicModeler
+
+# transform() gives the same distributions on every call without moving the
+# training random stream, and the keys trained on are kept in SQLite and only
+# committed by save().
+
+DOCS = [
+    ['economy', 'market', 'stocks', 'rates', 'bank'],
+    ['election', 'vote', 'senate', 'campaign', 'poll'],
+    ['market', 'bank', 'inflation', 'rates', 'economy'],
+    ['campaign', 'senate', 'vote', 'governor', 'poll'],
+] * 5
+
+
+@pytest.mark.parametrize('method', ['lda', 'nmf'])
+def test_transform_is_repeatable_and_leaves_the_training_stream_alone(method):
+    modeler = TopicModeler(method, 2, random_state=0)
+    modeler.partial_fit(DOCS)
+    state = modeler.model.rng.bit_generator.state
+    first = modeler.transform(DOCS[:3])
+    assert np.array_equal(first, modeler.transform(DOCS[:3]))
+    assert np.allclose(first[1], modeler.transform(DOCS[1:2])[0], atol=1e-3)
+    assert modeler.model.rng.bit_generator.state == state
+
+
+def test_trained_keys_are_stored_incrementally(tmp_path):
+    model_path, keys_path = str(tmp_path / 'model.npz'), str(tmp_path / 'keys.sqlite')
+    keys = [f'http://a/{i}' for i in range(len(DOCS))]
+    modeler = TopicModeler('lda', 2, keys_path=keys_path, random_state=0)
+    modeler.partial_fit(DOCS[:10], keys=keys[:10])
+    assert len(modeler.trained_keys.pending) == 10
+    modeler.save(model_path)
+    assert not modeler.trained_keys.pending
+    assert 'trained_keys' not in np.load(model_path).files
+    modeler.close()
+
+    modeler = TopicModeler.load(model_path, keys_path=keys_path)
+    seen = modeler.model.n_docs_seen_
+    modeler.partial_fit(DOCS, keys=keys)
+    assert modeler.model.n_docs_seen_ == seen + 10
+    assert modeler.trained_keys.unknown(keys) == []
+    assert len(modeler.trained_keys) == len(DOCS)
+    modeler.close()
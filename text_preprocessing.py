@@ -0,0 +1,110 @@
+import re
+from functools import lru_cache
+
+# Compiled text preprocessing pipeline.
+#
+# The stopword set and the lemmatizer are loaded once per pipeline, lemmatization
+# is memoized on the surface form with a bounded LRU, and lowercase / alpha
+# filtering / stopword removal / lemmatization happen in a single pass.
+#
+# Two tokenizer modes are available:
+#   'nltk'  - punkt-based word_tokenize, identical output to the original code
+#   'regex' - precompiled regex over runs of letters; much faster, but splits
+#             contractions differently (e.g. "can't" -> "can", "t")
+#
+# NLTK is only imported when a pipeline is built, and its data packages are
+# checked locally and downloaded only when missing (see ensure_nltk_resources),
+# so importing this module stays cheap.
+
+TOKENIZER_MODES = ('nltk', 'regex')
+DEFAULT_LEMMA_CACHE_SIZE = 65536
+
+# NLTK data packages and the resource path used to check whether each is installed
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+}
+# The regex tokenizer does not need the punkt models
+_MODE_RESOURCES = {
+    'nltk': ('punkt', 'punkt_tab', 'stopwords', 'wordnet'),
+    'regex': ('stopwords', 'wordnet'),
+}
+
+_LETTER_RUN_PATTERN = re.compile(r"[^\W\d_]+")
+# Rough equivalent of word_tokenize's token count: words plus standalone punctuation
+_TOKEN_COUNT_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class PreprocessingPipeline:
+    def __init__(self, mode='nltk', lemma_cache_size=DEFAULT_LEMMA_CACHE_SIZE):
+        if mode not in TOKENIZER_MODES:
+            raise ValueError(f"Unknown tokenizer mode '{mode}'. Expected one of {TOKENIZER_MODES}.")
+        from nltk.corpus import stopwords
+        from nltk.stem import WordNetLemmatizer
+        from nltk.tokenize import word_tokenize
+
+        self.mode = mode
+        self.stop_words = frozenset(stopwords.words('english'))
+        self._lemmatizer = WordNetLemmatizer()
+        self._lemmatize = lru_cache(maxsize=lemma_cache_size)(self._lemmatizer.lemmatize)
+        self._tokenize = word_tokenize if mode == 'nltk' else _LETTER_RUN_PATTERN.findall
+
+    def tokenize(self, document):
+        return self._tokenize(document)
+
+    def __call__(self, document):
+        stop_words = self.stop_words
+        lemmatize = self._lemmatize
+        words = []
+        for token in self._tokenize(document):
+            if not token.isalpha():
+                continue
+            word = token.lower()
+            if word in stop_words:
+                continue
+            words.append(lemmatize(word))
+        return words
+
+    def lemma_cache_info(self):
+        return self._lemmatize.cache_info()
+
+
+_pipelines = {}
+_checked_resources = set()
+
+
+# Function to make sure the NLTK data a tokenizer mode needs is installed. Only
+# packages not found locally are downloaded; returns the names still missing.
+def ensure_nltk_resources(mode='nltk'):
+    import nltk
+
+    missing = []
+    for name in _MODE_RESOURCES.get(mode, NLTK_RESOURCES):
+        if name in _checked_resources:
+            continue
+        try:
+            nltk.data.find(NLTK_RESOURCES[name])
+        except LookupError:
+            try:
+                nltk.download(name, quiet=True)
+                nltk.data.find(NLTK_RESOURCES[name])
+            except Exception:
+                missing.append(name)
+                continue
+        _checked_resources.add(name)
+    return missing
+
+
+# Function to get the shared pipeline for a tokenizer mode, building it on first use
+def get_pipeline(mode='nltk'):
+    pipeline = _pipelines.get(mode)
+    if pipeline is None:
+        pipeline = _pipelines[mode] = PreprocessingPipeline(mode)
+    return pipeline
+
+
+# Function to cheaply count words without running the punkt tokenizer
+def count_words(text):
+    return sum(1 for _ in _TOKEN_COUNT_PATTERN.finditer(text))
@@ -0,0 +1,147 @@
+import math
+import numpy as np
+
+# Vectorized TF-IDF engine.
+#
+# Documents are tokenized once by the caller and packed into a CSR-style sparse
+# document-term matrix (indptr / indices / data NumPy arrays). TF, IDF and the
+# top-k terms per document are then computed as batched array operations. The
+# scores match the original dict-based formulas exactly:
+#   tf(t, d)  = count(t, d) / len(d)
+#   idf(t)    = log(N / (1 + df(t)))
+#   tfidf     = tf * idf
+# Within each row, columns are stored in order of first occurrence in the
+# document, so ties in the top-k selection resolve the same way the old
+# `sorted(dict.items(), reverse=True)` did.
+
+
+class DocumentTermMatrix:
+    def __init__(self, indptr, indices, counts, doc_lengths, terms):
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+        self.doc_lengths = doc_lengths
+        self.terms = terms
+
+    @property
+    def n_docs(self):
+        return len(self.indptr) - 1
+
+    @property
+    def n_terms(self):
+        return len(self.terms)
+
+    # Row index of every stored entry (expands indptr)
+    def row_ids(self):
+        return np.repeat(np.arange(self.n_docs), np.diff(self.indptr))
+
+    def document_frequency(self):
+        return np.bincount(self.indices, minlength=self.n_terms)
+
+
+# Function to build the sparse document-term matrix from pre-tokenized documents
+def build_document_term_matrix(token_lists, vocabulary=None):
+    vocabulary = {} if vocabulary is None else vocabulary
+    doc_lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+    n_docs = len(token_lists)
+
+    # Map every token to a column id in one pass over the corpus
+    flat_ids = np.fromiter(
+        (vocabulary.setdefault(token, len(vocabulary)) for tokens in token_lists for token in tokens),
+        dtype=np.int64,
+        count=int(doc_lengths.sum()),
+    )
+    terms = np.empty(len(vocabulary), dtype=object)
+    for term, idx in vocabulary.items():
+        terms[idx] = term
+
+    if flat_ids.size == 0:
+        indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        empty = np.empty(0, dtype=np.int64)
+        return DocumentTermMatrix(indptr, empty, empty.copy(), doc_lengths, terms)
+
+    # Collapse (document, term) pairs into unique keys and count them
+    flat_rows = np.repeat(np.arange(n_docs, dtype=np.int64), doc_lengths)
+    keys = flat_rows * len(vocabulary) + flat_ids
+    unique_keys, first_positions, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    # Reorder entries by first occurrence; rows stay contiguous since documents are
+    order = np.argsort(first_positions, kind='stable')
+    unique_keys = unique_keys[order]
+    counts = counts[order]
+    rows = unique_keys // len(vocabulary)
+    indices = unique_keys % len(vocabulary)
+
+    indptr = np.zeros(n_docs + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_docs), out=indptr[1:])
+    return DocumentTermMatrix(indptr, indices, counts, doc_lengths, terms)
+
+
+# Function to compute IDF per column as log(N / (1 + df))
+def compute_idf(document_frequency, total_documents):
+    if total_documents == 0:
+        return np.zeros(len(document_frequency), dtype=np.float64)
+    # Only a handful of distinct df values exist, so use math.log on those to
+    # stay bit-identical with the original implementation
+    unique_df, inverse = np.unique(document_frequency, return_inverse=True)
+    idf_values = np.array([math.log(total_documents / (1 + int(df))) for df in unique_df], dtype=np.float64)
+    return idf_values[inverse]
+
+
+# Function to compute the TF of every stored entry
+def compute_tf(matrix):
+    lengths = np.repeat(matrix.doc_lengths, np.diff(matrix.indptr))
+    return matrix.counts / lengths
+
+
+# Function to compute TF-IDF scores for every stored entry of the matrix
+def compute_tf_idf(matrix, idf=None):
+    if idf is None:
+        idf = compute_idf(matrix.document_frequency(), matrix.n_docs)
+    return compute_tf(matrix) * idf[matrix.indices]
+
+
+# Function to select the top-k terms per document, returned as (term, score) lists.
+# Rows are grouped by length (within a factor of two) and padded into dense blocks, where
+# np.partition finds each row's k-th largest score in linear time; only the k selected entries
+# per row are then sorted. Ties keep the first occurrence in the document first.
+def top_k_terms(matrix, scores, k=4):
+    results = [[] for _ in range(matrix.n_docs)]
+    if k <= 0 or len(scores) == 0:
+        return results
+    lengths = np.diff(matrix.indptr)
+    length_classes = np.ceil(np.log2(np.maximum(lengths, 1))).astype(np.int64)
+    length_classes[lengths == 0] = -1
+    for length_class in np.unique(length_classes[length_classes >= 0]).tolist():
+        block_rows = np.flatnonzero(length_classes == length_class)
+        columns = np.arange(lengths[block_rows].max())
+        valid = columns < lengths[block_rows][:, None]
+        positions = np.where(valid, matrix.indptr[block_rows][:, None] + columns, 0)
+        block = np.where(valid, scores[positions], -np.inf)
+        if block.shape[1] > k:
+            kth = -np.partition(-block, k - 1, axis=1)[:, k - 1:k]
+            greater = block > kth
+            # Of the entries tied with the k-th score, take the earliest ones
+            tied = (block == kth) & valid
+            selected = greater | (tied & (np.cumsum(tied, axis=1) <= k - greater.sum(axis=1, keepdims=True)))
+        else:
+            selected = valid
+        block_row_ids, block_columns = np.nonzero(selected)
+        selected_scores = block[block_row_ids, block_columns]
+        order = np.lexsort((block_columns, -selected_scores, block_row_ids))
+        selected_positions = positions[block_row_ids[order], block_columns[order]]
+        for row, col, score in zip(block_rows[block_row_ids[order]].tolist(),
+                                   matrix.indices[selected_positions].tolist(),
+                                   scores[selected_positions].tolist()):
+            results[row].append((matrix.terms[col], score))
+    return results
+
+
+# Function to expand the sparse scores into one {term: score} dict per document
+def score_maps(matrix, scores):
+    maps = []
+    indices = matrix.indices.tolist()
+    values = scores.tolist()
+    for start, end in zip(matrix.indptr[:-1].tolist(), matrix.indptr[1:].tolist()):
+        maps.append({matrix.terms[col]: value for col, value in zip(indices[start:end], values[start:end])})
+    return maps
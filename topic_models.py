@@ -0,0 +1,551 @@
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+from tfidf_engine import build_document_term_matrix
+
+# Corpus-level topic models on the sparse document-term matrix, NumPy only.
+#
+#   NMF        - Frobenius-norm NMF with multiplicative updates. fit() sweeps the
+#                rows in blocks so memory stays proportional to the block, and
+#                partial_fit() keeps the sufficient statistics (W^T W, W^T X) so
+#                new batches refine the topics without revisiting old ones.
+#   OnlineLDA  - minibatch variational Bayes LDA (Hoffman, Blei & Bach, 2010).
+#                Each minibatch runs a batched E-step over all its documents at
+#                once and moves the topic-word parameters with a decaying step.
+#
+# Both stop early: fit() ends when the reconstruction error (NMF) or the
+# training perplexity (LDA) improves by less than `tol` between passes, and the
+# per-document inner loops end when the document-topic weights stop changing.
+# Dense products go through BLAS (multi-threaded where NumPy's BLAS is); sparse
+# products are gathers plus np.add.reduceat / np.bincount over the CSR arrays.
+# transform() returns one topic distribution per document (rows sum to 1).
+#
+# TopicModeler wraps a model with a growing vocabulary, so batches of token
+# lists can be fed in as they arrive, and saves / loads it as one .npz file.
+# Batches may come with a key per document (e.g. its URL); documents with a
+# known key are not fed again. The keys trained on are kept in TrainedKeys, in
+# memory or in a SQLite file next to the model: a batch only looks up and
+# inserts its own keys, and they are committed by save() after the model file
+# is written, so a crash in between at worst trains a batch twice.
+
+DEFAULT_N_TOPICS = 10
+TOPIC_MODEL_METHODS = ('lda', 'nmf')
+_EPS = 1e-12
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+# Function to compute the digamma function elementwise for x > 0. Shifts the
+# argument by 6 with the recurrence, then uses the asymptotic expansion.
+def digamma(x):
+    x = np.asarray(x, dtype=np.float64)
+    shift = 1.0 / x + 1.0 / (x + 1) + 1.0 / (x + 2) + 1.0 / (x + 3) + 1.0 / (x + 4) + 1.0 / (x + 5)
+    x = x + 6.0
+    inv2 = 1.0 / (x * x)
+    series = inv2 * (1.0 / 12 - inv2 * (1.0 / 120 - inv2 * (1.0 / 252 - inv2 * (1.0 / 240 - inv2 / 132))))
+    return np.log(x) - 0.5 / x - series - shift
+
+
+# Function to compute E[log X] for X ~ Dirichlet(alpha), one distribution per row
+def dirichlet_expectation(alpha):
+    return digamma(alpha) - digamma(alpha.sum(axis=1))[:, np.newaxis]
+
+
+# Function to sum per-entry rows (nnz, k) into per-document rows (n_docs, k)
+def _sum_by_row(values, indptr):
+    out = np.zeros((len(indptr) - 1, values.shape[1]), dtype=np.float64)
+    starts = indptr[:-1]
+    nonempty = indptr[1:] > starts
+    if values.shape[0]:
+        # Empty rows are skipped; reduceat then sums each remaining row's contiguous slice
+        out[nonempty] = np.add.reduceat(values, starts[nonempty], axis=0)
+    return out
+
+
+# Function to sum per-entry rows (nnz, k) into per-term columns, returned as (k, n_terms)
+def _sum_by_column(values, indices, n_terms):
+    out = np.empty((values.shape[1], n_terms), dtype=np.float64)
+    for topic in range(values.shape[1]):
+        out[topic] = np.bincount(indices, weights=values[:, topic], minlength=n_terms)
+    return out
+
+
+# Function to yield (row_start, row_stop, indptr, indices, values) blocks of a CSR matrix
+def _row_blocks(matrix, values, block_size):
+    for start in range(0, matrix.n_docs, block_size):
+        stop = min(start + block_size, matrix.n_docs)
+        lo, hi = matrix.indptr[start], matrix.indptr[stop]
+        yield start, stop, matrix.indptr[start:stop + 1] - lo, matrix.indices[lo:hi], values[lo:hi]
+
+
+# Function to turn raw counts into row-normalized (unit L2) term frequencies, the default NMF input
+def normalized_term_frequencies(matrix):
+    values = matrix.counts.astype(np.float64)
+    squares = np.bincount(matrix.row_ids(), weights=values * values, minlength=matrix.n_docs)
+    norms = np.sqrt(squares)
+    norms[norms == 0] = 1.0
+    return values / np.repeat(norms, np.diff(matrix.indptr))
+
+
+def _normalize_rows(weights):
+    totals = weights.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1.0
+    return weights / totals
+
+
+class NMF:
+    def __init__(self, n_topics=DEFAULT_N_TOPICS, max_iter=200, tol=1e-4, transform_iter=20,
+                 update_iter=50, block_size=2048, random_state=0):
+        self.n_topics = n_topics
+        self.max_iter = max_iter
+        self.tol = tol
+        self.transform_iter = transform_iter
+        self.update_iter = update_iter
+        self.block_size = block_size
+        self.rng = np.random.default_rng(random_state)
+        self.components_ = None  # (n_topics, n_terms) topic-term weights H
+        self.wtw_ = None  # accumulated W^T W, (n_topics, n_topics)
+        self.wtx_ = None  # accumulated W^T X, (n_topics, n_terms)
+        self.n_docs_seen_ = 0
+        self.n_iter_ = 0
+        self.reconstruction_err_ = None
+
+    @property
+    def n_terms(self):
+        return 0 if self.components_ is None else self.components_.shape[1]
+
+    def _ensure_terms(self, n_terms, scale):
+        if self.components_ is None:
+            self.components_ = scale * self.rng.random((self.n_topics, n_terms))
+            self.wtw_ = np.zeros((self.n_topics, self.n_topics))
+            self.wtx_ = np.zeros((self.n_topics, n_terms))
+        elif n_terms > self.n_terms:
+            extra = n_terms - self.n_terms
+            self.components_ = np.hstack([self.components_, scale * self.rng.random((self.n_topics, extra))])
+            self.wtx_ = np.hstack([self.wtx_, np.zeros((self.n_topics, extra))])
+
+    def _init_scale(self, matrix, values):
+        cells = max(matrix.n_docs * max(matrix.n_terms, 1), 1)
+        return np.sqrt(max(values.sum() / cells, _EPS) / self.n_topics)
+
+    # Function to solve the document-topic weights W of one block for fixed topics H
+    def _solve_block(self, indptr, indices, values, components, iterations, weights=None):
+        x_ht = _sum_by_row(values[:, np.newaxis] * components.T[indices], indptr)
+        hht = components @ components.T
+        if weights is None:
+            weights = np.full((len(indptr) - 1, self.n_topics), x_ht.mean() / max(hht.mean() * self.n_topics, _EPS))
+        previous = None
+        for _ in range(iterations):
+            weights *= x_ht / (weights @ hht + _EPS)
+            total = weights.sum()
+            if previous is not None and abs(previous - total) <= self.tol * max(previous, _EPS):
+                break
+            previous = total
+        return weights
+
+    def fit(self, matrix, values=None):
+        self.fit_transform(matrix, values)
+        return self
+
+    # Function to fit the topics on a whole matrix and return the document-topic distributions
+    def fit_transform(self, matrix, values=None):
+        values = normalized_term_frequencies(matrix) if values is None else np.asarray(values, dtype=np.float64)
+        self.components_ = None
+        self._ensure_terms(matrix.n_terms, self._init_scale(matrix, values))
+        components = self.components_
+        weights = np.abs(self.rng.standard_normal((matrix.n_docs, self.n_topics))) * self._init_scale(matrix, values)
+        norm_x = float(values @ values)
+        previous_err = None
+        for iteration in range(1, self.max_iter + 1):
+            hht = components @ components.T
+            components_t = components.T
+            wtw = np.zeros((self.n_topics, self.n_topics))
+            wtx = np.zeros((self.n_topics, matrix.n_terms))
+            # W update (row blocks are independent), accumulating W^T W and W^T X for the H update
+            for start, stop, indptr, indices, block_values in _row_blocks(matrix, values, self.block_size):
+                block_weights = weights[start:stop]
+                x_ht = _sum_by_row(block_values[:, np.newaxis] * components_t[indices], indptr)
+                block_weights *= x_ht / (block_weights @ hht + _EPS)
+                rows = np.repeat(np.arange(stop - start), np.diff(indptr))
+                wtw += block_weights.T @ block_weights
+                wtx += _sum_by_column(block_weights[rows] * block_values[:, np.newaxis], indices, matrix.n_terms)
+            # ||X - W H||^2 with the new W and the current H, from the accumulated statistics
+            err = np.sqrt(max(norm_x - 2 * np.sum(wtx * components) + np.sum(wtw * hht), 0.0))
+            components *= wtx / (wtw @ components + _EPS)
+            self.n_iter_ = iteration
+            self.reconstruction_err_ = err
+            if previous_err is not None and previous_err - err <= self.tol * previous_err:
+                break
+            previous_err = err
+        self.wtw_, self.wtx_ = wtw, wtx
+        self.n_docs_seen_ = matrix.n_docs
+        return _normalize_rows(weights)
+
+    # Function to refine the topics with a new batch. W for the batch and H are updated in
+    # turn, with H fitted to the statistics of earlier batches plus the current batch.
+    def partial_fit(self, matrix, values=None):
+        values = normalized_term_frequencies(matrix) if values is None else np.asarray(values, dtype=np.float64)
+        self._ensure_terms(matrix.n_terms, self._init_scale(matrix, values))
+        n_terms = self.n_terms
+        blocks = list(_row_blocks(matrix, values, self.block_size))
+        block_weights = [None] * len(blocks)
+        components = self.components_
+        for iteration in range(1, self.update_iter + 1):
+            wtw = self.wtw_.copy()
+            wtx = self.wtx_.copy()
+            for i, (start, stop, indptr, indices, block_values) in enumerate(blocks):
+                weights = self._solve_block(indptr, indices, block_values, components, self.transform_iter, block_weights[i])
+                rows = np.repeat(np.arange(stop - start), np.diff(indptr))
+                wtw += weights.T @ weights
+                wtx += _sum_by_column(weights[rows] * block_values[:, np.newaxis], indices, n_terms)
+                block_weights[i] = weights
+            updated = components * (wtx / (wtw @ components + _EPS))
+            change = np.abs(updated - components).sum() / max(np.abs(components).sum(), _EPS)
+            components = updated
+            self.n_iter_ = iteration
+            if change <= self.tol:
+                break
+        self.components_ = components
+        self.wtw_, self.wtx_ = wtw, wtx
+        self.n_docs_seen_ += matrix.n_docs
+        return self
+
+    # Function to compute document-topic distributions for fixed topics; deterministic, as
+    # _solve_block starts every document from the same constant weights
+    def transform(self, matrix, values=None):
+        values = normalized_term_frequencies(matrix) if values is None else np.asarray(values, dtype=np.float64)
+        weights = np.zeros((matrix.n_docs, self.n_topics))
+        for start, stop, indptr, indices, block_values in _row_blocks(matrix, values, self.block_size):
+            keep = indices < self.n_terms
+            if not keep.all():
+                indptr, indices, block_values = _drop_entries(indptr, indices, block_values, keep)
+            weights[start:stop] = self._solve_block(indptr, indices, block_values, self.components_, self.transform_iter)
+        return _normalize_rows(weights)
+
+    def topic_term_weights(self):
+        return _normalize_rows(self.components_)
+
+
+class OnlineLDA:
+    def __init__(self, n_topics=DEFAULT_N_TOPICS, doc_topic_prior=None, topic_word_prior=None,
+                 learning_offset=10.0, learning_decay=0.7, batch_size=128, max_doc_iter=100,
+                 doc_tol=1e-3, max_epochs=20, tol=1e-3, random_state=0):
+        self.n_topics = n_topics
+        self.alpha = 1.0 / n_topics if doc_topic_prior is None else doc_topic_prior
+        self.eta = 1.0 / n_topics if topic_word_prior is None else topic_word_prior
+        self.learning_offset = learning_offset
+        self.learning_decay = learning_decay
+        self.batch_size = batch_size
+        self.max_doc_iter = max_doc_iter
+        self.doc_tol = doc_tol
+        self.max_epochs = max_epochs
+        self.tol = tol
+        self.rng = np.random.default_rng(random_state)
+        self.components_ = None  # (n_topics, n_terms) variational topic-term parameters (lambda)
+        self.n_batches_ = 0
+        self.n_docs_seen_ = 0
+        self.n_iter_ = 0
+        self.perplexity_ = None
+
+    @property
+    def n_terms(self):
+        return 0 if self.components_ is None else self.components_.shape[1]
+
+    def _ensure_terms(self, n_terms):
+        if self.components_ is None:
+            self.components_ = self.rng.gamma(100.0, 0.01, (self.n_topics, n_terms))
+        elif n_terms > self.n_terms:
+            extra = self.rng.gamma(100.0, 0.01, (self.n_topics, n_terms - self.n_terms))
+            self.components_ = np.hstack([self.components_, extra])
+
+    # Batched E-step: variational document-topic parameters (gamma) for every document of a
+    # block at once, plus the block's sufficient statistics for the topic-term update. Training
+    # starts gamma at random; inference (want_sstats=False) starts it at the mean of that
+    # distribution, so a document always gets the same distribution and the random stream
+    # used for training is left alone.
+    def _e_step(self, indptr, indices, counts, exp_elog_beta, want_sstats=True):
+        n_docs = len(indptr) - 1
+        rows = np.repeat(np.arange(n_docs), np.diff(indptr))
+        beta_entries = exp_elog_beta[:, indices].T  # (nnz, n_topics)
+        if want_sstats:
+            gamma = self.rng.gamma(100.0, 0.01, (n_docs, self.n_topics))
+        else:
+            gamma = np.ones((n_docs, self.n_topics))
+        exp_elog_theta = np.exp(dirichlet_expectation(gamma))
+        for _ in range(self.max_doc_iter):
+            phinorm = np.einsum('ij,ij->i', exp_elog_theta[rows], beta_entries) + 1e-100
+            new_gamma = self.alpha + exp_elog_theta * _sum_by_row(beta_entries * (counts / phinorm)[:, np.newaxis], indptr)
+            # Stop once every document's mean change is below the threshold
+            change = np.abs(new_gamma - gamma).mean(axis=1).max() if n_docs else 0.0
+            gamma = new_gamma
+            exp_elog_theta = np.exp(dirichlet_expectation(gamma))
+            if change < self.doc_tol:
+                break
+        if not want_sstats:
+            return gamma, None
+        phinorm = np.einsum('ij,ij->i', exp_elog_theta[rows], beta_entries) + 1e-100
+        sstats = _sum_by_column(exp_elog_theta[rows] * (counts / phinorm)[:, np.newaxis], indices, exp_elog_beta.shape[1])
+        return gamma, sstats * exp_elog_beta
+
+    # Function to estimate log p(words) of a block from its gamma and the current topics
+    def _log_likelihood(self, indptr, indices, counts, gamma):
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        theta = _normalize_rows(gamma)
+        beta = _normalize_rows(self.components_)
+        word_probs = np.einsum('ij,ji->i', theta[rows], beta[:, indices])
+        return float(counts @ np.log(word_probs + 1e-100))
+
+    # Function to run one minibatch update; returns the batch's log-likelihood (before the update)
+    def _update_batch(self, indptr, indices, counts, total_docs):
+        exp_elog_beta = np.exp(dirichlet_expectation(self.components_))
+        gamma, sstats = self._e_step(indptr, indices, counts, exp_elog_beta)
+        log_likelihood = self._log_likelihood(indptr, indices, counts, gamma)
+        rho = (self.learning_offset + self.n_batches_) ** -self.learning_decay
+        batch_docs = len(indptr) - 1
+        self.components_ *= 1 - rho
+        self.components_ += rho * (self.eta + total_docs / max(batch_docs, 1) * sstats)
+        self.n_batches_ += 1
+        return log_likelihood
+
+    def _pass(self, matrix, total_docs, order=None):
+        counts = matrix.counts.astype(np.float64)
+        log_likelihood = 0.0
+        if order is None:
+            batches = _row_blocks(matrix, counts, self.batch_size)
+        else:
+            batches = (_select_rows(matrix, counts, rows) for rows in np.array_split(order, max(1, -(-len(order) // self.batch_size))))
+        for _, _, indptr, indices, values in batches:
+            log_likelihood += self._update_batch(indptr, indices, values, total_docs)
+        total_words = counts.sum()
+        return float(np.exp(-log_likelihood / total_words)) if total_words else float('inf')
+
+    def fit(self, matrix):
+        self.fit_transform(matrix)
+        return self
+
+    # Function to fit the topics with repeated minibatch passes until the perplexity settles,
+    # and return the document-topic distributions
+    def fit_transform(self, matrix):
+        self.components_ = None
+        self.n_batches_ = 0
+        self._ensure_terms(matrix.n_terms)
+        previous = None
+        for epoch in range(1, self.max_epochs + 1):
+            perplexity = self._pass(matrix, matrix.n_docs, self.rng.permutation(matrix.n_docs))
+            self.n_iter_ = epoch
+            self.perplexity_ = perplexity
+            if previous is not None and previous - perplexity <= self.tol * previous:
+                break
+            previous = perplexity
+        self.n_docs_seen_ = matrix.n_docs
+        return self.transform(matrix)
+
+    # Function to update the topics with a new batch of documents, one minibatch pass
+    def partial_fit(self, matrix):
+        self._ensure_terms(matrix.n_terms)
+        self.n_docs_seen_ += matrix.n_docs
+        self.perplexity_ = self._pass(matrix, self.n_docs_seen_)
+        return self
+
+    # Function to compute document-topic distributions for fixed topics
+    def transform(self, matrix):
+        counts = matrix.counts.astype(np.float64)
+        exp_elog_beta = np.exp(dirichlet_expectation(self.components_))
+        distributions = np.zeros((matrix.n_docs, self.n_topics))
+        for start, stop, indptr, indices, values in _row_blocks(matrix, counts, self.batch_size):
+            keep = indices < self.n_terms
+            if not keep.all():
+                indptr, indices, values = _drop_entries(indptr, indices, values, keep)
+            gamma, _ = self._e_step(indptr, indices, values, exp_elog_beta, want_sstats=False)
+            distributions[start:stop] = _normalize_rows(gamma)
+        return distributions
+
+    def topic_term_weights(self):
+        return _normalize_rows(self.components_)
+
+
+# Function to gather arbitrary rows of a CSR matrix into a compact block
+def _select_rows(matrix, values, rows):
+    rows = np.sort(rows)
+    starts, stops = matrix.indptr[rows], matrix.indptr[rows + 1]
+    lengths = stops - starts
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+    return 0, len(rows), indptr, matrix.indices[positions], values[positions]
+
+
+# Function to drop masked entries from a CSR block, keeping the row structure
+def _drop_entries(indptr, indices, values, keep):
+    kept_per_row = np.bincount(np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))[keep], minlength=len(indptr) - 1)
+    new_indptr = np.zeros(len(indptr), dtype=np.int64)
+    np.cumsum(kept_per_row, out=new_indptr[1:])
+    return new_indptr, indices[keep], values[keep]
+
+
+# Function to build a topic model by method name ('lda' or 'nmf')
+def make_topic_model(method='lda', n_topics=DEFAULT_N_TOPICS, **options):
+    if method == 'lda':
+        return OnlineLDA(n_topics, **options)
+    if method == 'nmf':
+        return NMF(n_topics, **options)
+    raise ValueError(f"Unknown topic model '{method}'. Expected one of {TOPIC_MODEL_METHODS}.")
+
+
+class TrainedKeys:
+    def __init__(self, path=None):
+        self.path = path
+        self.pending = set()
+        self._memory = set()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS trained_keys (key TEXT PRIMARY KEY)")
+
+    def __len__(self):
+        if self._db is None:
+            return len(self._memory) + len(self.pending)
+        return self._db.execute("SELECT COUNT(*) FROM trained_keys").fetchone()[0] + len(self.pending)
+
+    # Function to filter keys down to the ones not trained on, keeping their order
+    def unknown(self, keys):
+        keys = [key for key in dict.fromkeys(keys) if key not in self.pending]
+        if self._db is None:
+            return [key for key in keys if key not in self._memory]
+        known = set()
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[start:start + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            known.update(row[0] for row in self._db.execute(
+                f"SELECT key FROM trained_keys WHERE key IN ({placeholders})", chunk))
+        return [key for key in keys if key not in known]
+
+    def add(self, keys):
+        self.pending.update(keys)
+
+    # Function to record the pending keys as trained on
+    def commit(self):
+        if self._db is None:
+            self._memory.update(self.pending)
+        else:
+            with self._db:
+                self._db.executemany("INSERT OR IGNORE INTO trained_keys (key) VALUES (?)",
+                                     ((key,) for key in self.pending))
+        self.pending = set()
+
+    def clear(self):
+        self.pending = set()
+        self._memory = set()
+        if self._db is not None:
+            with self._db:
+                self._db.execute("DELETE FROM trained_keys")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class TopicModeler:
+    def __init__(self, method='lda', n_topics=DEFAULT_N_TOPICS, keys_path=None, **options):
+        self.method = method
+        self.n_topics = n_topics
+        self.model = make_topic_model(method, n_topics, **options)
+        self.vocabulary = {}
+        self.trained_keys = TrainedKeys(keys_path)
+
+    @property
+    def is_fitted(self):
+        return self.model.components_ is not None
+
+    # Function to build a matrix over the model vocabulary; unknown terms are added when grow is set
+    # and dropped otherwise
+    def matrix(self, token_lists, grow=True):
+        if grow:
+            return build_document_term_matrix(token_lists, self.vocabulary)
+        vocabulary = self.vocabulary
+        known = [[token for token in tokens if token in vocabulary] for tokens in token_lists]
+        return build_document_term_matrix(known, dict(vocabulary))
+
+    # Function to update the model with a batch; with keys, documents already trained on are skipped
+    def partial_fit(self, token_lists, keys=None):
+        if keys is not None:
+            batch = dict(zip(keys, token_lists))
+            new_keys = self.trained_keys.unknown(list(batch))
+            token_lists = [batch[key] for key in new_keys]
+            self.trained_keys.add(new_keys)
+        if token_lists:
+            self.model.partial_fit(self.matrix(token_lists))
+        return self
+
+    def fit_transform(self, token_lists):
+        self.vocabulary = {}
+        self.trained_keys.clear()
+        return self.model.fit_transform(self.matrix(token_lists))
+
+    def transform(self, token_lists):
+        return self.model.transform(self.matrix(token_lists, grow=False))
+
+    def terms(self):
+        terms = [None] * len(self.vocabulary)
+        for term, idx in self.vocabulary.items():
+            terms[idx] = term
+        return terms
+
+    # Function to list each topic's top terms as (term, weight) pairs
+    def topic_terms(self, k=10):
+        weights = self.model.topic_term_weights()
+        terms = self.terms()
+        k = min(k, weights.shape[1])
+        top = np.argpartition(-weights, k - 1, axis=1)[:, :k] if k else np.empty((weights.shape[0], 0), dtype=np.int64)
+        topics = []
+        for topic, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-weights[topic, candidates], kind='stable')]
+            topics.append([(terms[idx], float(weights[topic, idx])) for idx in ordered])
+        return topics
+
+    # Function to write the model to one .npz file, then commit the keys trained on since the last save
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        state = {
+            'method': self.method,
+            'n_topics': self.n_topics,
+            'n_docs_seen': self.model.n_docs_seen_,
+            'n_batches': getattr(self.model, 'n_batches_', 0),
+            'terms': self.terms(),
+        }
+        arrays = {'components': self.model.components_}
+        if self.method == 'nmf':
+            arrays['wtw'] = self.model.wtw_
+            arrays['wtx'] = self.model.wtx_
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, state=np.array(json.dumps(state)), **arrays)
+        os.replace(tmp_path, path)
+        self.trained_keys.commit()
+
+    # Function to read a model saved by save(); keys saved inside older model files are moved to the key store
+    @classmethod
+    def load(cls, path, keys_path=None, **options):
+        with np.load(path, allow_pickle=False) as data:
+            state = json.loads(str(data['state']))
+            modeler = cls(state['method'], state['n_topics'], keys_path=keys_path, **options)
+            modeler.vocabulary = {term: idx for idx, term in enumerate(state['terms'])}
+            modeler.model.components_ = data['components']
+            modeler.model.n_docs_seen_ = state['n_docs_seen']
+            if 'trained_keys' in data.files:
+                modeler.trained_keys.add(data['trained_keys'].tolist())
+                modeler.trained_keys.commit()
+            if state['method'] == 'nmf':
+                modeler.model.wtw_ = data['wtw']
+                modeler.model.wtx_ = data['wtx']
+            else:
+                modeler.model.n_batches_ = state['n_batches']
+        return modeler
+
+    def close(self):
+        self.trained_keys.close()